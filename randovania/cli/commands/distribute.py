@@ -4,6 +4,7 @@ from pathlib import Path
 
 from randovania.cli import echoes_lib
 from randovania.generator import generator
+from randovania.generator.filler import retcon
 from randovania.interface_common import simplified_patcher
 from randovania.interface_common.cosmetic_patches import CosmeticPatches
 from randovania.layout.permalink import Permalink
@@ -12,6 +13,7 @@ from randovania.resolver import debug
 
 def distribute_command_logic(args):
     debug.set_level(args.debug)
+    retcon.set_candidate_workers(args.candidate_workers)
 
     def status_update(s):
         pass
@@ -20,7 +22,8 @@ def distribute_command_logic(args):
 
     before = time.perf_counter()
     layout_description = generator.generate_description(permalink=permalink, status_update=status_update,
-                                                        validate_after_generation=args.validate, timeout=None)
+                                                        validate_after_generation=args.validate, timeout=None,
+                                                        parallel_attempts=args.parallel_attempts)
     after = time.perf_counter()
     print("Took {} seconds. Hash: {}".format(after - before, layout_description.shareable_hash))
 
@@ -40,6 +43,19 @@ def add_distribute_command(sub_parsers):
 
     echoes_lib.add_debug_argument(parser)
     echoes_lib.add_validate_argument(parser)
+    parser.add_argument(
+        "--candidate-workers",
+        type=int,
+        default=1,
+        help="How many processes to use for evaluating the possible actions of the generator. "
+             "The processes are started for each generation attempt, so it only helps with slow presets. "
+             "Doesn't change the generated seed.")
+    parser.add_argument(
+        "--parallel-attempts",
+        type=int,
+        help="Runs the generation attempts in this many processes, with each attempt using its own random "
+             "numbers. The generated seed is different than without this option, but the same for any "
+             "number of processes.")
     parser.add_argument("permalink", type=str, help="The permalink to use")
     parser.add_argument(
         "output_file",
@@ -6,6 +6,7 @@ from randovania.cli.echoes_lib import add_debug_argument
 from randovania.game_description import data_reader
 from randovania.layout.layout_description import LayoutDescription
 from randovania.resolver import debug, resolver
+from randovania.resolver.certificate import certificate_from_solver_path
 
 
 def validate_command_logic(args):
@@ -20,7 +21,8 @@ def validate_command_logic(args):
     final_state_by_resolve = resolver.resolve(
         configuration=configuration,
         game=game,
-        patches=patches
+        patches=patches,
+        certificate=certificate_from_solver_path(game.world_list, description.solver_path),
     )
     print(final_state_by_resolve)
 
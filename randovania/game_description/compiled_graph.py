@@ -0,0 +1,175 @@
+import weakref
+from typing import NamedTuple, Tuple, List, Optional, Dict, FrozenSet
+
+from randovania.game_description.game_patches import GamePatches
+from randovania.game_description.node import Node
+from randovania.game_description.requirements import RequirementSet, CompiledRequirementSet, RequirementList
+from randovania.game_description.resources.resource_info import ResourceInfo, CurrentResources
+from randovania.game_description.resources.resource_slots import ResourceSlots
+from randovania.game_description.world_list import WorldList, ConnectionsFingerprint
+
+
+class NodeConnections(NamedTuple):
+    """All connections leaving a node, including the requirements to leave it."""
+    connections: Tuple[Tuple[Node, RequirementSet, CompiledRequirementSet], ...]
+    dependencies: Tuple[int, ...]
+    has_damage: bool
+
+
+def adds_self_as_requirement(current_resources: CurrentResources) -> bool:
+    """
+    If resource nodes that check for it require their own resource to leave them.
+    :param current_resources:
+    :return:
+    """
+    # FIXME: using non-resource as key in CurrentResources
+    return current_resources.get("add_self_as_requirement_to_resources") == 1
+
+
+def _same(a, b) -> bool:
+    return a is b or a == b
+
+
+class CompiledGraph:
+    """
+    The connections leaving each node of a WorldList with some GamePatches, with dock and teleporter targets already
+    resolved and the requirements to leave each node included, along with their compiled programs.
+    Connections of each node are calculated the first time they're needed, and stored by node index.
+    Only the elevators, docks and translator gates of the patches change the connections, so a CompiledGraph is
+    valid for any patches with the same of these, such as after placing pickups.
+    """
+    resource_slots: ResourceSlots
+    patches: GamePatches
+    add_self_as_requirement: bool
+    resources_required_to_leave: FrozenSet[ResourceInfo]
+    _world_list: "weakref.ReferenceType[WorldList]"
+    _connections_fingerprint: ConnectionsFingerprint
+    _by_index: List[Optional[Tuple[Node, NodeConnections]]]
+    _by_node: Dict[Node, NodeConnections]
+
+    def __init__(self,
+                 world_list: WorldList,
+                 resource_slots: ResourceSlots,
+                 patches: GamePatches,
+                 add_self_as_requirement: bool,
+                 resources_required_to_leave: FrozenSet[ResourceInfo] = frozenset(),
+                 ):
+        """
+        :param world_list:
+        :param resource_slots:
+        :param patches:
+        :param add_self_as_requirement: Passed to the requirements to leave each node.
+        See `adds_self_as_requirement`.
+        :param resources_required_to_leave: Resource nodes that give one of these require it to leave them.
+        """
+        # Weak, so the cache of compiled_graph_for doesn't keep the WorldList alive
+        self._world_list = weakref.ref(world_list)
+        self.resource_slots = resource_slots
+        self.patches = patches
+        self.add_self_as_requirement = add_self_as_requirement
+        self.resources_required_to_leave = resources_required_to_leave
+        self._connections_fingerprint = world_list.connections_fingerprint
+        self._by_index = [None] * len(world_list.all_nodes)
+        self._by_node = {}
+
+    @property
+    def world_list(self) -> WorldList:
+        return self._world_list()
+
+    def is_valid_for(self,
+                     patches: GamePatches,
+                     add_self_as_requirement: bool,
+                     resources_required_to_leave: FrozenSet[ResourceInfo],
+                     ) -> bool:
+        """
+        Checks if the connections would be the same if this graph was created with the given arguments.
+        :param patches:
+        :param add_self_as_requirement:
+        :param resources_required_to_leave:
+        :return:
+        """
+        return (add_self_as_requirement == self.add_self_as_requirement
+                and _same(resources_required_to_leave, self.resources_required_to_leave)
+                and _same(self._connections_fingerprint, self.world_list.connections_fingerprint)
+                and _same(patches.elevator_connection, self.patches.elevator_connection)
+                and _same(patches.dock_connection, self.patches.dock_connection)
+                and _same(patches.dock_weakness, self.patches.dock_weakness)
+                and _same(patches.translator_gates, self.patches.translator_gates))
+
+    def connections_from(self, node: Node) -> NodeConnections:
+        index = node.index
+        if 0 <= index < len(self._by_index):
+            entry = self._by_index[index]
+            if entry is not None and entry[0] is node:
+                return entry[1]
+
+            if entry is None:
+                connections = self._calculate_connections(node)
+                self._by_index[index] = (node, connections)
+                return connections
+
+        # Another node with the same index, such as an EventPickupNode
+        connections = self._by_node.get(node)
+        if connections is None:
+            connections = self._calculate_connections(node)
+            self._by_node[node] = connections
+        return connections
+
+    def _calculate_connections(self, node: Node) -> NodeConnections:
+        resources = {"add_self_as_requirement_to_resources": 1} if self.add_self_as_requirement else {}
+        requirement_to_leave = node.requirements_to_leave(self.patches, resources)
+
+        extra_requirement = None
+        if node.is_resource_node and node.resource() in self.resources_required_to_leave:
+            extra_requirement = RequirementSet([RequirementList.with_single_resource(node.resource())])
+
+        all_connections = []
+        for target_node, requirements in self.world_list.potential_nodes_from(node, self.patches):
+            if target_node is None:
+                continue
+
+            if requirement_to_leave != RequirementSet.trivial():
+                requirements = requirements.union(requirement_to_leave)
+
+            if extra_requirement is not None:
+                requirements = requirements.union(extra_requirement)
+
+            all_connections.append((target_node, requirements, requirements.compile(self.resource_slots)))
+
+        dependencies = set()
+        for _, _, compiled in all_connections:
+            dependencies.update(compiled.dependencies)
+
+        return NodeConnections(
+            connections=tuple(all_connections),
+            dependencies=tuple(sorted(dependencies)),
+            has_damage=any(compiled.has_damage for _, _, compiled in all_connections),
+        )
+
+
+_graph_for_world_list: "weakref.WeakKeyDictionary[WorldList, CompiledGraph]" = weakref.WeakKeyDictionary()
+
+
+def compiled_graph_for(world_list: WorldList,
+                       resource_slots: ResourceSlots,
+                       patches: GamePatches,
+                       add_self_as_requirement: bool,
+                       resources_required_to_leave: FrozenSet[ResourceInfo] = frozenset(),
+                       ) -> CompiledGraph:
+    """
+    Gets a CompiledGraph for the given arguments. The last one created for each WorldList is reused while it's valid,
+    so the resolver and the generator share the connections they already calculated.
+    :param world_list:
+    :param resource_slots:
+    :param patches:
+    :param add_self_as_requirement:
+    :param resources_required_to_leave:
+    :return:
+    """
+    graph = _graph_for_world_list.get(world_list)
+    if (graph is None or graph.resource_slots is not resource_slots
+            or not graph.is_valid_for(patches, add_self_as_requirement, resources_required_to_leave)):
+        graph = CompiledGraph(world_list, resource_slots, patches, add_self_as_requirement,
+                              resources_required_to_leave)
+        _graph_for_world_list[world_list] = graph
+    return graph
@@ -1,12 +1,14 @@
 from typing import List, Callable, TypeVar, Tuple, Dict, Optional
 
+from randovania.game_description import description_cache
 from randovania.game_description.area import Area
 from randovania.game_description.area_location import AreaLocation
 from randovania.game_description.dock import DockWeakness, DockType, DockWeaknessDatabase, DockConnection
 from randovania.game_description.game_description import GameDescription
 from randovania.game_description.node import GenericNode, DockNode, TeleporterNode, PickupNode, EventNode, Node, \
     TranslatorGateNode, LogbookNode, LoreType
-from randovania.game_description.requirements import IndividualRequirement, RequirementList, RequirementSet
+from randovania.game_description.requirements import IndividualRequirement, RequirementList, RequirementSet, \
+    intern_individual_requirement, intern_requirement_list, intern_requirement_set
 from randovania.game_description.resources.damage_resource_info import DamageReduction, DamageResourceInfo
 from randovania.game_description.resources.pickup_index import PickupIndex
 from randovania.game_description.resources.resource_database import find_resource_info_with_id, ResourceDatabase, \
@@ -61,23 +63,25 @@ def read_damage_resource_info_array(data: List[Dict], items: List[SimpleResource
 
 def read_individual_requirement(data: Dict, resource_database: ResourceDatabase
                                 ) -> IndividualRequirement:
-    return IndividualRequirement.with_data(
+    return intern_individual_requirement(IndividualRequirement.with_data(
         resource_database,
         ResourceType(data["requirement_type"]), data["requirement_index"],
-        data["amount"], data["negate"])
+        data["amount"], data["negate"]))
 
 
 def read_requirement_list(data: List[Dict],
                           resource_database: ResourceDatabase,
                           ) -> Optional[RequirementList]:
     individuals = read_array(data, lambda x: read_individual_requirement(x, resource_database=resource_database))
-    return RequirementList.without_misc_resources(individuals, resource_database)
+    return intern_requirement_list(RequirementList.without_misc_resources(individuals, resource_database))
 
 
 def read_requirement_set(data: List[List[Dict]],
                          resource_database: ResourceDatabase) -> RequirementSet:
     alternatives = read_array(data, lambda x: read_requirement_list(x, resource_database=resource_database))
-    return RequirementSet(alternative for alternative in alternatives if alternative is not None)
+    return intern_requirement_set(RequirementSet(alternative
+                                                 for alternative in alternatives
+                                                 if alternative is not None))
 
 
 # Resource Gain
@@ -279,5 +283,9 @@ def decode_data_with_world_reader(data: Dict) -> Tuple[WorldReader, GameDescript
     )
 
 
-def decode_data(data: Dict) -> GameDescription:
+def _decode_data_uncached(data: Dict) -> GameDescription:
     return decode_data_with_world_reader(data)[1]
+
+
+def decode_data(data: Dict) -> GameDescription:
+    return description_cache.load_or_decode(data, _decode_data_uncached)
@@ -0,0 +1,193 @@
+"""Compiled cache of decoded GameDescriptions, keyed by the content of the raw data."""
+import collections
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import weakref
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from randovania import VERSION
+from randovania.game_description.game_description import GameDescription
+from randovania.interface_common import persistence
+
+_CACHE_FORMAT_VERSION = 1
+_CACHE_SUFFIX = ".pickle"
+_MAXIMUM_DISK_ENTRIES = 8
+_MAXIMUM_IN_MEMORY_ENTRIES = 2
+
+# Least recently used first
+_in_memory_cache: "collections.OrderedDict[str, bytes]" = collections.OrderedDict()
+# The key of the data each GameDescription returned by load_or_decode was created from
+_key_for_game: "weakref.WeakKeyDictionary[GameDescription, str]" = weakref.WeakKeyDictionary()
+_custom_cache_dir: Optional[Path] = None
+_disk_cache_enabled = True
+
+
+def set_cache_dir(path: Optional[Path]) -> None:
+    """
+    Changes where the compiled descriptions are stored on disk.
+    :param path: The new directory. None restores the default, inside the user data dir.
+    :return:
+    """
+    global _custom_cache_dir
+    _custom_cache_dir = path
+
+
+def set_disk_cache_enabled(enabled: bool) -> None:
+    global _disk_cache_enabled
+    _disk_cache_enabled = enabled
+
+
+def cache_dir() -> Path:
+    if _custom_cache_dir is not None:
+        return _custom_cache_dir
+    return persistence.user_data_dir().joinpath("game_description_cache")
+
+
+def clear_in_memory_cache() -> None:
+    _in_memory_cache.clear()
+
+
+def cache_key_for_data(data: Dict) -> Optional[str]:
+    """
+    Calculates the key used for the given raw data. Any change to the data, to the Randovania version or to the
+    cache format results in a different key, so stale entries are never used.
+    :param data:
+    :return: None if the data can't be used as a key.
+    """
+    try:
+        encoded_data = json.dumps(data, separators=(',', ':')).encode("UTF-8")
+    except (TypeError, ValueError):
+        return None
+
+    hasher = hashlib.blake2b(encoded_data, digest_size=16)
+    hasher.update("{}-{}-{}".format(VERSION, _CACHE_FORMAT_VERSION, pickle.HIGHEST_PROTOCOL).encode("UTF-8"))
+    return hasher.hexdigest()
+
+
+def cache_key_for_game(game: GameDescription) -> Optional[str]:
+    """
+    Gets the key of the raw data the given GameDescription was created from by load_or_decode, so equal games
+    decoded separately can be recognized without comparing them. Changes made to the game afterwards aren't tracked.
+    :param game:
+    :return: None if the game wasn't created by load_or_decode, or if its data couldn't be used as a key.
+    """
+    return _key_for_game.get(game)
+
+
+def _read_from_disk(key: str) -> Optional[bytes]:
+    path = cache_dir().joinpath(key + _CACHE_SUFFIX)
+    try:
+        serialized = path.read_bytes()
+    except OSError:
+        return None
+
+    try:
+        # Entries are pruned by modification time, so mark this one as recently used
+        os.utime(path)
+    except OSError:
+        pass
+    return serialized
+
+
+def _prune_disk_entries(directory: Path, key: str) -> None:
+    """
+    Deletes the least recently used entries, so at most _MAXIMUM_DISK_ENTRIES are kept.
+    Entries for different data, such as a custom database, are kept as long as they're recently used.
+    :param directory:
+    :param key: The entry that was just written, which is never deleted.
+    :return:
+    """
+    entries = []
+    for entry in directory.glob("*" + _CACHE_SUFFIX):
+        if entry.stem == key:
+            continue
+        try:
+            entries.append((entry.stat().st_mtime, entry))
+        except OSError:
+            # Deleted by another process
+            continue
+
+    entries.sort(key=lambda mtime_and_entry: mtime_and_entry[0], reverse=True)
+    for _, entry in entries[_MAXIMUM_DISK_ENTRIES - 1:]:
+        try:
+            entry.unlink()
+        except OSError:
+            pass
+
+
+def _write_to_disk(key: str, serialized: bytes) -> None:
+    directory = cache_dir()
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+
+        # A unique temporary file, so processes writing the same entry at the same time don't conflict
+        with tempfile.NamedTemporaryFile(dir=directory, prefix=key, suffix=".tmp", delete=False) as temporary_file:
+            temporary_path = temporary_file.name
+            temporary_file.write(serialized)
+
+        try:
+            os.replace(temporary_path, directory.joinpath(key + _CACHE_SUFFIX))
+        except OSError:
+            os.unlink(temporary_path)
+            raise
+
+        _prune_disk_entries(directory, key)
+
+    except OSError:
+        # The cache is just an optimization, so failing to write it isn't an error
+        pass
+
+
+def _remember_in_memory(key: str, serialized: bytes) -> None:
+    _in_memory_cache[key] = serialized
+    _in_memory_cache.move_to_end(key)
+    while len(_in_memory_cache) > _MAXIMUM_IN_MEMORY_ENTRIES:
+        _in_memory_cache.popitem(last=False)
+
+
+def _load(serialized: bytes) -> Optional[GameDescription]:
+    try:
+        result = pickle.loads(serialized)
+    except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, IndexError, TypeError, ValueError):
+        return None
+
+    if isinstance(result, GameDescription):
+        return result
+    return None
+
+
+def load_or_decode(data: Dict, decoder: Callable[[Dict], GameDescription]) -> GameDescription:
+    """
+    Returns a GameDescription for the given raw data, using the compiled cache when possible.
+    Every call returns a new GameDescription, so callers are free to modify it.
+    :param data:
+    :param decoder: Used to create the GameDescription when the cache has no valid entry for the data.
+    :return:
+    """
+    key = cache_key_for_data(data)
+    if key is None:
+        return decoder(data)
+
+    serialized = _in_memory_cache.get(key)
+    if serialized is None and _disk_cache_enabled:
+        serialized = _read_from_disk(key)
+
+    if serialized is not None:
+        result = _load(serialized)
+        if result is not None:
+            _remember_in_memory(key, serialized)
+            _key_for_game[result] = key
+            return result
+
+    result = decoder(data)
+    serialized = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+    _remember_in_memory(key, serialized)
+    if _disk_cache_enabled:
+        _write_to_disk(key, serialized)
+
+    _key_for_game[result] = key
+    return result
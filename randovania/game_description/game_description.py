@@ -1,6 +1,6 @@
 """Classes that describes the raw data of a game world."""
 import copy
-from typing import Iterator, FrozenSet, Dict
+from typing import Iterator, FrozenSet, Dict, Optional
 
 from randovania.game_description.area import Area
 from randovania.game_description.area_location import AreaLocation
@@ -11,6 +11,7 @@ from randovania.game_description.requirements import RequirementSet, Satisfiable
 from randovania.game_description.resources.damage_resource_info import DamageResourceInfo
 from randovania.game_description.resources.resource_database import ResourceDatabase
 from randovania.game_description.resources.resource_info import ResourceInfo, ResourceGainTuple, CurrentResources
+from randovania.game_description.resources.resource_slots import ResourceSlots
 from randovania.game_description.resources.simple_resource_info import SimpleResourceInfo
 from randovania.game_description.world_list import WorldList
 
@@ -39,6 +40,7 @@ class GameDescription:
     initial_states: Dict[str, ResourceGainTuple]
     dangerous_resources: FrozenSet[SimpleResourceInfo]
     world_list: WorldList
+    _resource_slots: Optional[ResourceSlots] = None
 
     def __deepcopy__(self, memodict):
         return GameDescription(
@@ -78,9 +80,40 @@ class GameDescription:
             _calculate_dangerous_resources_in_areas(self.world_list.all_areas)) | frozenset(
             _calculate_dangerous_resources_in_db(self.dock_weakness_database))
 
+    @property
+    def resource_slots(self) -> ResourceSlots:
+        """
+        A ResourceSlots for all resources of this game: everything in the resource database and the resources of
+        all resource nodes.
+        """
+        if self._resource_slots is None:
+            self._resource_slots = ResourceSlots.with_database(
+                self.resource_database,
+                (node.resource() for node in self.world_list.all_nodes if node.is_resource_node),
+            )
+        return self._resource_slots
+
+    def layered_copy(self) -> "GameDescription":
+        """
+        Creates a copy of this GameDescription that can be patched without modifying this one.
+        All the data is shared, with the exception of the patched connections.
+        :return:
+        """
+        result = copy.copy(self)
+        result.world_list = self.world_list.layered_copy()
+        result.initial_states = copy.copy(self.initial_states)
+        return result
+
     def patch_requirements(self, resources, damage_multiplier: float):
         self.world_list.patch_requirements(resources, damage_multiplier)
 
+        # Compile now all connections, since that's done only once per RequirementSet
+        slots = self.resource_slots
+        for area in self.world_list.all_areas:
+            for node in area.nodes:
+                for requirements in self.world_list.connections_in_area(node).values():
+                    requirements.compile(slots)
+
     def create_game_patches(self) -> GamePatches:
         elevator_connection = {
             node.teleporter_instance_id: node.default_connection
@@ -1,9 +1,13 @@
+import collections
+import weakref
 from functools import lru_cache
 from math import ceil
-from typing import NamedTuple, Optional, Iterable, FrozenSet, Iterator, Tuple
+from typing import NamedTuple, Optional, Iterable, FrozenSet, Iterator, Tuple, Dict, List
 
 from randovania.game_description.resources.resource_database import ResourceDatabase
 from randovania.game_description.resources.resource_info import ResourceInfo, CurrentResources
+from randovania.game_description.resources.resource_slots import ResourceSlots, ResourceVector, \
+    DamageReductionSlots
 from randovania.game_description.resources.resource_type import ResourceType
 from randovania.game_description.resources.simple_resource_info import SimpleResourceInfo
 
@@ -49,6 +53,16 @@ class IndividualRequirement(NamedTuple):
         else:
             return has_amount
 
+    def compile(self, slots: ResourceSlots) -> Tuple[int, int, bool]:
+        """
+        Converts this requirement to a (slot, amount, negate) tuple, for use with ResourceVector.
+        Damage requirements depends on energy and can't be compiled this way.
+        :param slots:
+        :return:
+        """
+        assert not self.is_damage, "Damage requirements can't be compiled to a single slot"
+        return slots.slot(self.resource), self.amount, self.negate
+
     def __repr__(self):
         return "{} {} {}".format(
             self.resource,
@@ -87,6 +101,12 @@ class RequirementList:
     def __deepcopy__(self, memodict):
         return self
 
+    def __getstate__(self):
+        # Hashes of strings changes between processes, so the cached hash can't be persisted
+        state = dict(self.__dict__)
+        state.pop("_cached_hash", None)
+        return state
+
     def __init__(self, difficulty_level: int, items: Iterable[IndividualRequirement]):
         self.difficulty_level = difficulty_level
         self.items = frozenset(items)
@@ -119,8 +139,8 @@ class RequirementList:
         return cls(difficulty, to_add)
 
     def __eq__(self, other):
-        return isinstance(
-            other, RequirementList) and self.items == other.items
+        return self is other or (isinstance(
+            other, RequirementList) and self.items == other.items)
 
     def __lt__(self, other: "RequirementList"):
         return self.items < other.items
@@ -172,22 +192,29 @@ class RequirementList:
         :param static_resources:
         :param damage_multiplier:
         :return: None if this RequirementList is impossible to satisfy, otherwise the patched RequirementList.
+        When nothing changes, this same RequirementList is returned.
         """
         items = []
+        changed = False
         for item in self.values():
             if static_resources.get(item.resource) is not None:
                 # If the resource is a static resource, we either remove it from the list or
                 # consider this list impossible
                 if not item.satisfied(static_resources, 0):
                     return None
+                changed = True
             else:
                 # An empty RequirementList is considered satisfied, so we don't have to add the trivial resource
-                if item.is_damage:
+                if item.is_damage and damage_multiplier != 1:
                     items.append(item.multiply_amount(damage_multiplier))
+                    changed = True
                 else:
                     items.append(item)
 
-        return RequirementList(self.difficulty_level, items)
+        if not changed:
+            return self
+
+        return intern_requirement_list(RequirementList(self.difficulty_level, items))
 
     def get(self, resource: ResourceInfo) -> Optional[IndividualRequirement]:
         """
@@ -231,6 +258,126 @@ class RequirementList:
         return tuple(sorted(self.items))
 
 
+def _minimal_alternatives(alternatives: Iterable[RequirementList]) -> FrozenSet[RequirementList]:
+    """
+    Removes all alternatives that are a superset of another alternative.
+    Alternatives are visited by increasing size, so each one only needs to be compared against the already kept ones,
+    which is done with bitmasks of their IndividualRequirement.
+    :param alternatives:
+    :return:
+    """
+    input_set = frozenset(alternatives)
+    if len(input_set) < 2:
+        return input_set
+
+    bit_for_individual: Dict[IndividualRequirement, int] = {}
+    kept_masks: List[int] = []
+    result = []
+
+    for alternative in sorted(input_set, key=lambda it: len(it.items)):
+        mask = 0
+        for individual in alternative.items:
+            bit = bit_for_individual.get(individual)
+            if bit is None:
+                bit = bit_for_individual[individual] = 1 << len(bit_for_individual)
+            mask |= bit
+
+        for kept in kept_masks:
+            if kept & mask == kept:
+                break
+        else:
+            kept_masks.append(mask)
+            result.append(alternative)
+
+    if len(result) == len(input_set):
+        return input_set
+    return frozenset(result)
+
+
+CompiledItems = Tuple[Tuple[int, int, bool], ...]
+CompiledDamage = Tuple[Tuple[float, DamageReductionSlots], ...]
+
+
+def _compiled_damage(amount: float, reductions: DamageReductionSlots, vector: ResourceVector) -> int:
+    multiplier = 1
+    for slot, reduction in reductions:
+        if vector[slot] > 0:
+            multiplier *= reduction
+    return ceil(multiplier * amount)
+
+
+def _compiled_list_satisfied(items: CompiledItems,
+                             damage: CompiledDamage,
+                             vector: ResourceVector,
+                             current_energy: int,
+                             ) -> bool:
+    for slot, amount, negate in items:
+        if (vector[slot] >= amount) == negate:
+            return False
+
+    for amount, reductions in damage:
+        if current_energy <= _compiled_damage(amount, reductions, vector):
+            return False
+
+    return True
+
+
+class CompiledRequirementSet:
+    """
+    A RequirementSet converted to a flat program, for fast evaluation against a ResourceVector.
+    Each alternative is a pair: the (slot, amount, negate) of each non-damage requirement, sorted by slot,
+    and the (amount, damage reduction slots) of each damage requirement.
+    Evaluation gives the same results as the RequirementSet methods of the same name.
+    """
+    __slots__ = ("alternatives", "dependencies", "has_damage")
+    alternatives: Tuple[Tuple[CompiledItems, CompiledDamage], ...]
+    dependencies: Tuple[int, ...]
+    has_damage: bool
+
+    def __init__(self, alternatives: Iterable[Tuple[CompiledItems, CompiledDamage]]):
+        self.alternatives = tuple(alternatives)
+
+        # All slots that can change the result, including damage reductions. Energy also matters if has_damage.
+        dependencies = set()
+        for items, damage in self.alternatives:
+            dependencies.update(slot for slot, _, _ in items)
+            for _, reductions in damage:
+                dependencies.update(slot for slot, _ in reductions)
+        self.dependencies = tuple(sorted(dependencies))
+        self.has_damage = any(damage for _, damage in self.alternatives)
+
+    @classmethod
+    def from_requirement_set(cls, requirement_set: "RequirementSet", slots: ResourceSlots) -> "CompiledRequirementSet":
+        alternatives = []
+        for alternative in requirement_set.alternatives:
+            items = []
+            damage = []
+            for individual in alternative.values():
+                if individual.is_damage:
+                    damage.append((individual.amount, slots.damage_reduction_slots(individual.resource)))
+                else:
+                    items.append(individual.compile(slots))
+            alternatives.append((tuple(sorted(items)), tuple(damage)))
+
+        # Cheaper alternatives first, so `satisfied` finds a satisfied one sooner
+        alternatives.sort(key=lambda it: (len(it[0]) + len(it[1]), it))
+        return cls(alternatives)
+
+    def satisfied(self, vector: ResourceVector, current_energy: int) -> bool:
+        for items, damage in self.alternatives:
+            if _compiled_list_satisfied(items, damage, vector, current_energy):
+                return True
+        return False
+
+    def minimum_damage(self, vector: ResourceVector, current_energy: int) -> int:
+        result = 1499
+        for items, damage in self.alternatives:
+            if _compiled_list_satisfied(items, damage, vector, current_energy):
+                result = min(result, sum(_compiled_damage(amount, reductions, vector)
+                                         for amount, reductions in damage))
+        return result
+
+
 class RequirementSet:
     """
     Represents multiple alternatives of satisfying a requirement.
@@ -238,6 +385,7 @@ class RequirementSet:
     """
     alternatives: FrozenSet[RequirementList]
     _cached_hash: Optional[int] = None
+    _compiled: Optional[Tuple[ResourceSlots, CompiledRequirementSet]] = None
 
     def __init__(self, alternatives: Iterable[RequirementList]):
         """
@@ -245,19 +393,21 @@ class RequirementSet:
         Redundant alternatives (Bombs or Bombs + Space Jump) are automatically removed.
         :param alternatives:
         """
-        input_set = frozenset(alternatives)
-        self.alternatives = frozenset(
-            requirement
-            for requirement in input_set
-            if not any(other < requirement for other in input_set)
-        )
+        self.alternatives = _minimal_alternatives(alternatives)
 
     def __deepcopy__(self, memodict):
         return self
 
+    def __getstate__(self):
+        # Hashes of strings changes between processes, so the cached hash can't be persisted
+        state = dict(self.__dict__)
+        state.pop("_cached_hash", None)
+        state.pop("_compiled", None)
+        return state
+
     def __eq__(self, other):
-        return isinstance(
-            other, RequirementSet) and self.alternatives == other.alternatives
+        return self is other or (isinstance(
+            other, RequirementSet) and self.alternatives == other.alternatives)
 
     def __hash__(self) -> int:
         if self._cached_hash is None:
@@ -332,17 +482,36 @@ class RequirementSet:
         else:
             return None
 
+    def compile(self, slots: ResourceSlots) -> CompiledRequirementSet:
+        """
+        Gets a CompiledRequirementSet for this set, using the given slots. The result is kept, so compiling
+        again with the same slots is free.
+        :param slots:
+        :return:
+        """
+        compiled = self._compiled
+        if compiled is None or compiled[0] is not slots:
+            compiled = (slots, CompiledRequirementSet.from_requirement_set(self, slots))
+            self._compiled = compiled
+        return compiled[1]
+
     def patch_requirements(self, static_resources: CurrentResources, damage_multiplier: float) -> "RequirementSet":
-        """"""
+        """
+        Patches all alternatives. See RequirementList.patch_requirements.
+        When no alternative changes, this same RequirementSet is returned.
+        """
         new_alternatives = [
             alternative.patch_requirements(static_resources, damage_multiplier)
             for alternative in self.alternatives
         ]
-        return RequirementSet(alternative
-                              for alternative in new_alternatives
+        if all(new is old for new, old in zip(new_alternatives, self.alternatives)):
+            return self
+
+        return intern_requirement_set(RequirementSet(alternative
+                                                     for alternative in new_alternatives
 
-                              # RequirementList.simplify may return None
-                              if alternative is not None)
+                                                     # RequirementList.simplify may return None
+                                                     if alternative is not None))
 
     def replace(self, individual: IndividualRequirement, replacements: "RequirementSet") -> "RequirementSet":
         result = []
@@ -358,10 +527,15 @@ class RequirementSet:
 
     def union(self, other: "RequirementSet") -> "RequirementSet":
         """Create a new RequirementSet that is only satisfied when both are satisfied"""
-        return RequirementSet(
-            a.union(b)
+        if other == RequirementSet.trivial() or self == RequirementSet.impossible():
+            return self
+        if self == RequirementSet.trivial() or other == RequirementSet.impossible():
+            return other
+
+        return intern_requirement_set(RequirementSet(
+            intern_requirement_list(a.union(b))
             for a in self.alternatives
-            for b in other.alternatives)
+            for b in other.alternatives))
 
     def expand_alternatives(self, other: "RequirementSet") -> "RequirementSet":
         """Create a new RequirementSet that is satisfied when either are satisfied."""
@@ -396,3 +570,61 @@ class RequirementSet:
 
 
 SatisfiableRequirements = FrozenSet[RequirementList]
+
+# Interning pools, so equal requirements share the same object. Lists and sets are only kept while in use elsewhere.
+# IndividualRequirement is a tuple and can't be weakly referenced, so only the most recently used ones are kept.
+_INDIVIDUAL_POOL_SIZE = 4096
+_individual_pool: "collections.OrderedDict[IndividualRequirement, IndividualRequirement]" = collections.OrderedDict()
+_list_pool: "weakref.WeakValueDictionary[Tuple[int, FrozenSet[IndividualRequirement]], RequirementList]" = \
+    weakref.WeakValueDictionary()
+_set_pool: "weakref.WeakValueDictionary[FrozenSet[Tuple[int, FrozenSet[IndividualRequirement]]], RequirementSet]" = \
+    weakref.WeakValueDictionary()
+
+
+def intern_individual_requirement(individual: IndividualRequirement) -> IndividualRequirement:
+    """
+    Gets the shared IndividualRequirement equal to the given one.
+    :param individual:
+    :return:
+    """
+    result = _individual_pool.get(individual)
+    if result is None:
+        _individual_pool[individual] = result = individual
+        if len(_individual_pool) > _INDIVIDUAL_POOL_SIZE:
+            _individual_pool.popitem(last=False)
+    else:
+        _individual_pool.move_to_end(individual)
+    return result
+
+
+def intern_requirement_list(requirement_list: RequirementList) -> RequirementList:
+    """
+    Gets the shared RequirementList with the same items and difficulty as the given one.
+    The items of a new list are interned as well.
+    :param requirement_list:
+    :return:
+    """
+    key = (requirement_list.difficulty_level, requirement_list.items)
+    result = _list_pool.get(key)
+    if result is None:
+        requirement_list.items = frozenset(intern_individual_requirement(individual)
+                                           for individual in requirement_list.items)
+        _list_pool[key] = result = requirement_list
+    return result
+
+
+def intern_requirement_set(requirement_set: RequirementSet) -> RequirementSet:
+    """
+    Gets the shared RequirementSet with the same alternatives as the given one.
+    The alternatives of a new set are interned as well.
+    :param requirement_set:
+    :return:
+    """
+    # RequirementList equality ignores the difficulty, but sets with different difficulties can't be shared
+    key = frozenset((alternative.difficulty_level, alternative.items) for alternative in requirement_set.alternatives)
+    result = _set_pool.get(key)
+    if result is None:
+        requirement_set.alternatives = frozenset(intern_requirement_list(alternative)
+                                                 for alternative in requirement_set.alternatives)
+        _set_pool[key] = result = requirement_set
+    return result
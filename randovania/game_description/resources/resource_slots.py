@@ -0,0 +1,94 @@
+from array import array
+from typing import Tuple, Dict, Iterable, Optional, Iterator
+
+from randovania.game_description.resources.damage_resource_info import DamageResourceInfo
+from randovania.game_description.resources.resource_database import ResourceDatabase
+from randovania.game_description.resources.resource_info import ResourceInfo, CurrentResources
+
+ResourceVector = array
+"""An array('i') with the quantity of each resource, indexed by the slots of a ResourceSlots."""
+
+DamageReductionSlots = Tuple[Tuple[int, float], ...]
+
+
+def all_resources_of_database(database: ResourceDatabase) -> Iterator[ResourceInfo]:
+    yield from database.item
+    yield from database.event
+    yield from database.trick
+    yield from database.damage
+    yield from database.version
+    yield from database.misc
+    yield from database.difficulty
+
+
+class ResourceSlots:
+    """
+    Assigns a dense integer slot to every known resource, so quantities can be stored in a ResourceVector
+    and requirements can be evaluated without hashing the resources themselves.
+    """
+    resources: Tuple[ResourceInfo, ...]
+    _slot_for_resource: Dict[ResourceInfo, int]
+
+    def __init__(self, resources: Iterable[ResourceInfo]):
+        self.resources = tuple(dict.fromkeys(resources))
+        self._slot_for_resource = {
+            resource: slot
+            for slot, resource in enumerate(self.resources)
+        }
+
+    @classmethod
+    def with_database(cls,
+                      database: ResourceDatabase,
+                      extra_resources: Iterable[ResourceInfo],
+                      ) -> "ResourceSlots":
+        """
+        Creates a ResourceSlots for all resources in the given database, followed by the given extra resources,
+        such as PickupIndex and LogbookAsset.
+        :param database:
+        :param extra_resources:
+        :return:
+        """
+        return cls(list(all_resources_of_database(database)) + list(extra_resources))
+
+    def __len__(self) -> int:
+        return len(self.resources)
+
+    def __contains__(self, resource: ResourceInfo) -> bool:
+        return resource in self._slot_for_resource
+
+    def slot(self, resource: ResourceInfo) -> int:
+        return self._slot_for_resource[resource]
+
+    def get_slot(self, resource: ResourceInfo) -> Optional[int]:
+        return self._slot_for_resource.get(resource)
+
+    def damage_reduction_slots(self, resource: DamageResourceInfo) -> DamageReductionSlots:
+        """
+        The slot and multiplier of each damage reduction of the given DamageResourceInfo.
+        :param resource:
+        :return:
+        """
+        return tuple(
+            (self.slot(reduction.inventory_item), reduction.damage_multiplier)
+            for reduction in resource.reductions
+        )
+
+    def empty_vector(self) -> ResourceVector:
+        return array("i", [0]) * len(self.resources)
+
+    def create_vector(self, current_resources: CurrentResources) -> ResourceVector:
+        """
+        Creates a ResourceVector with the quantities of the given CurrentResources.
+        Keys that aren't known resources are ignored.
+        :param current_resources:
+        :return:
+        """
+        vector = self.empty_vector()
+        slot_for_resource = self._slot_for_resource
+
+        for resource, quantity in current_resources.items():
+            slot = slot_for_resource.get(resource)
+            if slot is not None:
+                vector[slot] = quantity
+
+        return vector
@@ -1,16 +1,75 @@
+import collections
 import copy
 import re
-from typing import List, Dict, Iterator, Tuple, FrozenSet, Iterable
+from typing import List, Dict, Iterator, Tuple, FrozenSet, Iterable, Optional, NamedTuple
 
 from randovania.game_description.area import Area
 from randovania.game_description.area_location import AreaLocation
 from randovania.game_description.dock import DockConnection
 from randovania.game_description.game_patches import GamePatches
-from randovania.game_description.node import Node, DockNode, TeleporterNode
+from randovania.game_description.node import Node, DockNode, TeleporterNode, ResourceNode
 from randovania.game_description.requirements import RequirementSet
 from randovania.game_description.resources.resource_info import ResourceInfo, CurrentResources
 from randovania.game_description.world import World
 
+PatchedConnections = Dict[int, Dict[int, RequirementSet]]
+ConnectionsFingerprint = tuple
+
+_PATCHED_CONNECTIONS_CACHE_SIZE = 16
+_patched_connections_cache: "collections.OrderedDict[tuple, PatchedConnections]" = collections.OrderedDict()
+
+
+def clear_patched_connections_cache():
+    _patched_connections_cache.clear()
+
+
+class _LookupIndexes(NamedTuple):
+    worlds_by_name: Dict[str, World]
+    worlds_by_asset_id: Dict[int, World]
+    worlds_by_area_id: Dict[int, World]
+    areas_by_asset_id: Dict[int, Area]
+    areas_by_location: Dict[Tuple[int, int], Area]
+    nodes_by_name: Dict[Tuple[Optional[str], str, str], Node]
+    dock_nodes: Dict[Tuple[int, int, int], DockNode]
+    nodes_by_resource: Dict[ResourceInfo, ResourceNode]
+
+
+def _build_lookup_indexes(worlds: List[World], all_nodes: Iterable[Node]) -> _LookupIndexes:
+    """
+    Creates dict indexes for the lookups of a WorldList. When more than one element matches a key,
+    the first one is kept, as it's the one a linear search returns.
+    """
+    indexes = _LookupIndexes({}, {}, {}, {}, {}, {}, {}, {})
+
+    for world in worlds:
+        indexes.worlds_by_name.setdefault(world.name, world)
+        indexes.worlds_by_name.setdefault(world.dark_name, world)
+        indexes.worlds_by_asset_id.setdefault(world.world_asset_id, world)
+
+        # Areas are only found by location in the first world with a given asset id
+        first_with_asset_id = indexes.worlds_by_asset_id[world.world_asset_id] is world
+
+        for area in world.areas:
+            indexes.worlds_by_area_id.setdefault(id(area), world)
+            indexes.areas_by_asset_id.setdefault(area.area_asset_id, area)
+            location = (world.world_asset_id, area.area_asset_id)
+            if first_with_asset_id:
+                indexes.areas_by_location.setdefault(location, area)
+            first_with_location = indexes.areas_by_location.get(location) is area
+
+            for node in area.nodes:
+                for world_name in (None, world.name, world.dark_name):
+                    indexes.nodes_by_name.setdefault((world_name, area.name, node.name), node)
+
+                if first_with_location and isinstance(node, DockNode):
+                    indexes.dock_nodes.setdefault(location + (node.dock_index,), node)
+
+    for node in all_nodes:
+        if isinstance(node, ResourceNode):
+            indexes.nodes_by_resource.setdefault(node.resource(), node)
+
+    return indexes
+
 
 class WorldList:
     worlds: List[World]
@@ -18,41 +77,76 @@ class WorldList:
     _nodes_to_area: Dict[Node, Area]
     _nodes_to_world: Dict[Node, World]
     _nodes: Tuple[Node, ...]
+    _patched_connections: Dict[Node, Dict[Node, RequirementSet]]
+    _connections_fingerprint: Optional[ConnectionsFingerprint] = None
+    _lookup_indexes: Optional[_LookupIndexes] = None
 
     def __deepcopy__(self, memodict):
-        return WorldList(
+        result = WorldList(
             worlds=copy.deepcopy(self.worlds, memodict),
         )
+        result._patched_connections = copy.deepcopy(self._patched_connections, memodict)
+        result._connections_fingerprint = self._connections_fingerprint
+        return result
 
     def __init__(self, worlds: List[World]):
         self.worlds = worlds
         self._nodes_to_area, self._nodes_to_world = _calculate_nodes_to_area_world(worlds)
 
         self._nodes = tuple(self._iterate_over_nodes())
+        self._patched_connections = {}
+
+    def layered_copy(self) -> "WorldList":
+        """
+        Creates a WorldList that shares all worlds, areas and nodes with this one, but with a separated layer
+        for patched connections. Patching the copy never changes this WorldList.
+        :return:
+        """
+        result = copy.copy(self)
+        result._nodes = tuple(self._iterate_over_nodes())
+        result._nodes_to_area = copy.copy(self._nodes_to_area)
+        result._nodes_to_world = copy.copy(self._nodes_to_world)
+        result._patched_connections = copy.copy(self._patched_connections)
+        return result
 
     def _iterate_over_nodes(self) -> Iterator[Node]:
         for world in self.worlds:
             yield from world.all_nodes
 
+    @property
+    def _indexes(self) -> _LookupIndexes:
+        """
+        Dict indexes for the lookups by name, asset id, dock index and resource. Built on first use and discarded
+        by add_new_node. Lookups that aren't in the indexes fall back to a linear search, so they behave the same
+        for elements that are equal to, but not the same object as, an element of this WorldList.
+        """
+        if self._lookup_indexes is None:
+            self._lookup_indexes = _build_lookup_indexes(self.worlds, self._nodes)
+        return self._lookup_indexes
+
     def world_with_name(self, world_name: str) -> World:
-        for world in self.worlds:
-            if world.name == world_name or world.dark_name == world_name:
-                return world
+        world = self._indexes.worlds_by_name.get(world_name)
+        if world is not None:
+            return world
         raise KeyError("Unknown name: {}".format(world_name))
 
     def world_by_asset_id(self, asset_id: int) -> World:
-        for world in self.worlds:
-            if world.world_asset_id == asset_id:
-                return world
+        world = self._indexes.worlds_by_asset_id.get(asset_id)
+        if world is not None:
+            return world
         raise KeyError("Unknown asset_id: {}".format(asset_id))
 
     def area_by_asset_id(self, asset_id: int) -> Area:
-        for area in self.all_areas:
-            if area.area_asset_id == asset_id:
-                return area
+        area = self._indexes.areas_by_asset_id.get(asset_id)
+        if area is not None:
+            return area
         raise KeyError("Unknown asset_id: {}".format(asset_id))
 
     def world_with_area(self, area: Area) -> World:
+        world = self._indexes.worlds_by_area_id.get(id(area))
+        if world is not None:
+            return world
+
         for world in self.worlds:
             if area in world.areas:
                 return world
@@ -100,21 +194,20 @@ class WorldList:
         if match is None:
             raise ValueError("Invalid name: {}".format(name))
 
-        world_name, area_name, node_name = match.group(1, 2, 3)
-        for world in self.worlds:
-            if world_name is not None and world_name not in (world.name, world.dark_name):
-                continue
-
-            for area in world.areas:
-                if area.name != area_name:
-                    continue
-
-                for node in area.nodes:
-                    if node.name == node_name:
-                        return node
+        node = self._indexes.nodes_by_name.get(match.group(1, 2, 3))
+        if node is not None:
+            return node
 
         raise ValueError("Unknown name: {}".format(name))
 
+    def node_with_resource(self, resource: ResourceInfo) -> Optional[ResourceNode]:
+        """
+        Finds the resource node that gives the given resource, such as the PickupNode of a PickupIndex.
+        :param resource:
+        :return: The first node in all_nodes with that resource, or None if there's none.
+        """
+        return self._indexes.nodes_by_resource.get(resource)
+
     def nodes_to_world(self, node: Node) -> World:
         return self._nodes_to_world[node]
 
@@ -122,6 +215,10 @@ class WorldList:
         return self._nodes_to_area[node]
 
     def resolve_dock_connection(self, world: World, connection: DockConnection) -> Node:
+        node = self._indexes.dock_nodes.get((world.world_asset_id, connection.area_asset_id, connection.dock_index))
+        if node is not None and self._indexes.worlds_by_asset_id.get(world.world_asset_id) is world:
+            return node
+
         target_area = world.area_by_asset_id(connection.area_asset_id)
         return target_area.node_with_dock_index(connection.dock_index)
 
@@ -178,9 +275,18 @@ class WorldList:
         :param node:
         :return: Generator of pairs Node + RequirementSet for going to that node
         """
-        area = self.nodes_to_area(node)
-        for target_node, requirements in area.connections[node].items():
-            yield target_node, requirements
+        yield from self.connections_in_area(node).items()
+
+    def connections_in_area(self, node: Node) -> Dict[Node, RequirementSet]:
+        """
+        Gets the connections from the given node to other nodes in the same area, including any patches.
+        :param node:
+        :return: The target nodes, with the RequirementSet for going to each.
+        """
+        connections = self._patched_connections.get(node)
+        if connections is None:
+            connections = self.nodes_to_area(node).connections[node]
+        return connections
 
     def potential_nodes_from(self, node: Node, patches: GamePatches) -> Iterator[Tuple[Node, RequirementSet]]:
         """
@@ -192,20 +298,76 @@ class WorldList:
         yield from self.connections_from(node, patches)
         yield from self.area_connections_from(node)
 
+    @property
+    def connections_fingerprint(self) -> ConnectionsFingerprint:
+        """
+        A value that identifies the current connections of all nodes, including the patched ones.
+        It's the connections themselves, by node index, so two WorldList with equal fingerprints have equal connections.
+        The value is kept while the connections don't change, so comparing by identity first is cheap.
+        :return:
+        """
+        if self._connections_fingerprint is None:
+            self._connections_fingerprint = tuple(
+                (source.index, target.index, requirements)
+                for area in self.all_areas
+                for source in area.connections.keys()
+                for target, requirements in self.connections_in_area(source).items()
+            )
+        return self._connections_fingerprint
+
     def patch_requirements(self, static_resources: CurrentResources, damage_multiplier: float) -> None:
         """
         Patches all Node connections, assuming the given resources will never change their quantity.
         This is removes all checking for tricks and difficulties in runtime since these never change.
         All damage requirements are multiplied by the given multiplier.
+        The patched connections are stored in a separated layer, so the areas themselves are never modified and
+        only the connections that actually changed are allocated.
+        Results are cached based on the connections fingerprint, so patching an equal WorldList with the same
+        resources only needs to rebind the already patched connections.
         :param static_resources:
         :param damage_multiplier:
         :return:
         """
-        for world in self.worlds:
-            for area in world.areas:
-                for connections in area.connections.values():
-                    for target, value in connections.items():
-                        connections[target] = value.patch_requirements(static_resources, damage_multiplier)
+        key = (self.connections_fingerprint, frozenset(static_resources.items()), damage_multiplier)
+
+        patched_connections = _patched_connections_cache.get(key)
+        if patched_connections is None:
+            patched_connections = self._calculate_patched_connections(static_resources, damage_multiplier)
+            _patched_connections_cache[key] = patched_connections
+            if len(_patched_connections_cache) > _PATCHED_CONNECTIONS_CACHE_SIZE:
+                _patched_connections_cache.popitem(last=False)
+        else:
+            _patched_connections_cache.move_to_end(key)
+
+        nodes_by_index = {
+            node.index: node
+            for area in self.all_areas
+            for node in area.connections.keys()
+        }
+        for source_index, connections in patched_connections.items():
+            self._patched_connections[nodes_by_index[source_index]] = {
+                nodes_by_index[target_index]: requirements
+                for target_index, requirements in connections.items()
+            }
+
+        # The patched connections are fully defined by the original ones and the arguments
+        self._connections_fingerprint = key
+
+    def _calculate_patched_connections(self, static_resources: CurrentResources,
+                                       damage_multiplier: float) -> PatchedConnections:
+        result = {}
+
+        for area in self.all_areas:
+            for source in area.connections.keys():
+                connections = self.connections_in_area(source)
+                patched = {
+                    target.index: value.patch_requirements(static_resources, damage_multiplier)
+                    for target, value in connections.items()
+                }
+                if any(patched[target.index] is not value for target, value in connections.items()):
+                    result[source.index] = patched
+
+        return result
 
     def calculate_relevant_resources(self, patches: GamePatches) -> FrozenSet[ResourceInfo]:
         results = set()
@@ -219,6 +381,9 @@ class WorldList:
         return frozenset(results)
 
     def area_by_area_location(self, location: AreaLocation) -> Area:
+        area = self._indexes.areas_by_location.get((location.world_asset_id, location.area_asset_id))
+        if area is not None:
+            return area
         return self.world_by_asset_id(location.world_asset_id).area_by_asset_id(location.area_asset_id)
 
     def world_by_area_location(self, location: AreaLocation) -> World:
@@ -231,6 +396,8 @@ class WorldList:
         )
 
     def add_new_node(self, area: Area, node: Node):
+        self._connections_fingerprint = None
+        self._lookup_indexes = None
         self._nodes_to_area[node] = area
         self._nodes_to_world[node] = self.world_with_area(area)
 
@@ -284,9 +284,7 @@ def _pretty_name_for_elevator(world_list: WorldList,
         target_area_name = _CUSTOM_NAMES_FOR_ELEVATORS[connection.area_asset_id]
 
     else:
-        world = world_list.world_by_area_location(connection)
-        area = world.area_by_asset_id(connection.area_asset_id)
-        target_area_name = area.name
+        target_area_name = world_list.area_by_area_location(connection).name
 
     return "Transport to {}".format(target_area_name)
 
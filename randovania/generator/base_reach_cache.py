@@ -0,0 +1,77 @@
+"""Cache of the reach the filler starts with, shared between generation attempts with the same game data."""
+import collections
+import json
+from typing import Hashable, Tuple, Union
+
+from randovania.game_description import description_cache
+from randovania.game_description.game_description import GameDescription
+from randovania.game_description.game_patches import GamePatches
+from randovania.generator.generator_reach import GeneratorReach, reach_with_all_safe_resources, \
+    advance_reach_with_possible_unsafe_resources
+from randovania.layout.layout_configuration import LayoutConfiguration
+from randovania.resolver import bootstrap
+
+_MAXIMUM_ENTRIES = 4
+# Least recently used first. Each reach keeps the bootstrapped game it was created with.
+_cache: "collections.OrderedDict[Hashable, GeneratorReach]" = collections.OrderedDict()
+
+
+def clear_cache() -> None:
+    _cache.clear()
+
+
+def _game_key(game: GameDescription) -> Union[str, GameDescription]:
+    # Games decoded separately from the same data, such as one per seed, share entries.
+    # Other games are only equal to themselves.
+    data_key = description_cache.cache_key_for_game(game)
+    if data_key is None:
+        return game
+    return data_key
+
+
+def _key_for(game: GameDescription, configuration: LayoutConfiguration, patches: GamePatches) -> Tuple:
+    # Hints are the only part of the patches that don't change the reach, and they're replaced when reusing it.
+    # Items are kept in order, since the filler iterates over them.
+    return (
+        _game_key(game),
+        json.dumps(configuration.as_json, sort_keys=True),
+        patches.starting_location,
+        tuple(patches.starting_items.items()),
+        tuple(patches.pickup_assignment.items()),
+        tuple(patches.elevator_connection.items()),
+        tuple(patches.translator_gates.items()),
+        tuple(patches.dock_connection.items()),
+        tuple(patches.dock_weakness.items()),
+    )
+
+
+def base_reach_for(configuration: LayoutConfiguration,
+                   game: GameDescription,
+                   patches: GamePatches,
+                   ) -> GeneratorReach:
+    """
+    Bootstraps the logic for the given patches and creates a reach with all resources the filler collects before
+    placing any pickup.
+    The result only depends on the game, the configuration and the patches, so it's kept for the next calls with
+    a game decoded from the same data and equal configuration and patches, except for hints.
+    :param configuration:
+    :param game: The GameDescription to use, before any bootstrap. It must not be modified afterwards.
+    :param patches:
+    :return: A reach that can be freely modified. Its game is a bootstrapped copy of the given game, or of an
+    earlier game decoded from the same data.
+    """
+    key = _key_for(game, configuration, patches)
+    reach = _cache.get(key)
+
+    if reach is None:
+        new_game, state = bootstrap.logic_bootstrap(configuration, game, patches)
+        new_game.patch_requirements(state.resources, configuration.damage_strictness.value)
+        reach = advance_reach_with_possible_unsafe_resources(reach_with_all_safe_resources(new_game, state))
+
+        _cache[key] = reach
+        if len(_cache) > _MAXIMUM_ENTRIES:
+            _cache.popitem(last=False)
+    else:
+        _cache.move_to_end(key)
+
+    return reach.independent_copy(patches)
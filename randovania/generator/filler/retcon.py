@@ -1,15 +1,18 @@
 import collections
+import contextlib
 import dataclasses
 import itertools
+import multiprocessing
+import pickle
 import pprint
 from random import Random
 from typing import Tuple, Iterator, NamedTuple, Set, AbstractSet, Union, Dict, \
-    DefaultDict, Mapping, FrozenSet, Callable, List, TypeVar, Any, Optional
+    DefaultDict, Mapping, FrozenSet, Callable, List, Optional, Iterable
 
 from randovania.game_description.game_description import calculate_interesting_resources, GameDescription
 from randovania.game_description.game_patches import GamePatches
 from randovania.game_description.hint import Hint, HintType
-from randovania.game_description.node import ResourceNode, Node
+from randovania.game_description.node import ResourceNode
 from randovania.game_description.requirements import RequirementList
 from randovania.game_description.resources.logbook_asset import LogbookAsset
 from randovania.game_description.resources.pickup_entry import PickupEntry
@@ -18,21 +21,34 @@ from randovania.game_description.resources.resource_info import ResourceInfo, Cu
 from randovania.game_description.world import World
 from randovania.game_description.world_list import WorldList
 from randovania.generator.filler.filler_library import UnableToGenerate, filter_pickup_nodes, should_have_hint
-from randovania.generator.generator_reach import GeneratorReach, collectable_resource_nodes, \
+from randovania.generator.generator_reach import GeneratorReach, \
     advance_reach_with_possible_unsafe_resources, reach_with_all_safe_resources, \
-    get_collectable_resource_nodes_of_reach, advance_to_with_reach_copy
+    get_collectable_resource_nodes_of_reach, advance_to_temporarily, collection_order_with_walked_over_nodes
 from randovania.layout.available_locations import RandomizationMode
 from randovania.resolver import debug
+from randovania.resolver.certificate import CollectionCertificate, certificate_from_nodes
 from randovania.resolver.random_lib import iterate_with_weights
 from randovania.resolver.state import State, state_with_pickup
 
-X = TypeVar("X")
-
 _RESOURCES_WEIGHT_MULTIPLIER = 1
 _INDICES_WEIGHT_MULTIPLIER = 1
 _LOGBOOKS_WEIGHT_MULTIPLIER = 1
 _VICTORY_WEIGHT = 1000
 
+_candidate_workers = 1
+
+
+def set_candidate_workers(count: int):
+    """
+    Sets how many processes are used to calculate the weights of the potential actions.
+    The processes are started once for each fill, so it only pays off for slow presets.
+    The generated layout is the same regardless.
+    :param count:
+    :return:
+    """
+    global _candidate_workers
+    _candidate_workers = max(count, 1)
+
 
 @dataclasses.dataclass(frozen=True)
 class FillerConfiguration:
@@ -42,14 +58,6 @@ class FillerConfiguration:
     indices_to_exclude: FrozenSet[PickupIndex]
 
 
-def _filter_not_in_dict(elements: Iterator[X],
-                        dictionary: Dict[X, Any],
-                        ) -> Iterator[X]:
-    for index in elements:
-        if index not in dictionary:
-            yield index
-
-
 class UncollectedState(NamedTuple):
     indices: Set[PickupIndex]
     logbooks: Set[LogbookAsset]
@@ -58,11 +66,9 @@ class UncollectedState(NamedTuple):
     @classmethod
     def from_reach(cls, reach: GeneratorReach) -> "UncollectedState":
         return UncollectedState(
-            set(_filter_not_in_dict(reach.state.collected_pickup_indices,
-                                    reach.state.patches.pickup_assignment)),
-            set(_filter_not_in_dict(reach.state.collected_scan_assets,
-                                    reach.state.patches.hints)),
-            set(collectable_resource_nodes(reach.connected_nodes, reach))
+            set(reach.unassigned_pickup_indices),
+            set(reach.unhinted_scan_assets),
+            reach.collectable_connected_resource_nodes(),
         )
 
     def __sub__(self, other: "UncollectedState") -> "UncollectedState":
@@ -73,21 +79,48 @@ class UncollectedState(NamedTuple):
         )
 
 
-def find_node_with_resource(resource: ResourceInfo,
-                            haystack: Iterator[Node],
-                            ) -> ResourceNode:
-    for node in haystack:
-        if isinstance(node, ResourceNode) and node.resource() == resource:
-            return node
-
-
-def _calculate_reach_for_progression(reach: GeneratorReach,
-                                     progression: PickupEntry,
-                                     ) -> GeneratorReach:
-    return advance_to_with_reach_copy(reach, state_with_pickup(reach.state, progression))
+Action = Union[ResourceNode, PickupEntry]
 
 
-Action = Union[ResourceNode, PickupEntry]
+class PickupsByResource:
+    """
+    An inverted index of which pickups can give each resource, with any current resources.
+    Kept up to date as pickups are removed, so finding the pickups that give some resources doesn't check all of them.
+    """
+    _pickups: Dict[ResourceInfo, Dict[PickupEntry, int]]
+
+    def __init__(self, pickups: Iterable[PickupEntry]):
+        self._pickups = {}
+        for pickup in pickups:
+            for resource in self._resources_of(pickup):
+                pickups_with_resource = self._pickups.setdefault(resource, {})
+                pickups_with_resource[pickup] = pickups_with_resource.get(pickup, 0) + 1
+
+    @staticmethod
+    def _resources_of(pickup: PickupEntry) -> Set[ResourceInfo]:
+        result = {resource for resource, _ in pickup.all_resources}
+        for conversion in pickup.convert_resources:
+            result.add(conversion.source)
+            result.add(conversion.target)
+        return result
+
+    def remove(self, pickup: PickupEntry):
+        for resource in self._resources_of(pickup):
+            pickups_with_resource = self._pickups[resource]
+            pickups_with_resource[pickup] -= 1
+            if pickups_with_resource[pickup] == 0:
+                del pickups_with_resource[pickup]
+
+    def pickups_with_any(self, resources: Iterable[ResourceInfo]) -> Set[PickupEntry]:
+        """
+        All pickups that can give any of the given resources. Some might not, depending on the current resources.
+        :param resources:
+        :return:
+        """
+        result = set()
+        for resource in resources:
+            result.update(self._pickups.get(resource, {}))
+        return result
 
 
 def _resources_in_pickup(pickup: PickupEntry, current_resources: CurrentResources) -> FrozenSet[ResourceInfo]:
@@ -141,7 +174,20 @@ def retcon_playthrough_filler(game: GameDescription,
                               rng: Random,
                               configuration: FillerConfiguration,
                               status_update: Callable[[str], None],
-                              ) -> GamePatches:
+                              initial_reach: Optional[GeneratorReach] = None,
+                              ) -> Tuple[GamePatches, CollectionCertificate]:
+    """
+    Places the given pickups, one action at a time, until all are placed.
+    :param game:
+    :param initial_state:
+    :param pickups_left:
+    :param rng:
+    :param configuration:
+    :param status_update:
+    :param initial_reach: If given, used instead of creating a reach from `initial_state` and collecting all
+    resources possible. It's modified by the filler.
+    :return: The patches with all placed pickups, and the order in which the filler collected resource nodes.
+    """
     debug.debug_print("{}\nRetcon filler started with major items:\n{}".format(
         "*" * 100,
         pprint.pformat({
@@ -154,7 +200,10 @@ def retcon_playthrough_filler(game: GameDescription,
     minimum_random_starting_items = configuration.minimum_random_starting_items
     maximum_random_starting_items = configuration.maximum_random_starting_items
 
-    reach = advance_reach_with_possible_unsafe_resources(reach_with_all_safe_resources(game, initial_state))
+    if initial_reach is None:
+        reach = advance_reach_with_possible_unsafe_resources(reach_with_all_safe_resources(game, initial_state))
+    else:
+        reach = initial_reach
 
     pickup_index_seen_count: DefaultDict[PickupIndex, int] = collections.defaultdict(int)
     scan_asset_seen_count: DefaultDict[LogbookAsset, int] = collections.defaultdict(int)
@@ -162,110 +211,120 @@ def retcon_playthrough_filler(game: GameDescription,
     num_random_starting_items_placed = 0
 
     indices_groups, all_indices = build_available_indices(game.world_list, configuration)
-
-    while pickups_left:
-        current_uncollected = UncollectedState.from_reach(reach)
-
-        progression_pickups = _calculate_progression_pickups(pickups_left, reach)
-        print_retcon_loop_start(current_uncollected, game, pickups_left, reach)
-
-        for pickup_index in reach.state.collected_pickup_indices:
-            pickup_index_seen_count[pickup_index] += 1
-        print_new_resources(game, reach, pickup_index_seen_count, "Pickup Index")
-
-        for scan_asset in reach.state.collected_scan_assets:
-            scan_asset_seen_count[scan_asset] += 1
-            if scan_asset_seen_count[scan_asset] == 1:
-                scan_asset_initial_pickups[scan_asset] = frozenset(reach.state.collected_pickup_indices)
-
-        print_new_resources(game, reach, scan_asset_seen_count, "Scan Asset")
-
-        def action_report(message: str):
-            status_update("{} {}".format(last_message, message))
-
-        actions_weights = _calculate_potential_actions(reach,
-                                                       progression_pickups,
-                                                       current_uncollected,
-                                                       maximum_random_starting_items - num_random_starting_items_placed,
-                                                       action_report)
-
-        try:
-            action = next(iterate_with_weights(items=list(actions_weights.keys()),
-                                               item_weights=actions_weights,
-                                               rng=rng))
-        except StopIteration:
-            if actions_weights:
-                action = rng.choice(list(actions_weights.keys()))
-            else:
-                raise UnableToGenerate("Unable to generate; no actions found after placing {} items.".format(
-                    len(reach.state.patches.pickup_assignment)))
-
-        if isinstance(action, PickupEntry):
-            assert action in pickups_left
-
-            uncollected_indices = current_uncollected.indices & all_indices
-
-            if num_random_starting_items_placed >= minimum_random_starting_items and uncollected_indices:
-                pickup_index_weights = _calculate_uncollected_index_weights(
-                    uncollected_indices,
-                    set(reach.state.patches.pickup_assignment),
-                    pickup_index_seen_count,
-                    indices_groups,
-                )
-                assert pickup_index_weights, "Pickups should only be added to the actions dict " \
-                                             "when there are unassigned pickups"
-
-                pickup_index = next(iterate_with_weights(items=iter(uncollected_indices),
-                                                         item_weights=pickup_index_weights,
-                                                         rng=rng))
-
-                next_state = reach.state.assign_pickup_to_index(action, pickup_index)
-
-                # Place a hint for the new item
-                hint_location = _calculate_hint_location_for_action(action, current_uncollected, pickup_index, rng,
-                                                                    scan_asset_initial_pickups)
-                if hint_location is not None:
-                    next_state.patches = next_state.patches.assign_hint(hint_location,
-                                                                        Hint(HintType.LOCATION, None, pickup_index))
-
-                print_retcon_place_pickup(action, game, pickup_index, hint_location)
+    pickups_by_resource = PickupsByResource(pickups_left)
+
+    with _candidate_workers_for(reach, pickups_left) as workers:
+        while pickups_left:
+            current_uncollected = UncollectedState.from_reach(reach)
+
+            progression_pickups = _calculate_progression_pickups(pickups_left, pickups_by_resource, reach)
+            print_retcon_loop_start(current_uncollected, game, pickups_left, reach)
+
+            for pickup_index in reach.state.collected_pickup_indices:
+                pickup_index_seen_count[pickup_index] += 1
+            print_new_resources(game, reach, pickup_index_seen_count, "Pickup Index")
+
+            for scan_asset in reach.state.collected_scan_assets:
+                scan_asset_seen_count[scan_asset] += 1
+                if scan_asset_seen_count[scan_asset] == 1:
+                    scan_asset_initial_pickups[scan_asset] = frozenset(reach.state.collected_pickup_indices)
+
+            print_new_resources(game, reach, scan_asset_seen_count, "Scan Asset")
+
+            def action_report(message: str):
+                status_update("{} {}".format(last_message, message))
+
+            free_starting_items_spots = maximum_random_starting_items - num_random_starting_items_placed
+            actions_weights = _calculate_potential_actions(reach,
+                                                           progression_pickups,
+                                                           current_uncollected,
+                                                           free_starting_items_spots,
+                                                           action_report,
+                                                           workers)
+
+            try:
+                action = next(iterate_with_weights(items=list(actions_weights.keys()),
+                                                   item_weights=actions_weights,
+                                                   rng=rng))
+            except StopIteration:
+                if actions_weights:
+                    action = rng.choice(list(actions_weights.keys()))
+                else:
+                    raise UnableToGenerate("Unable to generate; no actions found after placing {} items.".format(
+                        len(reach.state.patches.pickup_assignment)))
+
+            if isinstance(action, PickupEntry):
+                assert action in pickups_left
+
+                uncollected_indices = current_uncollected.indices & all_indices
+
+                if num_random_starting_items_placed >= minimum_random_starting_items and uncollected_indices:
+                    pickup_index_weights = _calculate_uncollected_index_weights(
+                        uncollected_indices,
+                        set(reach.state.patches.pickup_assignment),
+                        pickup_index_seen_count,
+                        indices_groups,
+                    )
+                    assert pickup_index_weights, "Pickups should only be added to the actions dict " \
+                                                 "when there are unassigned pickups"
+
+                    pickup_index = next(iterate_with_weights(items=iter(uncollected_indices),
+                                                             item_weights=pickup_index_weights,
+                                                             rng=rng))
+
+                    # Place a hint for the new item
+                    hint_location = _calculate_hint_location_for_action(action, current_uncollected, pickup_index, rng,
+                                                                        scan_asset_initial_pickups)
+
+                    print_retcon_place_pickup(action, game, pickup_index, hint_location)
+
+                else:
+                    num_random_starting_items_placed += 1
+                    if num_random_starting_items_placed > maximum_random_starting_items:
+                        raise UnableToGenerate("Attempting to place more extra starting items than the number allowed.")
+
+                    if debug.debug_level() > 1:
+                        print(f"\n--> Adding {action.name} as a starting item")
+
+                    pickup_index = None
+                    hint_location = None
+
+                next_state = _state_with_placed_pickup(reach.state, action, pickup_index, hint_location)
+                if workers is not None:
+                    workers.steps.append(_FillerStep(workers.pickup_position(action), pickup_index, hint_location,
+                                                     None))
+
+                # TODO: this item is potentially dangerous and we should remove the invalidated paths
+                pickups_left.remove(action)
+                pickups_by_resource.remove(action)
+
+                last_message = "Placed {} items so far, {} left.".format(
+                    len(next_state.patches.pickup_assignment), len(pickups_left) - 1)
+                status_update(last_message)
+
+                reach.advance_to(next_state)
 
             else:
-                num_random_starting_items_placed += 1
-                if num_random_starting_items_placed > maximum_random_starting_items:
-                    raise UnableToGenerate("Attempting to place more extra starting items than the number allowed.")
-
-                if debug.debug_level() > 1:
-                    print(f"\n--> Adding {action.name} as a starting item")
-
-                next_state = reach.state.assign_pickup_to_starting_items(action)
-
-            # TODO: this item is potentially dangerous and we should remove the invalidated paths
-            pickups_left.remove(action)
+                last_message = "Triggered an event out of {} options.".format(len(actions_weights))
+                status_update(last_message)
+                debug_print_collect_event(action, game)
+                if workers is not None:
+                    workers.steps.append(_FillerStep(None, None, None,
+                                                     get_collectable_resource_nodes_of_reach(reach).index(action)))
+                # This action is potentially dangerous. Use `act_on` to remove invalid paths
+                reach.act_on(action)
 
-            last_message = "Placed {} items so far, {} left.".format(
-                len(next_state.patches.pickup_assignment), len(pickups_left) - 1)
-            status_update(last_message)
+            reach = advance_reach_with_possible_unsafe_resources(reach)
 
-            reach.advance_to(next_state)
+            if game.victory_condition.satisfied(reach.state.resources, reach.state.energy):
+                debug.debug_print("Finished because we can win")
+                break
 
-        else:
-            last_message = "Triggered an event out of {} options.".format(len(actions_weights))
-            status_update(last_message)
-            debug_print_collect_event(action, game)
-            # This action is potentially dangerous. Use `act_on` to remove invalid paths
-            reach.act_on(action)
-
-        reach = advance_reach_with_possible_unsafe_resources(reach)
-
-        if game.victory_condition.satisfied(reach.state.resources, reach.state.energy):
-            debug.debug_print("Finished because we can win")
-            break
+        if not pickups_left:
+            debug.debug_print("Finished because we have nothing else to distribute")
 
-    if not pickups_left:
-        debug.debug_print("Finished because we have nothing else to distribute")
-
-    return reach.state.patches
+        certificate = certificate_from_nodes(collection_order_with_walked_over_nodes(reach.game, reach.state))
+        return reach.state.patches, certificate
 
 
 def _calculate_hint_location_for_action(action: PickupEntry,
@@ -290,6 +349,7 @@ def _calculate_hint_location_for_action(action: PickupEntry,
 
 
 def _calculate_progression_pickups(pickups_left: Iterator[PickupEntry],
+                                   pickups_by_resource: PickupsByResource,
                                    reach: GeneratorReach,
                                    ) -> Tuple[PickupEntry, ...]:
     satisfiable_requirements: FrozenSet[RequirementList] = frozenset(itertools.chain.from_iterable(
@@ -303,10 +363,11 @@ def _calculate_progression_pickups(pickups_left: Iterator[PickupEntry],
         reach.state.resource_database
     )
 
+    candidates = pickups_by_resource.pickups_with_any(interesting_resources)
     progression_pickups = []
 
     for pickup in pickups_left:
-        if pickup in progression_pickups:
+        if pickup not in candidates or pickup in progression_pickups:
             continue
         if _resources_in_pickup(pickup, reach.state.resources).intersection(interesting_resources):
             progression_pickups.append(pickup)
@@ -338,7 +399,8 @@ def _calculate_potential_actions(reach: GeneratorReach,
                                  progression_pickups: Tuple[PickupEntry, ...],
                                  current_uncollected: UncollectedState,
                                  free_starting_items_spots: int,
-                                 status_update: Callable[[str], None]):
+                                 status_update: Callable[[str], None],
+                                 workers: Optional["_CandidateWorkers"] = None):
     actions_weights: Dict[Action, float] = {}
     uncollected_resource_nodes = get_collectable_resource_nodes_of_reach(reach)
     total_options = len(uncollected_resource_nodes)
@@ -358,18 +420,22 @@ def _calculate_potential_actions(reach: GeneratorReach,
 
     total_options += len(usable_progression_pickups)
 
-    for progression in usable_progression_pickups:
-        actions_weights[progression] = _calculate_weights_for(_calculate_reach_for_progression(reach, progression),
-                                                              current_uncollected,
-                                                              progression.name) + progression.probability_offset
-        update_for_option()
+    if workers is None:
+        candidates = [
+            (_state_for_action(reach.state, action), action.name)
+            for action in itertools.chain(usable_progression_pickups, uncollected_resource_nodes)
+        ]
+        weights = _calculate_candidate_weights(reach, current_uncollected, candidates, update_for_option)
+    else:
+        weights = workers.calculate_weights(usable_progression_pickups,
+                                            len(usable_progression_pickups) + len(uncollected_resource_nodes),
+                                            update_for_option)
 
-    for resource in uncollected_resource_nodes:
-        actions_weights[resource] = _calculate_weights_for(
-            advance_to_with_reach_copy(reach, reach.state.act_on_node(resource)),
-            current_uncollected,
-            resource.name)
-        update_for_option()
+    for progression, weight in zip(usable_progression_pickups, weights):
+        actions_weights[progression] = weight + progression.probability_offset
+
+    for resource, weight in zip(uncollected_resource_nodes, weights[len(usable_progression_pickups):]):
+        actions_weights[resource] = weight
 
     if debug.debug_level() > 1:
         for action, weight in actions_weights.items():
@@ -378,6 +444,200 @@ def _calculate_potential_actions(reach: GeneratorReach,
     return actions_weights
 
 
+def _state_for_action(state: State, action: Action) -> State:
+    if isinstance(action, PickupEntry):
+        return state_with_pickup(state, action)
+    else:
+        return state.act_on_node(action)
+
+
+def _state_with_placed_pickup(state: State,
+                              pickup: PickupEntry,
+                              pickup_index: Optional[PickupIndex],
+                              hint_location: Optional[LogbookAsset],
+                              ) -> State:
+    """
+    Creates the state after placing the given pickup.
+    :param state:
+    :param pickup:
+    :param pickup_index: Where the pickup is placed. When None, it's added as a starting item.
+    :param hint_location: If given, a hint for the pickup is placed there.
+    :return:
+    """
+    if pickup_index is None:
+        return state.assign_pickup_to_starting_items(pickup)
+
+    next_state = state.assign_pickup_to_index(pickup, pickup_index)
+    if hint_location is not None:
+        next_state.patches = next_state.patches.assign_hint(hint_location,
+                                                            Hint(HintType.LOCATION, None, pickup_index))
+    return next_state
+
+
+def _weight_for_candidate(reach: GeneratorReach,
+                          current_uncollected: UncollectedState,
+                          state: State,
+                          name: str,
+                          ) -> float:
+    with advance_to_temporarily(reach, state) as potential_reach:
+        return _calculate_weights_for(potential_reach, current_uncollected, name)
+
+
+def _calculate_candidate_weights(reach: GeneratorReach,
+                                 current_uncollected: UncollectedState,
+                                 candidates: List[Tuple[State, str]],
+                                 update_for_option: Callable[[], None],
+                                 ) -> List[float]:
+    """
+    Calculates the weight of advancing the reach to each of the given states.
+    :param reach:
+    :param current_uncollected:
+    :param candidates: Pairs of state and the name of the action.
+    :param update_for_option: Called once for each candidate.
+    :return: The weight of each candidate, in the same order.
+    """
+    weights = []
+    for state, name in candidates:
+        weights.append(_weight_for_candidate(reach, current_uncollected, state, name))
+        update_for_option()
+    return weights
+
+
+class _FillerStep(NamedTuple):
+    """
+    A change the filler made to its reach, in a form that can be sent to another process.
+    Either the pickup at `pickup_position` of the initial pickups was placed, at `pickup_index` or as a starting item
+    when it's None, or the node at `event_position` of `get_collectable_resource_nodes_of_reach` was collected.
+    """
+    pickup_position: Optional[int]
+    pickup_index: Optional[PickupIndex]
+    hint_location: Optional[LogbookAsset]
+    event_position: Optional[int]
+
+
+# The state of a candidate worker process: the reach it keeps up to date with the filler, the pickups the filler
+# started with and how many steps of the filler were replayed.
+_worker_reach: Optional[GeneratorReach] = None
+_worker_pickups: List[PickupEntry] = []
+_worker_steps_replayed = 0
+
+
+def _initialize_candidate_worker(serialized: bytes):
+    global _worker_reach, _worker_pickups, _worker_steps_replayed
+    # Unpickled together, so the pickups and the reach share the same resources
+    _worker_reach, _worker_pickups = pickle.loads(serialized)
+    _worker_steps_replayed = 0
+
+
+def _replay_step(reach: GeneratorReach, pickups: List[PickupEntry], step: _FillerStep) -> GeneratorReach:
+    if step.pickup_position is not None:
+        reach.advance_to(_state_with_placed_pickup(reach.state, pickups[step.pickup_position],
+                                                   step.pickup_index, step.hint_location))
+    else:
+        reach.act_on(get_collectable_resource_nodes_of_reach(reach)[step.event_position])
+    return advance_reach_with_possible_unsafe_resources(reach)
+
+
+def _weights_in_candidate_worker(steps: List[_FillerStep],
+                                 pickup_positions: List[int],
+                                 num_actions: int,
+                                 chunk: range,
+                                 ) -> List[float]:
+    global _worker_reach, _worker_steps_replayed
+    for step in steps[_worker_steps_replayed:]:
+        _worker_reach = _replay_step(_worker_reach, _worker_pickups, step)
+    _worker_steps_replayed = len(steps)
+
+    reach = _worker_reach
+    actions = [_worker_pickups[position] for position in pickup_positions]
+    actions.extend(get_collectable_resource_nodes_of_reach(reach))
+    assert len(actions) == num_actions, "Candidate worker reach differs from the filler's reach"
+
+    current_uncollected = UncollectedState.from_reach(reach)
+    return [
+        _weight_for_candidate(reach, current_uncollected, _state_for_action(reach.state, actions[i]), actions[i].name)
+        for i in chunk
+    ]
+
+
+class _CandidateWorkers:
+    """
+    Processes that calculate the weights of the potential actions during a fill.
+    Each process starts with a copy of the initial reach and replays the steps the filler takes, so only these steps
+    and the candidate pickups are sent for every action. The processes are spawned instead of forked, since the
+    generator usually runs in a thread.
+    """
+    steps: List[_FillerStep]
+
+    def __init__(self, reach: GeneratorReach, pickups: List[PickupEntry], workers: int):
+        self.workers = workers
+        self.steps = []
+        self._pickups = list(pickups)
+        # Serialized now, so a restarted process also starts from the initial reach
+        self._pool = multiprocessing.get_context("spawn").Pool(
+            workers,
+            initializer=_initialize_candidate_worker,
+            initargs=(pickle.dumps((reach, self._pickups)),),
+        )
+
+    def close(self):
+        self._pool.terminate()
+        self._pool.join()
+
+    def pickup_position(self, pickup: PickupEntry) -> int:
+        return self._pickups.index(pickup)
+
+    def calculate_weights(self,
+                          progression_pickups: List[PickupEntry],
+                          num_actions: int,
+                          update_for_option: Callable[[], None],
+                          ) -> List[float]:
+        """
+        Calculates the weight of each potential action of the filler's current reach, split between the processes.
+        Each weight only depends on the reach and the action, so the result is the same as calculating them in this
+        process.
+        :param progression_pickups: The pickups that are potential actions. They come before all resource nodes.
+        :param num_actions: How many potential actions there are.
+        :param update_for_option: Called once for each action.
+        :return: The weight of each action, in the same order.
+        """
+        pickup_positions = [self.pickup_position(pickup) for pickup in progression_pickups]
+
+        # Interleaved, so the expensive candidates are spread between all processes
+        chunks = [range(i, num_actions, self.workers) for i in range(self.workers)]
+        chunk_weights = self._pool.starmap(_weights_in_candidate_worker, [
+            (self.steps, pickup_positions, num_actions, chunk)
+            for chunk in chunks
+        ])
+
+        weights = [0.0] * num_actions
+        for chunk, chunk_weight in zip(chunks, chunk_weights):
+            for i, weight in zip(chunk, chunk_weight):
+                weights[i] = weight
+                update_for_option()
+
+        return weights
+
+
+@contextlib.contextmanager
+def _candidate_workers_for(reach: GeneratorReach, pickups: List[PickupEntry]) -> Iterator[Optional[_CandidateWorkers]]:
+    """
+    Starts the processes configured with `set_candidate_workers` for a fill, if more than one.
+    :param reach: The reach the filler starts with.
+    :param pickups: The pickups the filler starts with.
+    :return:
+    """
+    if _candidate_workers <= 1:
+        yield None
+        return
+
+    workers = _CandidateWorkers(reach, pickups, _candidate_workers)
+    try:
+        yield workers
+    finally:
+        workers.close()
+
+
 def debug_print_collect_event(action, game):
     if debug.debug_level() > 0:
         print("\n--> Collecting {}".format(game.world_list.node_name(action, with_world=True)))
@@ -409,14 +669,13 @@ def print_retcon_place_pickup(action: PickupEntry, game: GameDescription,
     if debug.debug_level() > 0:
         if hint is not None:
             hint_string = " with hint at {}".format(
-                world_list.node_name(find_node_with_resource(hint, world_list.all_nodes),
-                                     with_world=True))
+                world_list.node_name(world_list.node_with_resource(hint), with_world=True))
         else:
             hint_string = ""
 
         print("\n--> Placing {0} at {1}{2}".format(
             action.name,
-            world_list.node_name(find_node_with_resource(pickup_index, world_list.all_nodes), with_world=True),
+            world_list.node_name(world_list.node_with_resource(pickup_index), with_world=True),
             hint_string
         ))
 
@@ -430,7 +689,7 @@ def print_new_resources(game: GameDescription,
     if debug.debug_level() > 1:
         for index, count in seen_count.items():
             if count == 1:
-                node = find_node_with_resource(index, world_list.all_nodes)
+                node = world_list.node_with_resource(index)
                 print("-> New {}: {}".format(label, world_list.node_name(node, with_world=True)))
 
                 if debug.debug_level() > 2:
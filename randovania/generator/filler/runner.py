@@ -11,10 +11,12 @@ from randovania.game_description.node import LogbookNode, PickupNode
 from randovania.game_description.resources.logbook_asset import LogbookAsset
 from randovania.game_description.resources.pickup_entry import PickupEntry
 from randovania.game_description.world_list import WorldList
+from randovania.generator import base_reach_cache
 from randovania.generator.filler.filler_library import should_have_hint
 from randovania.generator.filler.retcon import retcon_playthrough_filler, FillerConfiguration
 from randovania.layout.layout_configuration import LayoutConfiguration
-from randovania.resolver import bootstrap, debug
+from randovania.resolver.certificate import CollectionCertificate
+from randovania.resolver import debug
 
 T = TypeVar("T")
 
@@ -157,11 +159,11 @@ def run_filler(configuration: LayoutConfiguration,
                patches: GamePatches,
                rng: Random,
                status_update: Callable[[str], None],
-               ) -> Tuple[GamePatches, List[PickupEntry]]:
+               ) -> Tuple[GamePatches, List[PickupEntry], CollectionCertificate]:
     """
     Runs the filler logic for the given configuration and item pool.
     Returns a GamePatches with progression items and hints assigned, along with all items in the pool
-    that weren't assigned.
+    that weren't assigned and the order in which the filler collected resource nodes.
 
     :param configuration:
     :param game:
@@ -177,18 +179,18 @@ def run_filler(configuration: LayoutConfiguration,
 
     major_configuration = configuration.major_items_configuration
 
-    new_game, state = bootstrap.logic_bootstrap(configuration, game, patches)
-    new_game.patch_requirements(state.resources, configuration.damage_strictness.value)
+    initial_reach = base_reach_cache.base_reach_for(configuration, game, patches)
 
-    filler_patches = retcon_playthrough_filler(
-        new_game, state, major_items, rng,
+    filler_patches, certificate = retcon_playthrough_filler(
+        initial_reach.game, initial_reach.state, major_items, rng,
         configuration=FillerConfiguration(
             randomization_mode=configuration.available_locations.randomization_mode,
             minimum_random_starting_items=major_configuration.minimum_random_starting_items,
             maximum_random_starting_items=major_configuration.maximum_random_starting_items,
             indices_to_exclude=configuration.available_locations.excluded_indices,
         ),
-        status_update=status_update)
+        status_update=status_update,
+        initial_reach=initial_reach)
 
     # Since we haven't added expansions yet, these hints will always be for items added by the filler.
     full_hints_patches = fill_unassigned_hints(filler_patches, game.world_list, rng)
@@ -198,4 +200,4 @@ def run_filler(configuration: LayoutConfiguration,
     else:
         result = replace_hints_without_precision_with_jokes(full_hints_patches)
 
-    return result, major_items + expansions
+    return result, major_items + expansions, certificate
@@ -1,6 +1,9 @@
+import collections
+import itertools
 import multiprocessing.dummy
+import threading
 from random import Random
-from typing import Tuple, Iterator, Optional, Callable, TypeVar, List
+from typing import Tuple, Iterator, Optional, Callable, TypeVar, List, Union
 
 import tenacity
 
@@ -14,6 +17,7 @@ from randovania.game_description.world_list import WorldList
 from randovania.generator import base_patches_factory
 from randovania.generator.filler.filler_library import filter_unassigned_pickup_nodes, filter_pickup_nodes, \
     UnableToGenerate
+from randovania.generator.filler import retcon
 from randovania.generator.filler.runner import run_filler
 from randovania.generator.item_pool import pool_creator
 from randovania.layout.layout_configuration import LayoutConfiguration
@@ -21,10 +25,15 @@ from randovania.layout.available_locations import RandomizationMode
 from randovania.layout.layout_description import LayoutDescription, SolverPath
 from randovania.layout.permalink import Permalink
 from randovania.resolver import resolver
+from randovania.resolver.certificate import CollectionCertificate
 from randovania.resolver.exceptions import GenerationFailure, InvalidConfiguration
 from randovania.resolver.state import State
 
 T = TypeVar("T")
+_MAXIMUM_ATTEMPTS = 15
+
+# The game used by attempts running in a process of the attempts pool
+_worker_game: Optional[GameDescription] = None
 
 
 def _iterate_previous_states(state: State) -> Iterator[State]:
@@ -60,6 +69,7 @@ def generate_description(permalink: Permalink,
                          status_update: Optional[Callable[[str], None]],
                          validate_after_generation: bool,
                          timeout: Optional[int] = 600,
+                         parallel_attempts: Optional[int] = None,
                          ) -> LayoutDescription:
     """
     Creates a LayoutDescription for the given Permalink.
@@ -67,6 +77,8 @@ def generate_description(permalink: Permalink,
     :param status_update:
     :param validate_after_generation:
     :param timeout:
+    :param parallel_attempts: If set, each generation attempt uses its own rng, with this many attempts running
+    in parallel. Results in a different layout than when not set, but the same for any number of processes.
     :return:
     """
     if status_update is None:
@@ -77,7 +89,8 @@ def generate_description(permalink: Permalink,
     create_patches_params = {
         "permalink": permalink,
         "game": data_reader.decode_data(data),
-        "status_update": status_update
+        "status_update": status_update,
+        "parallel_attempts": parallel_attempts,
     }
 
     def create_failure(message: str):
@@ -87,17 +100,20 @@ def generate_description(permalink: Permalink,
         patches_async = dummy_pool.apply_async(func=_create_randomized_patches,
                                                kwds=create_patches_params)
         try:
-            new_patches: GamePatches = patches_async.get(timeout)
+            new_patches, certificate = patches_async.get(timeout)
         except multiprocessing.TimeoutError:
             raise create_failure("Timeout reached when generating patches.")
 
         if validate_after_generation:
             resolver_game = data_reader.decode_data(data)
+            cancellation = threading.Event()
             resolve_params = {
                 "configuration": permalink.layout_configuration,
                 "game": resolver_game,
                 "patches": new_patches,
                 "status_update": status_update,
+                "cancellation": cancellation,
+                "certificate": certificate,
             }
             final_state_async = dummy_pool.apply_async(func=resolver.resolve,
                                                        kwds=resolve_params)
@@ -105,6 +121,8 @@ def generate_description(permalink: Permalink,
             try:
                 final_state_by_resolve = final_state_async.get(timeout)
             except multiprocessing.TimeoutError:
+                # Stops the resolver, instead of leaving it running in the worker thread
+                cancellation.set()
                 raise create_failure("Timeout reached when validating possibility")
 
             if final_state_by_resolve is None:
@@ -134,33 +152,150 @@ def _validate_item_pool_size(item_pool: List[PickupEntry], game: GameDescription
 def _create_randomized_patches(permalink: Permalink,
                                game: GameDescription,
                                status_update: Callable[[str], None],
-                               ) -> GamePatches:
+                               parallel_attempts: Optional[int] = None,
+                               ) -> Tuple[GamePatches, CollectionCertificate]:
     """
 
     :param permalink:
     :param game:
     :param status_update:
-    :return:
+    :param parallel_attempts: See `generate_description`.
+    :return: The patches and the order the filler collected resource nodes, which can be used to validate them.
     """
+    if parallel_attempts is not None:
+        return _create_patches_with_parallel_attempts(permalink, game, status_update, parallel_attempts)
+
     rng = Random(permalink.as_str)
     configuration = permalink.layout_configuration
 
-    filler_patches, remaining_items = _retryable_create_patches(configuration, game, rng, status_update)
+    filler_patches, remaining_items, certificate = _retryable_create_patches(configuration, game, rng, status_update)
 
     return filler_patches.assign_pickup_assignment(
         _assign_remaining_items(rng, game.world_list, filler_patches.pickup_assignment, remaining_items,
                                 configuration.randomization_mode)
-    )
+    ), certificate
+
+
+def _rng_for_attempt(permalink: Permalink, attempt: int) -> Random:
+    return Random("{}-attempt-{}".format(permalink.as_str, attempt))
+
+
+def _initialize_attempt_worker(game_data: dict) -> None:
+    """
+    Prepares a process of the attempts pool, decoding the game once for all attempts that run in it.
+    :param game_data:
+    :return:
+    """
+    global _worker_game
+    _worker_game = data_reader.decode_data(game_data)
+    # Processes of a pool can't create pools of their own
+    retcon.set_candidate_workers(1)
+
+
+def _create_patches_for_attempt(permalink: Permalink,
+                                attempt: int,
+                                game: Optional[GameDescription] = None,
+                                status_update: Callable[[str], None] = id,
+                                ) -> Union[Tuple[GamePatches, CollectionCertificate], UnableToGenerate]:
+    """
+    Runs a single generation attempt, using the rng of that attempt.
+    :param permalink:
+    :param attempt:
+    :param game: When not given, the game of the attempts pool process is used.
+    :param status_update:
+    :return: The patches and certificate, or the UnableToGenerate error for failed attempts.
+    """
+    if game is None:
+        game = _worker_game
+
+    rng = _rng_for_attempt(permalink, attempt)
+    configuration = permalink.layout_configuration
+
+    try:
+        filler_patches, remaining_items, certificate = _create_patches(configuration, game, rng, status_update)
+    except UnableToGenerate as e:
+        return e
+
+    return filler_patches.assign_pickup_assignment(
+        _assign_remaining_items(rng, game.world_list, filler_patches.pickup_assignment, remaining_items,
+                                configuration.randomization_mode)
+    ), certificate
 
 
-@tenacity.retry(stop=tenacity.stop_after_attempt(15),
+def _create_patches_with_parallel_attempts(permalink: Permalink,
+                                           game: GameDescription,
+                                           status_update: Callable[[str], None],
+                                           workers: int,
+                                           ) -> Tuple[GamePatches, CollectionCertificate]:
+    """
+    Runs up to _MAXIMUM_ATTEMPTS generation attempts, each with an rng derived from the permalink and the attempt
+    number, and returns the patches and certificate of the first attempt that succeeded.
+    Since the attempts are independent, the result doesn't depend on how many are run at the same time.
+    :param permalink:
+    :param game:
+    :param status_update:
+    :param workers: How many attempts to run at the same time. With 1, all attempts run in this process.
+    :return:
+    """
+    if workers <= 1:
+        results = (_create_patches_for_attempt(permalink, attempt, game, status_update)
+                   for attempt in range(_MAXIMUM_ATTEMPTS))
+        return _first_successful_attempt(results, status_update)
+
+    # Leaving the block terminates the attempts that are still running.
+    with multiprocessing.Pool(workers, initializer=_initialize_attempt_worker,
+                              initargs=(permalink.layout_configuration.game_data,)) as pool:
+        return _first_successful_attempt(_results_of_attempts_in_pool(pool, permalink, workers), status_update)
+
+
+def _results_of_attempts_in_pool(pool: multiprocessing.Pool,
+                                 permalink: Permalink,
+                                 workers: int,
+                                 ) -> Iterator[Union[Tuple[GamePatches, CollectionCertificate], UnableToGenerate]]:
+    """
+    Runs the generation attempts in the given pool, yielding the results in attempt order.
+    Only `workers` attempts are submitted at first, and each result that's consumed submits the next attempt, so no
+    attempt runs after an earlier one succeeded, besides the ones that were already running.
+    :param pool:
+    :param permalink:
+    :param workers:
+    :return:
+    """
+    attempts = iter(range(_MAXIMUM_ATTEMPTS))
+
+    def submit(attempt: int):
+        return pool.apply_async(_create_patches_for_attempt, (permalink, attempt))
+
+    pending = collections.deque(submit(attempt) for attempt in itertools.islice(attempts, workers))
+    while pending:
+        yield pending.popleft().get()
+
+        attempt = next(attempts, None)
+        if attempt is not None:
+            pending.append(submit(attempt))
+
+
+def _first_successful_attempt(results: Iterator[Union[T, UnableToGenerate]],
+                              status_update: Callable[[str], None],
+                              ) -> T:
+    error = None
+    for attempt, result in enumerate(results):
+        if not isinstance(result, UnableToGenerate):
+            return result
+        error = result
+        status_update("Attempt {} failed: {}".format(attempt + 1, error))
+
+    raise error
+
+
+@tenacity.retry(stop=tenacity.stop_after_attempt(_MAXIMUM_ATTEMPTS),
                 retry=tenacity.retry_if_exception_type(UnableToGenerate),
                 reraise=True)
 def _retryable_create_patches(configuration: LayoutConfiguration,
                               game: GameDescription,
                               rng: Random,
                               status_update: Callable[[str], None],
-                              ) -> Tuple[GamePatches, List[PickupEntry]]:
+                              ) -> Tuple[GamePatches, List[PickupEntry], CollectionCertificate]:
     """
     Runs the rng-dependant parts of the generation, with retries
     :param configuration:
@@ -169,6 +304,22 @@ def _retryable_create_patches(configuration: LayoutConfiguration,
     :param status_update:
     :return:
     """
+    return _create_patches(configuration, game, rng, status_update)
+
+
+def _create_patches(configuration: LayoutConfiguration,
+                    game: GameDescription,
+                    rng: Random,
+                    status_update: Callable[[str], None],
+                    ) -> Tuple[GamePatches, List[PickupEntry], CollectionCertificate]:
+    """
+    Runs the rng-dependant parts of the generation
+    :param configuration:
+    :param game:
+    :param rng:
+    :param status_update:
+    :return:
+    """
     base_patches = base_patches_factory.create_base_patches(configuration, rng, game)
     pool_patches, item_pool = pool_creator.calculate_item_pool(configuration, game.resource_database, base_patches)
     _validate_item_pool_size(item_pool, game)
@@ -1,11 +1,17 @@
+import contextlib
 import copy
-from typing import Iterator, Optional, Set, Dict, List, NamedTuple, Tuple
-
-import networkx
+from typing import Iterator, Optional, Set, Dict, List, NamedTuple, Tuple, FrozenSet
 
+from randovania.game_description.compiled_graph import CompiledGraph, compiled_graph_for, adds_self_as_requirement
 from randovania.game_description.game_description import GameDescription
+from randovania.game_description.game_patches import GamePatches
 from randovania.game_description.node import Node, ResourceNode, PickupNode
-from randovania.game_description.requirements import RequirementSet, RequirementList
+from randovania.game_description.requirements import RequirementSet
+from randovania.game_description.resources.logbook_asset import LogbookAsset
+from randovania.game_description.resources.pickup_index import PickupIndex
+from randovania.game_description.resources.resource_info import ResourceInfo
+from randovania.game_description.resources.resource_slots import ResourceVector
+from randovania.generator.reach_graph import ReachGraph, RootComponent
 from randovania.resolver.state import State
 
 
@@ -14,16 +20,16 @@ class GraphPath(NamedTuple):
     node: Node
     requirements: RequirementSet
 
-    def is_in_graph(self, digraph: networkx.DiGraph):
+    def is_in_graph(self, graph: ReachGraph):
         if self.previous_node is None:
             return False
         else:
-            return (self.previous_node.index, self.node.index) in digraph.edges
+            return graph.has_edge(self.previous_node.index, self.node.index)
 
-    def add_to_graph(self, digraph: networkx.DiGraph):
-        digraph.add_node(self.node.index)
+    def add_to_graph(self, graph: ReachGraph):
+        graph.add_node(self.node.index)
         if self.previous_node is not None:
-            digraph.add_edge(self.previous_node.index, self.node.index, requirements=self.requirements)
+            graph.add_edge(self.previous_node.index, self.node.index, self.requirements)
 
 
 def filter_resource_nodes(nodes: Iterator[Node]) -> Iterator[ResourceNode]:
@@ -59,15 +65,23 @@ def filter_out_dangerous_actions(resource_nodes: Iterator[ResourceNode],
 
 
 class GeneratorReach:
-    _digraph: networkx.DiGraph
+    _digraph: ReachGraph
     _state: State
     _game: GameDescription
-    _reachable_paths: Optional[Dict[int, List[Node]]]
     _reachable_costs: Optional[Dict[int, int]]
     _node_reachable_cache: Dict[int, bool]
     _unreachable_paths: Dict[Tuple[Node, Node], RequirementSet]
+    _unreachable_paths_by_target: Dict[Node, Dict[Tuple[Node, Node], None]]
+    _unreachable_paths_by_slot: Dict[int, Dict[Tuple[Node, Node], None]]
+    _unreachable_damage_paths: Dict[Tuple[Node, Node], None]
     _safe_nodes: Optional[Set[Node]]
+    _safe_component: Optional[RootComponent]
     _is_node_safe_cache: Dict[Node, bool]
+    _resource_vector: ResourceVector
+    _unassigned_indices: Dict[PickupIndex, None]
+    _unhinted_scan_assets: Dict[LogbookAsset, None]
+    _resource_node_indices: Optional[FrozenSet[int]] = None
+    _unreachable_paths_journal: Optional[List[Tuple[Tuple[Node, Node], Optional[RequirementSet]]]] = None
 
     def __deepcopy__(self, memodict):
         reach = GeneratorReach(
@@ -76,25 +90,60 @@ class GeneratorReach:
             self._digraph.copy()
         )
         reach._unreachable_paths = copy.copy(self._unreachable_paths)
-        reach._reachable_paths = self._reachable_paths
+        reach._unreachable_paths_by_target = {
+            target: copy.copy(edges)
+            for target, edges in self._unreachable_paths_by_target.items()
+        }
+        # Only ever added to and always checked against _unreachable_paths, so it's safe to share
+        reach._unreachable_paths_by_slot = self._unreachable_paths_by_slot
+        reach._unreachable_damage_paths = self._unreachable_damage_paths
         reach._reachable_costs = self._reachable_costs
         reach._safe_nodes = self._safe_nodes
+        if self._safe_component is not None:
+            reach._safe_component = self._safe_component.copy()
 
         reach._node_reachable_cache = copy.copy(self._node_reachable_cache)
         reach._is_node_safe_cache = copy.copy(self._is_node_safe_cache)
+        reach._resource_node_indices = self._resource_node_indices
+        return reach
+
+    def independent_copy(self, patches: Optional[GamePatches] = None) -> "GeneratorReach":
+        """
+        Creates a copy that shares nothing that's modified with this reach, unlike deepcopy.
+        Useful for reaches that are used as the starting point of many unrelated generations.
+        :param patches: If given, replaces the patches of the copy's state. They must only differ from the current
+        patches in what doesn't change the reach, such as hints.
+        :return:
+        """
+        reach = copy.deepcopy(self)
+        if patches is not None:
+            state = self._state.copy()
+            state.patches = patches
+            reach._set_state(state)
+
+        reach._unreachable_paths_by_slot = {
+            slot: dict(edges)
+            for slot, edges in self._unreachable_paths_by_slot.items()
+        }
+        reach._unreachable_damage_paths = dict(self._unreachable_damage_paths)
         return reach
 
     def __init__(self,
                  game: GameDescription,
                  state: State,
-                 graph: networkx.DiGraph
+                 graph: ReachGraph
                  ):
 
         self._game = game
-        self._state = state
+        self._set_state(state)
         self._digraph = graph
         self._unreachable_paths = {}
-        self._reachable_paths = None
+        self._unreachable_paths_by_target = {}
+        self._unreachable_paths_by_slot = {}
+        self._unreachable_damage_paths = {}
+        self._reachable_costs = None
+        self._safe_nodes = None
+        self._safe_component = None
         self._node_reachable_cache = {}
         self._is_node_safe_cache = {}
 
@@ -104,30 +153,26 @@ class GeneratorReach:
                          initial_state: State,
                          ) -> "GeneratorReach":
 
-        reach = cls(game, initial_state, networkx.DiGraph())
+        reach = cls(game, initial_state, ReachGraph(len(game.world_list.all_nodes)))
         reach._expand_graph([GraphPath(None, initial_state.node, RequirementSet.trivial())])
         return reach
 
-    def _potential_nodes_from(self, node: Node) -> Iterator[Tuple[Node, RequirementSet, bool]]:
-        extra_requirement = _extra_requirement_for_node(self._game, node)
-        requirement_to_leave = node.requirements_to_leave(self._state.patches, self._state.resources)
-
-        for target_node, requirements in self._game.world_list.potential_nodes_from(node, self.state.patches):
-            if target_node is None:
-                continue
-
-            if requirement_to_leave != RequirementSet.trivial():
-                requirements = requirements.union(requirement_to_leave)
-
-            if extra_requirement is not None:
-                requirements = requirements.union(extra_requirement)
-
-            satisfied = requirements.satisfied(self._state.resources, self._state.energy)
-            yield target_node, requirements, satisfied
+    def _compiled_graph(self) -> CompiledGraph:
+        """
+        The connections of the game with the current patches. Resource nodes of dangerous resources require
+        collecting them to leave, so the reach never goes past one without collecting it.
+        :return:
+        """
+        return compiled_graph_for(self._game.world_list, self._game.resource_slots, self._state.patches,
+                                  adds_self_as_requirement(self._state.resources), self._game.dangerous_resources)
 
     def _expand_graph(self, paths_to_check: List[GraphPath]):
         # print("!! _expand_graph", len(paths_to_check))
-        self._reachable_paths = None
+        self._reachable_costs = None
+        graph = self._compiled_graph()
+        vector = self._resource_vector
+        energy = self._state.energy
+
         while paths_to_check:
             path = paths_to_check.pop(0)
 
@@ -135,15 +180,99 @@ class GeneratorReach:
                 continue
 
             path.add_to_graph(self._digraph)
+            if self._safe_component is not None and path.previous_node is not None:
+                self._safe_component.edge_added(self._digraph, path.previous_node.index, path.node.index)
 
-            for target_node, requirements, satisfied in self._potential_nodes_from(path.node):
-                if satisfied:
+            for target_node, requirements, compiled in graph.connections_from(path.node).connections:
+                if compiled.satisfied(vector, energy):
                     paths_to_check.append(GraphPath(path.node, target_node, requirements))
                 else:
-                    self._unreachable_paths[path.node, target_node] = requirements
+                    self._add_unreachable_path((path.node, target_node), requirements)
 
         self._safe_nodes = None
 
+    def _add_unreachable_path(self, edge: Tuple[Node, Node], requirements: RequirementSet):
+        self._set_unreachable_path(edge, requirements)
+
+        compiled = requirements.compile(self._game.resource_slots)
+        for slot in compiled.dependencies:
+            self._unreachable_paths_by_slot.setdefault(slot, {})[edge] = None
+        if compiled.has_damage:
+            self._unreachable_damage_paths[edge] = None
+
+    def _set_unreachable_path(self, edge: Tuple[Node, Node], requirements: Optional[RequirementSet]):
+        """
+        Changes the requirements of an unreachable path, recording the change if inside `temporary_changes`.
+        :param edge:
+        :param requirements: None removes the path.
+        :return:
+        """
+        if self._unreachable_paths_journal is not None:
+            self._unreachable_paths_journal.append((edge, self._unreachable_paths.get(edge)))
+
+        self._replace_unreachable_path(edge, requirements)
+
+    def _replace_unreachable_path(self, edge: Tuple[Node, Node], requirements: Optional[RequirementSet]):
+        target = edge[1]
+        if requirements is None:
+            del self._unreachable_paths[edge]
+            edges = self._unreachable_paths_by_target[target]
+            del edges[edge]
+            if not edges:
+                del self._unreachable_paths_by_target[target]
+        else:
+            self._unreachable_paths[edge] = requirements
+            self._unreachable_paths_by_target.setdefault(target, {})[edge] = None
+
+    @contextlib.contextmanager
+    def temporary_changes(self) -> Iterator["GeneratorReach"]:
+        """
+        All changes done to this reach inside this context are reverted when it exits.
+        This is much cheaper than working with a copy of the reach, since only what changed is reverted.
+        :return: This reach.
+        """
+        assert self._unreachable_paths_journal is None, "temporary_changes can't be nested"
+
+        state = self._state
+        resource_vector = self._resource_vector
+        reachable_costs = self._reachable_costs
+        safe_nodes = self._safe_nodes
+        safe_component = self._safe_component
+        node_reachable_cache = self._node_reachable_cache
+        is_node_safe_cache = self._is_node_safe_cache
+        unassigned_indices = self._unassigned_indices
+        unhinted_scan_assets = self._unhinted_scan_assets
+
+        # The remaining fields are changed in place, so they're replaced with copies
+        if safe_component is not None:
+            self._safe_component = safe_component.copy()
+        self._node_reachable_cache = copy.copy(node_reachable_cache)
+        self._is_node_safe_cache = copy.copy(is_node_safe_cache)
+        self._unassigned_indices = copy.copy(unassigned_indices)
+        self._unhinted_scan_assets = copy.copy(unhinted_scan_assets)
+
+        self._unreachable_paths_journal = []
+        self._digraph.start_journal()
+        try:
+            yield self
+
+        finally:
+            self._digraph.revert_journal()
+            journal = self._unreachable_paths_journal
+            self._unreachable_paths_journal = None
+            for edge, requirements in reversed(journal):
+                self._replace_unreachable_path(edge, requirements)
+
+            self._state = state
+            self._resource_vector = resource_vector
+            self._reachable_costs = reachable_costs
+            self._safe_nodes = safe_nodes
+            self._safe_component = safe_component
+            self._node_reachable_cache = node_reachable_cache
+            self._is_node_safe_cache = is_node_safe_cache
+            self._unassigned_indices = unassigned_indices
+            self._unhinted_scan_assets = unhinted_scan_assets
+
     def _can_advance(self,
                      node: Node,
                      ) -> bool:
@@ -158,34 +287,31 @@ class GeneratorReach:
         else:
             return True
 
+    def _calculate_root_component(self) -> RootComponent:
+        # The component is kept up to date as edges are added, but needs a new one for another node
+        if self._safe_component is None or self._safe_component.root != self._state.node.index:
+            self._safe_component = RootComponent(self._digraph, self._state.node.index)
+        return self._safe_component
+
     def _calculate_safe_nodes(self):
         if self._safe_nodes is not None:
             return
 
-        connected_components = list(networkx.strongly_connected_components(self._digraph))
-        for component in connected_components:
-            if self._state.node.index in component:
-                assert self._safe_nodes is None
-                self._safe_nodes = component
-
-        assert self._safe_nodes is not None
+        self._safe_nodes = self._calculate_root_component().nodes
 
-    def _calculate_reachable_paths(self):
-        if self._reachable_paths is not None:
+    def _calculate_reachable_costs(self):
+        if self._reachable_costs is not None:
             return
 
         all_nodes = self.game.world_list.all_nodes
 
-        def weight(source: int, target: int, attributes):
+        def cost_to_enter(target: int) -> int:
             if self._can_advance(all_nodes[target]):
                 return 0
             else:
                 return 1
 
-        self._reachable_costs, self._reachable_paths = networkx.multi_source_dijkstra(
-            self._digraph,
-            {self.state.node.index},
-            weight=weight)
+        self._reachable_costs = self._digraph.costs_from(self.state.node.index, cost_to_enter)
 
     def is_reachable_node(self, node: Node) -> bool:
         index = node.index
@@ -194,7 +320,7 @@ class GeneratorReach:
         if cached_value is not None:
             return cached_value
 
-        self._calculate_reachable_paths()
+        self._calculate_reachable_costs()
 
         cost = self._reachable_costs.get(index)
         if cost is not None:
@@ -215,19 +341,84 @@ class GeneratorReach:
         An iterator of all nodes there's an path from the reach's starting point. Similar to is_reachable_node
         :return:
         """
-        self._calculate_reachable_paths()
+        self._calculate_reachable_costs()
         all_nodes = self.game.world_list.all_nodes
-        for index in self._reachable_paths.keys():
+        for index in self._reachable_costs.keys():
             yield all_nodes[index]
 
     @property
     def state(self) -> State:
         return self._state
 
+    def _set_state(self, state: State):
+        self._state = state
+        self._resource_vector = self._game.resource_slots.create_vector(state.resources)
+        self._unassigned_indices = {
+            index: None
+            for index in state.collected_pickup_indices
+            if index not in state.patches.pickup_assignment
+        }
+        self._unhinted_scan_assets = {
+            scan_asset: None
+            for scan_asset in state.collected_scan_assets
+            if scan_asset not in state.patches.hints
+        }
+
+    def _resource_collected(self, resource: ResourceInfo):
+        if isinstance(resource, PickupIndex):
+            if resource not in self._state.patches.pickup_assignment:
+                self._unassigned_indices[resource] = None
+
+        elif isinstance(resource, LogbookAsset):
+            if resource not in self._state.patches.hints:
+                self._unhinted_scan_assets[resource] = None
+
+    def _remove_assigned(self, patches: GamePatches):
+        for index in [index for index in self._unassigned_indices if index in patches.pickup_assignment]:
+            del self._unassigned_indices[index]
+
+        for scan_asset in [scan_asset for scan_asset in self._unhinted_scan_assets if scan_asset in patches.hints]:
+            del self._unhinted_scan_assets[scan_asset]
+
     @property
     def game(self) -> GameDescription:
         return self._game
 
+    @property
+    def unassigned_pickup_indices(self) -> Iterator[PickupIndex]:
+        """
+        The collected pickup indices with no pickup assigned, in the order they were collected.
+        Kept up to date by advance_to, so it doesn't depend on how many resources were collected.
+        """
+        return iter(self._unassigned_indices)
+
+    @property
+    def unhinted_scan_assets(self) -> Iterator[LogbookAsset]:
+        """
+        The collected scan assets with no hint assigned, in the order they were collected.
+        """
+        return iter(self._unhinted_scan_assets)
+
+    def collectable_connected_resource_nodes(self) -> Set[ResourceNode]:
+        """
+        The resource nodes that can be collected, out of all nodes in connected_nodes.
+        Uses the component of the root instead of connected_nodes, since it's kept up to date as the graph grows.
+        :return:
+        """
+        if self._resource_node_indices is None:
+            self._resource_node_indices = frozenset(node.index for node in self._game.world_list.all_nodes
+                                                    if node.is_resource_node)
+
+        all_nodes = self._game.world_list.all_nodes
+        patches = self._state.patches
+        resources = self._state.resources
+        result = set()
+        for index in self._calculate_root_component().reachable_from_root & self._resource_node_indices:
+            node: ResourceNode = all_nodes[index]
+            if node.can_collect(patches, resources):
+                result.add(node)
+        return result
+
     @property
     def nodes(self) -> Iterator[Node]:
         all_nodes = self.game.world_list.all_nodes
@@ -265,36 +456,62 @@ class GeneratorReach:
             self._node_reachable_cache = {}
             self._is_node_safe_cache = {}
 
+        previous_vector = self._resource_vector
+        previous_energy = self._state.energy
+        previous_patches = self._state.patches
+        slots = self._game.resource_slots
         self._state = new_state
+        self._resource_vector = slots.create_vector(new_state.resources)
+        if new_state.patches is not previous_patches:
+            self._remove_assigned(new_state.patches)
+
+        # All unreachable paths were unsatisfied with the previous state, so only paths that depend on what
+        # changed can be satisfied now.
+        edges_to_check: Dict[Tuple[Node, Node], None] = {}
+        for slot, (previous_quantity, quantity) in enumerate(zip(previous_vector, self._resource_vector)):
+            if previous_quantity != quantity:
+                edges_to_check.update(self._unreachable_paths_by_slot.get(slot, {}))
+                if previous_quantity <= 0 < quantity:
+                    self._resource_collected(slots.resources[slot])
+        if previous_energy != self._state.energy:
+            edges_to_check.update(self._unreachable_damage_paths)
 
         paths_to_check: List[GraphPath] = []
 
         edges_to_remove = []
         # Check if we can expand the corners of our graph
-        # TODO: check if expensive. We filter by only nodes that depends on a new resource
-        for edge, requirements in self._unreachable_paths.items():
-            if requirements.satisfied(self._state.resources, self._state.energy):
+        for edge in edges_to_check:
+            requirements = self._unreachable_paths.get(edge)
+            if requirements is not None and requirements.compile(slots).satisfied(self._resource_vector,
+                                                                                  self._state.energy):
                 from_node, to_node = edge
                 paths_to_check.append(GraphPath(from_node, to_node, requirements))
                 edges_to_remove.append(edge)
 
         for edge in edges_to_remove:
-            del self._unreachable_paths[edge]
+            self._set_unreachable_path(edge, None)
 
         self._expand_graph(paths_to_check)
 
     def act_on(self, node: ResourceNode) -> None:
+        self._advance_to_collected(node, self.state.act_on_node(node))
+
+    def _advance_to_collected(self, node: ResourceNode, new_state: State) -> None:
+        """
+        Advances to a state that collected the given node, removing the paths it invalidated.
+        :param node:
+        :param new_state:
+        :return:
+        """
         new_dangerous_resources = set(
             resource
             for resource, quantity in node.resource_gain_on_collect(self.state.patches, self.state.resources)
             if resource in self.game.dangerous_resources
         )
-        new_state = self.state.act_on_node(node)
 
         if new_dangerous_resources:
             edges_to_remove = []
-            for source, target, attributes in self._digraph.edges.data():
-                requirements: RequirementSet = attributes["requirements"]
+            for source, target, requirements in self._digraph.edges():
                 dangerous = requirements.dangerous_resources
                 if dangerous and new_dangerous_resources.intersection(dangerous):
                     if not requirements.satisfied(new_state.resources, new_state.energy):
@@ -302,39 +519,35 @@ class GeneratorReach:
 
             for edge in edges_to_remove:
                 self._digraph.remove_edge(*edge)
+            if edges_to_remove:
+                self._safe_component = None
 
         self.advance_to(new_state)
 
-    def shortest_path_from(self, node: Node) -> Dict[Node, Tuple[Node, ...]]:
+    def shortest_path_from(self, node: Node) -> Dict[int, List[int]]:
         if node.index in self._digraph:
-            return networkx.shortest_path(self._digraph, node.index)
+            return self._digraph.shortest_paths_from(node.index)
         else:
             return {}
 
     def unreachable_nodes_with_requirements(self) -> Dict[Node, RequirementSet]:
+        """
+        The nodes with an unsatisfied path to them that aren't reachable, with the requirements of all these paths.
+        The paths are kept grouped by target, so each node is only checked once.
+        :return:
+        """
+        resources = self.state.resources
         results = {}
-        for (_, node), requirements in self._unreachable_paths.items():
+        for node, edges in self._unreachable_paths_by_target.items():
             if self.is_reachable_node(node):
                 continue
-            requirements = requirements.patch_requirements(self.state.resources, 1)
-            if node in results:
-                results[node] = results[node].expand_alternatives(requirements)
-            else:
-                results[node] = requirements
-        return results
 
-
-def _extra_requirement_for_node(game: GameDescription, node: Node) -> Optional[RequirementSet]:
-    extra_requirement = None
-
-    if node.is_resource_node:
-        resource_node: ResourceNode = node
-
-        node_resource = resource_node.resource()
-        if node_resource in game.dangerous_resources:
-            extra_requirement = RequirementSet([RequirementList.with_single_resource(node_resource)])
-
-    return extra_requirement
+            requirements = None
+            for edge in edges:
+                patched = self._unreachable_paths[edge].patch_requirements(resources, 1)
+                requirements = patched if requirements is None else requirements.expand_alternatives(patched)
+            results[node] = requirements
+        return results
 
 
 def get_safe_resources(reach: GeneratorReach) -> Iterator[ResourceNode]:
@@ -424,6 +637,53 @@ def advance_reach_with_possible_unsafe_resources(previous_reach: GeneratorReach)
     return previous_reach
 
 
+def collection_order_with_walked_over_nodes(game: GameDescription, final_state: State) -> List[ResourceNode]:
+    """
+    Lists the resource nodes collected to reach the given state, as the order a player would collect them in.
+    The generator walks over resource nodes without collecting them, so each node is preceded by the uncollected
+    nodes of the path to it, in the order they're walked over.
+    The states are replayed in a new GeneratorReach, so each path only uses the connections available at that point.
+    :param game: The game the states were created with.
+    :param final_state:
+    :return:
+    """
+    states = []
+    state = final_state
+    while state is not None:
+        states.append(state)
+        state = state.previous_state
+    states.reverse()
+
+    all_nodes = game.world_list.all_nodes
+    reach = GeneratorReach.reach_from_state(game, states[0])
+    position = states[0].node
+    result: List[ResourceNode] = []
+    walked_over: Set[ResourceNode] = set()
+
+    for state in states[1:]:
+        previous_state = reach.state
+        new_nodes = state.collected_resource_nodes[len(previous_state.collected_resource_nodes):]
+
+        for node in new_nodes:
+            for index in (reach._digraph.shortest_path(position.index, node.index) or [])[1:-1]:
+                in_the_way = all_nodes[index]
+                if (in_the_way.is_resource_node and in_the_way not in walked_over
+                        and in_the_way.can_collect(previous_state.patches, previous_state.resources)):
+                    walked_over.add(in_the_way)
+                    result.append(in_the_way)
+
+            if node not in walked_over:
+                result.append(node)
+            position = node
+
+        if new_nodes:
+            reach._advance_to_collected(new_nodes[-1], state)
+        else:
+            reach.advance_to(state)
+
+    return result
+
+
 def pickup_nodes_that_can_reach(pickup_nodes: Iterator[PickupNode],
                                 reach: GeneratorReach,
                                 safe_nodes: Set[Node]) -> Iterator[PickupNode]:
@@ -444,3 +704,17 @@ def advance_to_with_reach_copy(base_reach: GeneratorReach, state: State) -> Gene
     collect_all_safe_resources_in_reach(potential_reach)
     return potential_reach
     # return advance_reach_with_possible_unsafe_resources(potential_reach)
+
+
+@contextlib.contextmanager
+def advance_to_temporarily(base_reach: GeneratorReach, state: State) -> Iterator[GeneratorReach]:
+    """
+    Same as advance_to_with_reach_copy, but changes the given reach itself and reverts it when the context exits.
+    :param base_reach:
+    :param state:
+    :return:
+    """
+    with base_reach.temporary_changes():
+        base_reach.advance_to(state)
+        collect_all_safe_resources_in_reach(base_reach)
+        yield base_reach
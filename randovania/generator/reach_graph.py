@@ -0,0 +1,252 @@
+import collections
+from typing import Dict, Iterator, List, Optional, Tuple, Callable, Set
+
+from randovania.game_description.requirements import RequirementSet
+
+
+class ReachGraph:
+    """
+    A directed graph of node indices, with the RequirementSet of each edge.
+    Node indices are dense, so successors are stored in a list indexed by the node index.
+    Iteration order of nodes and successors is the order they were added.
+    """
+    _successors: List[Optional[Dict[int, RequirementSet]]]
+    _predecessors: List[Optional[Dict[int, None]]]
+    _nodes: Dict[int, None]
+    _journal: Optional[List[Tuple[int, Optional[int], Optional[RequirementSet]]]] = None
+
+    def __init__(self, node_count: int):
+        self._successors = [None] * node_count
+        self._predecessors = [None] * node_count
+        self._nodes = {}
+
+    def copy(self) -> "ReachGraph":
+        result = ReachGraph.__new__(ReachGraph)
+        result._successors = [
+            None if successors is None else dict(successors)
+            for successors in self._successors
+        ]
+        result._predecessors = [
+            None if predecessors is None else dict(predecessors)
+            for predecessors in self._predecessors
+        ]
+        result._nodes = dict(self._nodes)
+        return result
+
+    def start_journal(self) -> None:
+        """
+        Starts recording all changes, so they can be reverted with `revert_journal`.
+        """
+        assert self._journal is None, "Journal already started"
+        self._journal = []
+
+    def revert_journal(self) -> None:
+        """
+        Reverts all changes since `start_journal` and stops recording.
+        """
+        journal = self._journal
+        self._journal = None
+
+        for source, target, previous_requirements in reversed(journal):
+            if target is None:
+                self._successors[source] = None
+                self._predecessors[source] = None
+                del self._nodes[source]
+
+            elif previous_requirements is None:
+                del self._successors[source][target]
+                del self._predecessors[target][source]
+
+            else:
+                self._successors[source][target] = previous_requirements
+                self._predecessors[target][source] = None
+
+    def __contains__(self, index: int) -> bool:
+        return self._successors[index] is not None
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._nodes)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def add_node(self, index: int) -> None:
+        if self._successors[index] is None:
+            self._successors[index] = {}
+            self._predecessors[index] = {}
+            self._nodes[index] = None
+            if self._journal is not None:
+                self._journal.append((index, None, None))
+
+    def has_edge(self, source: int, target: int) -> bool:
+        successors = self._successors[source]
+        return successors is not None and target in successors
+
+    def add_edge(self, source: int, target: int, requirements: RequirementSet) -> None:
+        self.add_node(source)
+        self.add_node(target)
+        if self._journal is not None:
+            self._journal.append((source, target, self._successors[source].get(target)))
+        self._successors[source][target] = requirements
+        self._predecessors[target][source] = None
+
+    def remove_edge(self, source: int, target: int) -> None:
+        requirements = self._successors[source].pop(target)
+        del self._predecessors[target][source]
+        if self._journal is not None:
+            # Reverting adds the edge back, which only changes the iteration order of successors
+            self._journal.append((source, target, requirements))
+
+    def successors(self, index: int) -> Iterator[int]:
+        return iter(self._successors[index])
+
+    def predecessors(self, index: int) -> Iterator[int]:
+        return iter(self._predecessors[index])
+
+    def edges(self) -> Iterator[Tuple[int, int, RequirementSet]]:
+        for source in self._nodes:
+            for target, requirements in self._successors[source].items():
+                yield source, target, requirements
+
+    def costs_from(self, source: int, cost_to_enter: Callable[[int], int]) -> Dict[int, int]:
+        """
+        Calculates the cost of the cheapest path from source to every node reachable from it.
+        Entering a node costs either 0 or 1, as given by cost_to_enter, so a 0-1 BFS is used.
+        :param source:
+        :param cost_to_enter:
+        :return: The cost of each reachable node, including source with cost 0.
+        """
+        costs = {source: 0}
+        queue = collections.deque([source])
+        all_successors = self._successors
+        done = set()
+
+        while queue:
+            index = queue.popleft()
+            if index in done:
+                continue
+            done.add(index)
+
+            cost = costs[index]
+            for target in all_successors[index]:
+                new_cost = cost + cost_to_enter(target)
+                if new_cost < costs.get(target, new_cost + 1):
+                    costs[target] = new_cost
+                    if new_cost == cost:
+                        queue.appendleft(target)
+                    else:
+                        queue.append(target)
+
+        return costs
+
+    def shortest_paths_from(self, source: int) -> Dict[int, List[int]]:
+        """
+        Calculates a path with the fewest edges from source to every node reachable from it.
+        :param source:
+        :return: For each reachable node, the list of node indices of the path, starting with source.
+        """
+        paths = {source: [source]}
+        current_level = [source]
+        all_successors = self._successors
+
+        while current_level:
+            next_level = []
+            for index in current_level:
+                for target in all_successors[index]:
+                    if target not in paths:
+                        paths[target] = paths[index] + [target]
+                        next_level.append(target)
+            current_level = next_level
+
+        return paths
+
+    def shortest_path(self, source: int, target: int) -> Optional[List[int]]:
+        """
+        Calculates a path with the fewest edges from source to target, stopping as soon as target is found.
+        :param source:
+        :param target:
+        :return: The list of node indices of the path, starting with source and ending with target.
+        None if target isn't reachable from source.
+        """
+        if source not in self:
+            return None
+
+        parents: Dict[int, Optional[int]] = {source: None}
+        current_level = [source]
+        all_successors = self._successors
+
+        while current_level and target not in parents:
+            next_level = []
+            for index in current_level:
+                for successor in all_successors[index]:
+                    if successor not in parents:
+                        parents[successor] = index
+                        next_level.append(successor)
+            current_level = next_level
+
+        if target not in parents:
+            return None
+
+        path = [target]
+        while parents[path[-1]] is not None:
+            path.append(parents[path[-1]])
+        path.reverse()
+        return path
+
+
+def _expand_search(found: Set[int], start: int, neighbours: List[Optional[Dict]]) -> None:
+    found.add(start)
+    to_visit = [start]
+    while to_visit:
+        for neighbour in neighbours[to_visit.pop()]:
+            if neighbour not in found:
+                found.add(neighbour)
+                to_visit.append(neighbour)
+
+
+class RootComponent:
+    """
+    Keeps the strongly connected component that contains a given root node of a ReachGraph, as the graph grows.
+    The component is the intersection of the nodes reachable from the root and the nodes that can reach the root.
+    Both sets only grow when edges are added, so each node is visited at most once for each set, no matter how
+    many edges are added. Removing edges requires creating a new RootComponent.
+    """
+    root: int
+    _reachable_from_root: Set[int]
+    _reaches_root: Set[int]
+
+    def __init__(self, graph: ReachGraph, root: int):
+        self.root = root
+        self._reachable_from_root = set()
+        self._reaches_root = set()
+        _expand_search(self._reachable_from_root, root, graph._successors)
+        _expand_search(self._reaches_root, root, graph._predecessors)
+
+    def copy(self) -> "RootComponent":
+        result = RootComponent.__new__(RootComponent)
+        result.root = self.root
+        result._reachable_from_root = set(self._reachable_from_root)
+        result._reaches_root = set(self._reaches_root)
+        return result
+
+    def edge_added(self, graph: ReachGraph, source: int, target: int) -> None:
+        """
+        Updates the component for an edge that was just added to the given graph.
+        :param graph:
+        :param source:
+        :param target:
+        :return:
+        """
+        if source in self._reachable_from_root and target not in self._reachable_from_root:
+            _expand_search(self._reachable_from_root, target, graph._successors)
+
+        if target in self._reaches_root and source not in self._reaches_root:
+            _expand_search(self._reaches_root, source, graph._predecessors)
+
+    @property
+    def reachable_from_root(self) -> Set[int]:
+        return self._reachable_from_root
+
+    @property
+    def nodes(self) -> Set[int]:
+        return self._reachable_from_root & self._reaches_root
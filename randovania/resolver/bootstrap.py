@@ -167,7 +167,7 @@ def logic_bootstrap(configuration: LayoutConfiguration,
     # global state for easy printing functions
     debug._gd = game
 
-    game = copy.deepcopy(game)
+    game = game.layered_copy()
     starting_state = calculate_starting_state(game, patches)
 
     if configuration.trick_level_configuration.global_level == LayoutTrickLevel.MINIMAL_RESTRICTIONS:
@@ -0,0 +1,109 @@
+"""
+A certificate is the order in which resource nodes can be collected to reach the victory condition, as known by the
+generator. It includes the nodes the generator walked over, so checking it only calculates one reach per node, instead
+of searching for that order.
+"""
+import threading
+from typing import Tuple, Optional, Iterable
+
+from randovania.game_description.game_description import GameDescription
+from randovania.game_description.game_patches import GamePatches
+from randovania.game_description.node import ResourceNode
+from randovania.game_description.world_list import WorldList
+from randovania.layout.layout_configuration import LayoutConfiguration
+from randovania.layout.layout_description import SolverPath
+from randovania.resolver import debug
+from randovania.resolver.bootstrap import logic_bootstrap
+from randovania.resolver.event_pickup import EventPickupNode
+from randovania.resolver.exceptions import ResolverCancelled
+from randovania.resolver.logic import Logic
+from randovania.resolver.resolver_reach import ResolverReach
+from randovania.resolver.state import State
+
+# The index of each resource node, in the order they're collected
+CollectionCertificate = Tuple[int, ...]
+
+
+def certificate_from_nodes(nodes: Iterable[ResourceNode]) -> CollectionCertificate:
+    result = []
+    for node in nodes:
+        if isinstance(node, EventPickupNode):
+            # Only exists in games modified by the resolver, so both nodes it combines are listed
+            result.extend((node.event_node.index, node.pickup_node.index))
+        else:
+            result.append(node.index)
+    return tuple(result)
+
+
+def certificate_from_state(state: State) -> CollectionCertificate:
+    return certificate_from_nodes(state.collected_resource_nodes)
+
+
+def certificate_from_solver_path(world_list: WorldList, solver_path: Iterable[SolverPath],
+                                 ) -> Optional[CollectionCertificate]:
+    """
+    Creates a certificate from the solver path of a layout description.
+    :param world_list:
+    :param solver_path:
+    :return: The certificate, or None if the solver path has nodes that aren't in the given WorldList.
+    """
+    # The first step of the path is the starting location, where nothing is collected
+    try:
+        return tuple(world_list.node_from_name(step.node_name).index for step in list(solver_path)[1:])
+    except ValueError:
+        return None
+
+
+def _energy_to_collect(reach: ResolverReach, state: State, node: ResourceNode) -> Optional[int]:
+    return next((energy for action, energy in reach.possible_actions(state) if action is node), None)
+
+
+def check_certificate(configuration: LayoutConfiguration,
+                      game: GameDescription,
+                      patches: GamePatches,
+                      certificate: CollectionCertificate,
+                      cancellation: Optional[threading.Event] = None,
+                      ) -> Optional[State]:
+    """
+    Collects the nodes of the certificate in order, using the same logic as the resolver.
+    :param configuration:
+    :param game:
+    :param patches:
+    :param certificate:
+    :param cancellation: When set, the check stops and ResolverCancelled is raised.
+    :return: The final state, if every node could be collected in order and the victory condition is satisfied.
+    None otherwise, which doesn't mean the layout is impossible.
+    """
+    new_game, state = logic_bootstrap(configuration, game, patches)
+    logic = Logic(new_game, configuration)
+    state.resources["add_self_as_requirement_to_resources"] = 1
+    nodes_by_index = {node.index: node for node in new_game.world_list.all_nodes}
+
+    for index in certificate:
+        node = nodes_by_index.get(index)
+        if node is None:
+            debug.debug_print("Certificate failed: unknown node {}".format(index))
+            return None
+
+        if not node.can_collect(patches, state.resources):
+            # Already collected, when listed more than once
+            continue
+
+        if cancellation is not None and cancellation.is_set():
+            raise ResolverCancelled("Resolver cancelled while checking the certificate")
+
+        reach = ResolverReach.calculate_reach(logic, state, stop_when=lambda reached: reached is node)
+        energy = _energy_to_collect(reach, state, node)
+        if energy is None:
+            debug.debug_print("Certificate failed: unable to collect {}".format(
+                new_game.world_list.node_name(node, with_world=True)))
+            return None
+
+        state = state.act_on_node(node, path=reach.path_to_node(node), new_energy=energy)
+
+    if new_game.victory_condition.satisfied(state.resources, state.energy):
+        return state
+
+    debug.debug_print("Certificate failed: victory condition not satisfied")
+    return None
+
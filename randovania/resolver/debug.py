@@ -80,6 +80,16 @@ def log_new_advance(state: "State", reach: "ResolverReach"):
                 print("{}: {}".format(_indent(), n(node)))
 
 
+def log_known_dead_end(state: "State"):
+    if _DEBUG_LEVEL > 1:
+        print("{}* Skip {}, known dead end".format(_indent(), n(state.node)))
+
+
+def log_resolve_end(dead_ends: "TranspositionTable"):
+    if _DEBUG_LEVEL > 0:
+        print("Dead ends: {} hits, {} misses, {} stored".format(dead_ends.hits, dead_ends.misses, len(dead_ends)))
+
+
 def log_checking_satisfiable_actions():
     if _DEBUG_LEVEL > 1:
         print("{}# Satisfiable Actions".format(_indent()))
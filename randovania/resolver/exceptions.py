@@ -29,3 +29,7 @@ class GenerationFailure(Exception):
 
 class InvalidConfiguration(Exception):
     pass
+
+
+class ResolverCancelled(Exception):
+    pass
@@ -1,10 +1,12 @@
 import collections
-from typing import Dict
+from typing import Dict, Optional
 
+from randovania.game_description.compiled_graph import CompiledGraph
 from randovania.game_description.game_description import GameDescription
 from randovania.game_description.node import Node
 from randovania.game_description.requirements import RequirementSet
 from randovania.layout.layout_configuration import LayoutConfiguration
+from randovania.resolver.transposition_table import TranspositionTable, DEFAULT_MAXIMUM_ENTRIES
 
 
 class Logic:
@@ -14,12 +16,21 @@ class Logic:
     configuration: LayoutConfiguration
     additional_requirements: Dict[Node, RequirementSet]
     node_sightings: Dict[Node, int]
+    dead_ends: TranspositionTable
 
-    def __init__(self, game: GameDescription, configuration: LayoutConfiguration):
+    # Caches for ResolverReach, only valid for the graph they were calculated with
+    graph: Optional[CompiledGraph]
+    node_expansions: Dict[Node, "NodeExpansion"]
+
+    def __init__(self, game: GameDescription, configuration: LayoutConfiguration,
+                 maximum_dead_ends: int = DEFAULT_MAXIMUM_ENTRIES):
         self.game = game
         self.configuration = configuration
         self.additional_requirements = {}
         self.node_sightings = collections.defaultdict(int)
+        self.dead_ends = TranspositionTable(maximum_dead_ends)
+        self.graph = None
+        self.node_expansions = {}
 
     def get_additional_requirements(self, node: Node) -> RequirementSet:
         return self.additional_requirements.get(node, RequirementSet.trivial())
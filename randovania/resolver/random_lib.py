@@ -1,5 +1,5 @@
 from random import Random
-from typing import Iterator, List, TypeVar, Dict
+from typing import Iterator, List, TypeVar, Dict, Generic, Sequence
 
 T = TypeVar('T')
 
@@ -16,21 +16,116 @@ def shuffle(rng: Random, x: Iterator[T]) -> List[T]:
     return result
 
 
+class WeightedSampler(Generic[T]):
+    """
+    Weighted random sampling without replacement, in O(log n) per sample.
+    Keeps the weights in a Fenwick tree, so removing an item is just setting its weight to 0.
+    Samples the same items as `rng.choices` over the items left, as long as adding the weights is exact, such as when
+    all weights are integers.
+    """
+
+    def __init__(self, items: Sequence[T], weights: Sequence[float]):
+        self._items = list(items)
+        self._weights = [max(weight, 0) for weight in weights]
+        self._removed = [False] * len(self._items)
+        self._positive_left = sum(1 for weight in self._weights if weight > 0)
+        self._last_left = len(self._items) - 1
+
+        # Fenwick tree, 1-indexed: _tree[i] is the sum of the weights in (i - lowbit(i), i]
+        self._tree = [0] + self._weights
+        for i in range(1, len(self._tree)):
+            parent = i + (i & -i)
+            if parent < len(self._tree):
+                self._tree[parent] += self._tree[i]
+
+        self._top_bit = 1
+        while self._top_bit * 2 <= len(self._items):
+            self._top_bit *= 2
+
+    def __bool__(self) -> bool:
+        """If there's any item with a positive weight left."""
+        return self._positive_left > 0
+
+    @property
+    def total_weight(self) -> float:
+        total = 0
+        i = len(self._items)
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _find(self, target: float) -> int:
+        """The position of the first item whose cumulative weight is bigger than target."""
+        position = 0
+        accumulated = 0
+        step = self._top_bit
+        while step > 0:
+            next_position = position + step
+            if next_position <= len(self._items) and accumulated + self._tree[next_position] <= target:
+                position = next_position
+                accumulated += self._tree[next_position]
+            step //= 2
+        return position
+
+    def _remove(self, position: int):
+        weight = self._weights[position]
+        if weight > 0:
+            self._positive_left -= 1
+        self._weights[position] = 0
+        self._removed[position] = True
+
+        i = position + 1
+        while i < len(self._tree):
+            self._tree[i] -= weight
+            i += i & -i
+
+        while self._last_left >= 0 and self._removed[self._last_left]:
+            self._last_left -= 1
+
+    def sample(self, rng: Random) -> T:
+        """
+        Picks a random item, with probability proportional to its weight, and removes it.
+        :param rng:
+        :return:
+        """
+        if not self:
+            raise ValueError("No items with positive weight left")
+
+        position = self._find(rng.random() * (self.total_weight + 0.0))
+        # Like rng.choices, rounding may place the target past the last item
+        if position > self._last_left:
+            position = self._last_left
+
+        self._remove(position)
+        return self._items[position]
+
+
 def iterate_with_weights(items: Iterator[T],
                          item_weights: Dict[T, float],
                          rng: Random,
+                         compatibility: bool = True,
                          ) -> Iterator[T]:
     """
     Iterates over the given list randomly, with each item having the probability listed in item_weigths
     :param items:
     :param item_weights:
     :param rng:
+    :param compatibility: If set, the order is always the same as in previous versions. The faster WeightedSampler is
+    still used when all weights are integers and items are unique, since it gives the same results in that case.
     :return:
     """
 
     items = list(items)
     weights = [max(item_weights[action], 0) for action in items]
 
+    if not compatibility or (len(set(items)) == len(items)
+                             and all(float(weight).is_integer() for weight in weights)):
+        sampler = WeightedSampler(items, weights)
+        while sampler:
+            yield sampler.sample(rng)
+        return
+
     while items and any(weight > 0 for weight in weights):
         pickup_node = rng.choices(items, weights)[0]
 
@@ -1,4 +1,6 @@
-from typing import Optional, Tuple, Callable, FrozenSet
+import threading
+import time
+from typing import Optional, Tuple, Callable, FrozenSet, Hashable, List
 
 from randovania.game_description.game_description import GameDescription
 from randovania.game_description.game_patches import GamePatches
@@ -8,10 +10,13 @@ from randovania.game_description.resources.simple_resource_info import SimpleRes
 from randovania.layout.layout_configuration import LayoutConfiguration
 from randovania.resolver import debug, event_pickup
 from randovania.resolver.bootstrap import logic_bootstrap
+from randovania.resolver.certificate import CollectionCertificate, check_certificate
 from randovania.resolver.event_pickup import EventPickupNode
+from randovania.resolver.exceptions import ResolverCancelled
 from randovania.resolver.logic import Logic
 from randovania.resolver.resolver_reach import ResolverReach
 from randovania.resolver.state import State
+from randovania.resolver.transposition_table import DeadEnd, DEFAULT_MAXIMUM_ENTRIES
 
 
 def _simplify_requirement_list(self: RequirementList, state: State,
@@ -76,81 +81,200 @@ def _should_check_if_action_is_safe(state: State,
     return False
 
 
-def _inner_advance_depth(state: State,
-                         logic: Logic,
-                         status_update: Callable[[str], None],
-                         *,
-                         reach: Optional[ResolverReach] = None,
-                         ) -> Tuple[Optional[State], bool]:
-    """
+def _finish_dead_end(state: State,
+                     logic: Logic,
+                     reach: ResolverReach,
+                     fingerprint: Hashable,
+                     has_action: bool,
+                     ) -> Tuple[Optional[State], bool]:
+    debug.log_rollback(state, has_action, False)
+    additional_requirements = reach.satisfiable_as_requirement_set
 
-    :param state:
-    :param logic:
-    :param status_update:
-    :param reach: A precalculated reach for the given state
-    :return:
-    """
+    if has_action:
+        additional = set()
+        for resource_node in reach.collectable_resource_nodes(state):
+            additional |= logic.get_additional_requirements(resource_node).alternatives
 
-    if logic.game.victory_condition.satisfied(state.resources, state.energy):
-        return state, True
+        additional_requirements = additional_requirements.union(RequirementSet(additional))
 
-    if reach is None:
-        reach = ResolverReach.calculate_reach(logic, state)
+    additional_requirements = _simplify_additional_requirement_set(additional_requirements,
+                                                                   state,
+                                                                   logic.game.dangerous_resources)
+    logic.additional_requirements[state.node] = additional_requirements
+    logic.dead_ends.store(fingerprint, DeadEnd(has_action, additional_requirements))
+    return None, has_action
 
-    debug.log_new_advance(state, reach)
-    status_update("Resolving... {} total resources".format(len(state.resources)))
 
-    for action, energy in reach.possible_actions(state):
-        if _should_check_if_action_is_safe(state, action, logic.game.dangerous_resources):
+class _Frame:
+    """A state being explored by ResolverSearch, with the actions it still has to try."""
+    __slots__ = ("state", "reach", "fingerprint", "checking_satisfiable", "actions", "has_action")
 
-            potential_state = state.act_on_node(action, path=reach.path_to_node[action], new_energy=energy)
-            potential_reach = ResolverReach.calculate_reach(logic, potential_state)
+    def __init__(self, state: State, reach: ResolverReach, fingerprint: Hashable):
+        self.state = state
+        self.reach = reach
+        self.fingerprint = fingerprint
+        self.checking_satisfiable = False
+        self.actions = reach.possible_actions(state)
+        self.has_action = False
 
-            # If we can go back to where we were, it's a simple safe node
-            if state.node in potential_reach.nodes:
-                new_result = _inner_advance_depth(state=potential_state,
-                                                  logic=logic,
-                                                  status_update=status_update,
-                                                  reach=potential_reach)
 
-                if not new_result[1]:
+class ResolverSearch:
+    """
+    Depth-first search for a sequence of actions that reaches the victory condition.
+    The search is kept in an explicit stack, so it's not bound by the recursion limit and can be paused by a budget or
+    a cancellation and resumed later by calling `run` again. The paused object is the checkpoint, as the actions left
+    to try in each state are lazy iterators that depend on the Logic.
+    """
+
+    logic: Logic
+    expansions: int
+
+    def __init__(self, state: State, logic: Logic, status_update: Callable[[str], None]):
+        self.logic = logic
+        self.expansions = 0
+        self._status_update = status_update
+        self._initial_state = state
+        self._stack: List[_Frame] = []
+        self._child_result: Optional[Tuple[Optional[State], bool]] = None
+        self._result: Optional[Tuple[Optional[State], bool]] = None
+
+    @property
+    def finished(self) -> bool:
+        return self._result is not None
+
+    @property
+    def result(self) -> Optional[State]:
+        """The final state that satisfies the victory condition, or None if the search failed or isn't finished."""
+        if self._result is None:
+            return None
+        return self._result[0]
+
+    @property
+    def frontier(self) -> Tuple[State, ...]:
+        """The states currently being explored, from the starting state to the deepest one."""
+        return tuple(frame.state for frame in self._stack)
+
+    def run(self,
+            maximum_expansions: Optional[int] = None,
+            timeout: Optional[float] = None,
+            cancellation: Optional[threading.Event] = None,
+            ) -> bool:
+        """
+        Continues the search until it finishes or one of the limits is reached.
+        :param maximum_expansions: How many new states can be explored before pausing.
+        :param timeout: How many seconds can be spent before pausing.
+        :param cancellation: Pauses the search once set, from any thread.
+        :return: If the search is finished.
+        """
+        deadline = time.perf_counter() + timeout if timeout is not None else None
+        maximum_total = self.expansions + maximum_expansions if maximum_expansions is not None else None
+
+        if self._result is None and not self._stack and self._child_result is None:
+            self._call(self._initial_state, None)
+
+        while self._result is None:
+            if maximum_total is not None and self.expansions >= maximum_total:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            if cancellation is not None and cancellation.is_set():
+                break
+            self._step()
+
+        return self.finished
+
+    def _call(self, state: State, reach: Optional[ResolverReach]):
+        result = self._enter(state, reach)
+        if result is not None:
+            self._return(result)
+
+    def _return(self, result: Tuple[Optional[State], bool]):
+        if self._stack:
+            self._child_result = result
+        else:
+            self._result = result
+
+    def _enter(self, state: State, reach: Optional[ResolverReach]) -> Optional[Tuple[Optional[State], bool]]:
+        """
+        Starts exploring the given state.
+        :param state:
+        :param reach: A precalculated reach for the given state
+        :return: The result, if known without exploring. Otherwise None, with a new frame in the stack.
+        """
+        logic = self.logic
+        if logic.game.victory_condition.satisfied(state.resources, state.energy):
+            return state, True
+
+        fingerprint = logic.dead_ends.fingerprint(state)
+        dead_end = logic.dead_ends.get(fingerprint)
+        if dead_end is not None:
+            debug.log_known_dead_end(state)
+            logic.additional_requirements[state.node] = dead_end.additional_requirements
+            return None, dead_end.has_action
+
+        if reach is None:
+            reach = ResolverReach.calculate_reach(logic, state)
+
+        self.expansions += 1
+        debug.log_new_advance(state, reach)
+        self._status_update("Resolving... {} total resources".format(len(state.resources)))
+        self._stack.append(_Frame(state, reach, fingerprint))
+        return None
+
+    def _step(self):
+        logic = self.logic
+        frame = self._stack[-1]
+        state = frame.state
+
+        if self._child_result is not None:
+            result = self._child_result
+            self._child_result = None
+
+            if not frame.checking_satisfiable:
+                if not result[1]:
                     debug.log_rollback(state, True, True)
 
                 # If a safe node was a dead end, we're certainly a dead end as well
-                return new_result
-
-    debug.log_checking_satisfiable_actions()
-    has_action = False
-    for action, energy in reach.satisfiable_actions(state, logic.game.victory_condition):
-        new_result = _inner_advance_depth(
-            state=state.act_on_node(action, path=reach.path_to_node[action], new_energy=energy),
-            logic=logic,
-            status_update=status_update)
-
-        # We got a positive result. Send it back up
-        if new_result[0] is not None:
-            return new_result
-        else:
-            has_action = True
+                self._stack.pop()
+                self._return(result)
+                return
 
-    debug.log_rollback(state, has_action, False)
-    additional_requirements = reach.satisfiable_as_requirement_set
+            # We got a positive result. Send it back up
+            if result[0] is not None:
+                self._stack.pop()
+                self._return(result)
+                return
 
-    if has_action:
-        additional = set()
-        for resource_node in reach.collectable_resource_nodes(state):
-            additional |= logic.get_additional_requirements(resource_node).alternatives
+            frame.has_action = True
 
-        additional_requirements = additional_requirements.union(RequirementSet(additional))
+        if not frame.checking_satisfiable:
+            for action, energy in frame.actions:
+                if _should_check_if_action_is_safe(state, action, logic.game.dangerous_resources):
+                    potential_state = state.act_on_node(action, path=frame.reach.path_to_node(action),
+                                                        new_energy=energy)
+                    potential_reach = ResolverReach.calculate_reach(logic, potential_state)
 
-    logic.additional_requirements[state.node] = _simplify_additional_requirement_set(additional_requirements,
-                                                                                     state,
-                                                                                     logic.game.dangerous_resources)
-    return None, has_action
+                    # If we can go back to where we were, it's a simple safe node
+                    if state.node in potential_reach.nodes:
+                        self._call(potential_state, potential_reach)
+                        return
+
+            debug.log_checking_satisfiable_actions()
+            frame.checking_satisfiable = True
+            frame.actions = frame.reach.satisfiable_actions(state, logic.game.victory_condition)
+
+        for action, energy in frame.actions:
+            self._call(state.act_on_node(action, path=frame.reach.path_to_node(action), new_energy=energy), None)
+            return
+
+        self._stack.pop()
+        self._return(_finish_dead_end(state, logic, frame.reach, frame.fingerprint, frame.has_action))
 
 
 def advance_depth(state: State, logic: Logic, status_update: Callable[[str], None]) -> Optional[State]:
-    return _inner_advance_depth(state, logic, status_update)[0]
+    search = ResolverSearch(state, logic, status_update)
+    search.run()
+    return search.result
 
 
 def _quiet_print(s):
@@ -160,16 +284,45 @@ def _quiet_print(s):
 def resolve(configuration: LayoutConfiguration,
             game: GameDescription,
             patches: GamePatches,
-            status_update: Optional[Callable[[str], None]] = None
+            status_update: Optional[Callable[[str], None]] = None,
+            maximum_dead_ends: int = DEFAULT_MAXIMUM_ENTRIES,
+            cancellation: Optional[threading.Event] = None,
+            certificate: Optional[CollectionCertificate] = None,
             ) -> Optional[State]:
+    """
+    Searches for a sequence of actions that reaches the victory condition with the given patches.
+    :param configuration:
+    :param game:
+    :param patches:
+    :param status_update:
+    :param maximum_dead_ends: How many states known to not reach the victory condition are remembered.
+    :param cancellation: When set, the search stops and ResolverCancelled is raised.
+    :param certificate: An order to collect resource nodes that's checked first. The search only happens if
+    it doesn't reach the victory condition.
+    :return: The final state, or None if the victory condition can't be reached.
+    """
     if status_update is None:
         status_update = _quiet_print
 
+    if certificate is not None:
+        status_update("Checking certificate...")
+        final_state = check_certificate(configuration, game, patches, certificate, cancellation)
+        if final_state is not None:
+            return final_state
+
+    if cancellation is not None and cancellation.is_set():
+        raise ResolverCancelled("Resolver cancelled before searching")
+
     event_pickup.replace_with_event_pickups(game)
 
     new_game, starting_state = logic_bootstrap(configuration, game, patches)
-    logic = Logic(new_game, configuration)
+    logic = Logic(new_game, configuration, maximum_dead_ends)
     starting_state.resources["add_self_as_requirement_to_resources"] = 1
     debug.log_resolve_start()
 
-    return advance_depth(starting_state, logic, status_update)
+    search = ResolverSearch(starting_state, logic, status_update)
+    search.run(cancellation=cancellation)
+    debug.log_resolve_end(logic.dead_ends)
+    if not search.finished:
+        raise ResolverCancelled("Resolver cancelled after {} expansions".format(search.expansions))
+    return search.result
@@ -1,19 +1,93 @@
+import heapq
+import itertools
 import math
 from collections import defaultdict
-from typing import Dict, Set, Iterator, Tuple, FrozenSet
+from typing import Dict, Set, Iterator, Tuple, FrozenSet, NamedTuple, Hashable, Optional, List, Callable
 
+from randovania.game_description.compiled_graph import compiled_graph_for, adds_self_as_requirement
 from randovania.game_description.game_description import calculate_interesting_resources
 from randovania.game_description.node import ResourceNode, Node
 from randovania.game_description.requirements import RequirementList, RequirementSet, SatisfiableRequirements
+from randovania.game_description.resources.resource_slots import ResourceVector
 from randovania.resolver import debug
 from randovania.resolver.logic import Logic
 from randovania.resolver.state import State
 
 
+class NodeExpansion(NamedTuple):
+    """The result of checking all connections of a node, along with everything that result depends on."""
+    key: Hashable
+    # For each connection: target node, requirements, if it's satisfied and how much damage it takes
+    results: Tuple[Tuple[Node, RequirementSet, bool, int], ...]
+
+
+# The path to a node, as the path to the node before it and that node. Paths share their beginning with the path
+# they were extended from, so extending one doesn't copy it.
+PathLink = Optional[Tuple["PathLink", Node]]
+
+
+def _update_graph(logic: Logic, state: State):
+    """
+    Makes sure the logic's graph is valid for the given state, discarding all expansions when it isn't.
+    :param logic:
+    :param state:
+    :return:
+    """
+    graph = compiled_graph_for(logic.game.world_list, logic.game.resource_slots, state.patches,
+                               adds_self_as_requirement(state.resources))
+    if logic.graph is not graph:
+        logic.graph = graph
+        logic.node_expansions.clear()
+
+
+def _expand_node(logic: Logic, node: Node, state: State, vector: ResourceVector, energy: int) -> NodeExpansion:
+    """
+    Checks which connections of the given node can be used, with the given resources and energy.
+    The result of the last time each node was expanded is kept, and reused when nothing it depends on changed,
+    which is common when each state only has a few more resources than the one before.
+    :param logic:
+    :param node:
+    :param state: Only used for the graph, which must be already updated for it.
+    :param vector: The resources of the state, as a vector.
+    :param energy: The energy when reaching the node.
+    :return:
+    """
+    slots = logic.game.resource_slots
+    node_connections = logic.graph.connections_from(node)
+    additional_requirements = logic.get_additional_requirements(node)
+    additional_compiled = additional_requirements.compile(slots)
+
+    uses_energy = node_connections.has_damage or additional_compiled.has_damage
+    key = (
+        energy if uses_energy else None,
+        additional_requirements,
+        tuple(vector[slot] for slot in node_connections.dependencies),
+        tuple(vector[slot] for slot in additional_compiled.dependencies),
+    )
+
+    expansion = logic.node_expansions.get(node)
+    if expansion is not None and expansion.key == key:
+        return expansion
+
+    # The additional requirements figured out by backtracking apply to all connections
+    additional_satisfied = additional_compiled.satisfied(vector, energy)
+
+    results = []
+    for target_node, requirements, compiled in node_connections.connections:
+        if additional_satisfied and compiled.satisfied(vector, energy):
+            results.append((target_node, requirements, True, compiled.minimum_damage(vector, energy)))
+        else:
+            results.append((target_node, requirements, False, 0))
+
+    expansion = NodeExpansion(key, tuple(results))
+    logic.node_expansions[node] = expansion
+    return expansion
+
+
 class ResolverReach:
     _nodes: Tuple[Node, ...]
     _energy_at_node: Dict[Node, int]
-    path_to_node: Dict[Node, Tuple[Node, ...]]
+    _path_links: Dict[Node, PathLink]
     _satisfiable_requirements: SatisfiableRequirements
     _safe_nodes: FrozenSet[Node]
     _logic: Logic
@@ -32,71 +106,94 @@ class ResolverReach:
 
     def __init__(self,
                  nodes: Dict[Node, int],
-                 path_to_node: Dict[Node, Tuple[Node, ...]],
+                 path_links: Dict[Node, PathLink],
                  requirements: SatisfiableRequirements,
                  logic: Logic):
         self._nodes = tuple(nodes.keys())
         self._energy_at_node = nodes
         self._logic = logic
-        self.path_to_node = path_to_node
+        self._path_links = path_links
         self._satisfiable_requirements = requirements
 
+    def path_to_node(self, node: Node) -> Tuple[Node, ...]:
+        """
+        The nodes visited when going from the state's node to the given node, not including the given node.
+        :param node:
+        :return:
+        """
+        path = []
+        link = self._path_links[node]
+        while link is not None:
+            link, previous_node = link
+            path.append(previous_node)
+        path.reverse()
+        return tuple(path)
+
     @classmethod
     def calculate_reach(cls,
                         logic: Logic,
-                        initial_state: State) -> "ResolverReach":
-
+                        initial_state: State,
+                        stop_when: Optional[Callable[[Node], bool]] = None,
+                        ) -> "ResolverReach":
+        """
+        Calculates all nodes that can be reached from the state's node, with the most energy possible for each.
+        :param logic:
+        :param initial_state:
+        :param stop_when: If given, the calculation stops once a node it accepts is reached, leaving the reach partial.
+        :return:
+        """
+
+        # Keys: nodes already expanded
+        # Value: how much energy was available when expanding that node
         checked_nodes: Dict[Node, int] = {}
 
-        # Keys: nodes to check
-        # Value: how much energy was available when visiting that node
-        nodes_to_check: Dict[Node, int] = {
-            initial_state.node: initial_state.energy
-        }
+        # Max-heap of the nodes to check, by how much energy is available when visiting them.
+        # The counter keeps the order deterministic between nodes with the same energy.
+        nodes_to_check: List[Tuple[int, int, Node]] = []
+        counter = itertools.count()
 
         reach_nodes: Dict[Node, int] = {}
         requirements_by_node: Dict[Node, Set[RequirementList]] = defaultdict(set)
 
-        path_to_node: Dict[Node, Tuple[Node, ...]] = {}
-        path_to_node[initial_state.node] = tuple()
-
-        while nodes_to_check:
-            node = next(iter(nodes_to_check))
-            energy = nodes_to_check.pop(node)
+        path_links: Dict[Node, PathLink] = {}
+        path_links[initial_state.node] = None
+        best_energy: Dict[Node, int] = {}
 
-            if node.heal:
-                energy = initial_state.maximum_energy
+        _update_graph(logic, initial_state)
 
-            checked_nodes[node] = energy
-            if node != initial_state.node:
-                reach_nodes[node] = energy
+        vector = logic.game.resource_slots.create_vector(initial_state.resources)
+        maximum_energy = initial_state.maximum_energy
 
-            requirement_to_leave = node.requirements_to_leave(initial_state.patches, initial_state.resources)
+        def add_node_to_check(target: Node, target_energy: int):
+            if target.heal:
+                target_energy = maximum_energy
+            best_energy[target] = target_energy
+            heapq.heappush(nodes_to_check, (-target_energy, next(counter), target))
 
-            for target_node, requirements in logic.game.world_list.potential_nodes_from(node, initial_state.patches):
-                if target_node is None:
-                    continue
+        add_node_to_check(initial_state.node, initial_state.energy)
 
-                if checked_nodes.get(target_node, math.inf) <= energy or nodes_to_check.get(target_node,
-                                                                                            math.inf) <= energy:
-                    continue
+        while nodes_to_check:
+            negative_energy, _, node = heapq.heappop(nodes_to_check)
+            energy = -negative_energy
 
-                if requirement_to_leave != RequirementSet.trivial():
-                    requirements = requirements.union(requirement_to_leave)
+            # Nodes are only expanded again when a heal allows reaching them with more energy
+            if checked_nodes.get(node, -math.inf) >= energy:
+                continue
 
-                # Check if the normal requirements to reach that node is satisfied
-                satisfied = requirements.satisfied(initial_state.resources, energy)
-                if satisfied:
-                    # If it is, check if we additional requirements figured out by backtracking is satisfied
-                    satisfied = logic.get_additional_requirements(node).satisfied(initial_state.resources,
-                                                                                  energy)
+            checked_nodes[node] = energy
+            if node != initial_state.node:
+                reach_nodes[node] = energy
+                if stop_when is not None and stop_when(node):
+                    break
 
+            for target_node, requirements, satisfied, damage in _expand_node(logic, node, initial_state,
+                                                                              vector, energy).results:
                 if satisfied:
-                    nodes_to_check[target_node] = energy - requirements.minimum_damage(initial_state.resources,
-                                                                                       energy)
-                    path_to_node[target_node] = path_to_node[node] + (node,)
+                    if best_energy.get(target_node, -math.inf) < energy - damage:
+                        add_node_to_check(target_node, energy - damage)
+                        path_links[target_node] = (path_links[node], node)
 
-                elif target_node:
+                elif target_node not in checked_nodes:
                     # If we can't go to this node, store the reason in order to build the satisfiable requirements.
                     # Note we ignore the 'additional requirements' here because it'll be added on the end.
                     requirements_by_node[target_node].update(requirements.alternatives)
@@ -112,7 +209,7 @@ class ResolverReach:
         else:
             satisfiable_requirements = frozenset()
 
-        return ResolverReach(reach_nodes, path_to_node,
+        return ResolverReach(reach_nodes, path_links,
                              satisfiable_requirements,
                              logic)
 
@@ -0,0 +1,61 @@
+import collections
+from typing import Hashable, NamedTuple, Optional
+
+from randovania.game_description.requirements import RequirementSet
+from randovania.resolver.state import State
+
+DEFAULT_MAXIMUM_ENTRIES = 5000
+
+
+class DeadEnd(NamedTuple):
+    has_action: bool
+    additional_requirements: RequirementSet
+
+
+class TranspositionTable:
+    """
+    Remembers which states the resolver already fully explored without reaching the victory condition, so reaching
+    the same configuration through a different order of actions doesn't explore it again.
+    Entries are evicted in least recently used order once `maximum_entries` is reached.
+    """
+
+    maximum_entries: int
+    hits: int
+    misses: int
+
+    def __init__(self, maximum_entries: int = DEFAULT_MAXIMUM_ENTRIES):
+        self.maximum_entries = maximum_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "collections.OrderedDict[Hashable, DeadEnd]" = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def fingerprint(state: State) -> Hashable:
+        """
+        The parts of the state that decide the result of exploring it. The patches are constant for a given Logic.
+        Energy is kept exactly, as having less energy isn't guaranteed to be worse with the energy tank semantics.
+        :param state:
+        :return:
+        """
+        return state.node, state.energy, frozenset(state.resources.items())
+
+    def get(self, key: Hashable) -> Optional[DeadEnd]:
+        dead_end = self._entries.get(key)
+        if dead_end is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return dead_end
+
+    def store(self, key: Hashable, dead_end: DeadEnd):
+        if self.maximum_entries <= 0:
+            return
+
+        self._entries[key] = dead_end
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maximum_entries:
+            self._entries.popitem(last=False)
@@ -69,7 +69,6 @@ setup(
         'asyncqt',
         'nod>=1.1',
         'requests',
-        'networkx',
         'bitstruct',
         'construct',
         'tenacity',
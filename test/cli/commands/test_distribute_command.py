@@ -14,6 +14,7 @@ def test_distribute_command_logic(mock_generate_description: MagicMock,
                                   ):
     # Setup
     args = MagicMock()
+    args.candidate_workers = 1
     args.output_file = Path("asdfasdf/qwerqwerqwer/zxcvzxcv.json")
     patcher_json = Path("asdfasdf/qwerqwerqwer/zxcvzxcv.patcher-json")
 
@@ -28,6 +29,7 @@ def test_distribute_command_logic(mock_generate_description: MagicMock,
         status_update=ANY,
         validate_after_generation=args.validate,
         timeout=None,
+        parallel_attempts=args.parallel_attempts,
     )
 
     save_file_mock: MagicMock = mock_generate_description.return_value.save_to_file
@@ -5,7 +5,7 @@ from unittest.mock import MagicMock
 
 import pytest
 
-from randovania.game_description import default_database
+from randovania.game_description import default_database, description_cache
 from randovania.game_description.game_description import GameDescription
 from randovania.game_description.game_patches import GamePatches
 from randovania.game_description.item.item_database import ItemDatabase
@@ -112,6 +112,9 @@ except ImportError:
 
 
 def pytest_configure(config):
+    # Tests shouldn't write to the user's data dir
+    description_cache.set_disk_cache_enabled(False)
+
     if config.option.skip_generation_tests:
         setattr(config.option, 'markexpr', 'not skip_generation_tests')
 
@@ -0,0 +1,107 @@
+import dataclasses
+import gc
+import weakref
+from random import Random
+
+import pytest
+
+from randovania.game_description import compiled_graph
+from randovania.game_description.compiled_graph import CompiledGraph, compiled_graph_for
+from randovania.game_description.node import TeleporterNode, PickupNode
+from randovania.game_description.requirements import RequirementSet, RequirementList
+from randovania.generator import base_patches_factory
+
+
+@pytest.fixture(name="patches")
+def _patches(echoes_game_description, default_layout_configuration):
+    return echoes_game_description.create_game_patches().assign_gate_assignment(
+        base_patches_factory.gate_assignment_for_configuration(default_layout_configuration,
+                                                               echoes_game_description.resource_database,
+                                                               Random(15000))
+    )
+
+
+@pytest.mark.parametrize("add_self_as_requirement", [False, True])
+def test_connections_match_world_list(echoes_game_description, patches, add_self_as_requirement):
+    # Setup
+    world_list = echoes_game_description.world_list
+    slots = echoes_game_description.resource_slots
+    resources = {"add_self_as_requirement_to_resources": 1} if add_self_as_requirement else {}
+
+    # Run
+    graph = CompiledGraph(world_list, slots, patches, add_self_as_requirement)
+
+    # Assert
+    for node in world_list.all_nodes:
+        requirement_to_leave = node.requirements_to_leave(patches, resources)
+        expected = [
+            (target, requirements.union(requirement_to_leave))
+            for target, requirements in world_list.potential_nodes_from(node, patches)
+            if target is not None
+        ]
+        connections = graph.connections_from(node)
+        assert [(target, requirements) for target, requirements, _ in connections.connections] == expected
+        assert all(compiled is requirements.compile(slots)
+                   for _, requirements, compiled in connections.connections)
+        assert graph.connections_from(node) is connections
+
+
+def test_resources_required_to_leave(echoes_game_description, patches):
+    # Setup
+    node = next(node for node in echoes_game_description.world_list.all_nodes if isinstance(node, PickupNode))
+    graph = CompiledGraph(echoes_game_description.world_list, echoes_game_description.resource_slots, patches,
+                          False, frozenset([node.pickup_index]))
+    own_requirement = RequirementSet([RequirementList.with_single_resource(node.pickup_index)])
+
+    # Run
+    connections = graph.connections_from(node)
+
+    # Assert
+    assert connections.connections
+    for _, requirements, _ in connections.connections:
+        assert requirements == requirements.union(own_requirement)
+
+
+def test_compiled_graph_for_reuse(echoes_game_description, patches):
+    # Setup
+    world_list = echoes_game_description.world_list
+    slots = echoes_game_description.resource_slots
+    item = echoes_game_description.resource_database.item[0]
+    teleporter = next(node for node in world_list.all_nodes if isinstance(node, TeleporterNode) and node.editable)
+    other_teleporter = next(node for node in world_list.all_nodes
+                            if isinstance(node, TeleporterNode) and node.editable
+                            and node.default_connection != teleporter.default_connection)
+
+    first = compiled_graph_for(world_list, slots, patches, False)
+
+    # Run
+    with_item = compiled_graph_for(world_list, slots, patches.assign_extra_initial_items({item: 1}), False)
+    with_self_requirement = compiled_graph_for(world_list, slots, patches, True)
+    elevator_connection = dict(patches.elevator_connection)
+    elevator_connection[teleporter.teleporter_instance_id] = other_teleporter.default_connection
+    with_elevator = compiled_graph_for(world_list, slots,
+                                       dataclasses.replace(patches, elevator_connection=elevator_connection), True)
+
+    # Assert
+    assert with_item is first
+    assert with_self_requirement is not first
+    assert with_elevator is not with_self_requirement
+    assert world_list.resolve_teleporter_connection(other_teleporter.default_connection) in [
+        target for target, _, _ in with_elevator.connections_from(teleporter).connections
+    ]
+    assert compiled_graph._graph_for_world_list[world_list] is with_elevator
+
+
+def test_compiled_graph_for_does_not_keep_world_list(echoes_game_description, patches):
+    # Setup
+    world_list = echoes_game_description.world_list.layered_copy()
+    graph = compiled_graph_for(world_list, echoes_game_description.resource_slots, patches, False)
+    reference = weakref.ref(world_list)
+
+    # Run
+    del world_list
+    gc.collect()
+
+    # Assert
+    assert reference() is None
+    assert graph.world_list is None
@@ -0,0 +1,133 @@
+import collections
+import json
+import os
+import pickle
+from unittest.mock import MagicMock
+
+import pytest
+
+from randovania.game_description import data_reader, data_writer, description_cache
+from randovania.games.prime import default_data
+
+
+@pytest.fixture(name="disk_cache")
+def _disk_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(description_cache, "_in_memory_cache", collections.OrderedDict())
+    monkeypatch.setattr(description_cache, "_disk_cache_enabled", True)
+    monkeypatch.setattr(description_cache, "_custom_cache_dir", tmp_path)
+    return tmp_path
+
+
+@pytest.fixture(name="small_data")
+def _small_data(test_files_dir) -> dict:
+    with test_files_dir.joinpath("prime_data_as_json.json").open("r") as data_file:
+        return json.load(data_file)
+
+
+def test_cached_round_trip(disk_cache):
+    # Setup
+    original_data = default_data.decode_default_prime2()
+    key = description_cache.cache_key_for_data(original_data)
+
+    # Run
+    first = data_reader.decode_data(original_data)
+    description_cache.clear_in_memory_cache()
+    second = data_reader.decode_data(original_data)
+
+    # Assert
+    assert disk_cache.joinpath(key + ".pickle").is_file()
+    assert first is not second
+    assert data_writer.write_game_description(second) == original_data
+
+
+def test_load_or_decode_uses_cache(disk_cache, small_data):
+    # Setup
+    decoder = MagicMock(side_effect=data_reader._decode_data_uncached)
+
+    # Run
+    first = description_cache.load_or_decode(small_data, decoder)
+    second = description_cache.load_or_decode(small_data, decoder)
+    description_cache.clear_in_memory_cache()
+    third = description_cache.load_or_decode(small_data, decoder)
+
+    # Assert
+    decoder.assert_called_once_with(small_data)
+    assert first is not second
+    assert second is not third
+    assert data_writer.write_game_description(third) == data_writer.write_game_description(first)
+    assert {description_cache.cache_key_for_game(game) for game in (first, second, third)} == {
+        description_cache.cache_key_for_data(small_data)
+    }
+
+
+def test_load_or_decode_invalidated_by_data(disk_cache, small_data):
+    # Setup
+    decoder = MagicMock(side_effect=data_reader._decode_data_uncached)
+    other_data = dict(small_data)
+    other_data["game_name"] = "Another Game"
+
+    # Run
+    description_cache.load_or_decode(small_data, decoder)
+    result = description_cache.load_or_decode(other_data, decoder)
+
+    # Assert
+    assert decoder.call_count == 2
+    assert result.game_name == "Another Game"
+    assert {path.stem for path in disk_cache.glob("*.pickle")} == {
+        description_cache.cache_key_for_data(small_data),
+        description_cache.cache_key_for_data(other_data),
+    }
+    assert not list(disk_cache.glob("*.tmp"))
+
+
+def test_write_to_disk_prunes_least_recently_used(disk_cache, monkeypatch):
+    # Setup
+    monkeypatch.setattr(description_cache, "_MAXIMUM_DISK_ENTRIES", 3)
+    for i, name in enumerate(["old", "used", "recent"]):
+        entry = disk_cache.joinpath(name + ".pickle")
+        entry.write_bytes(b"data")
+        os.utime(entry, (1000 + i, 1000 + i))
+    os.utime(disk_cache.joinpath("used.pickle"), (5000, 5000))
+
+    # Run
+    description_cache._write_to_disk("new", b"new data")
+
+    # Assert
+    assert {path.stem for path in disk_cache.glob("*.pickle")} == {"used", "recent", "new"}
+    assert disk_cache.joinpath("new.pickle").read_bytes() == b"new data"
+
+
+def test_in_memory_cache_is_bounded(disk_cache, monkeypatch):
+    # Setup
+    monkeypatch.setattr(description_cache, "_MAXIMUM_IN_MEMORY_ENTRIES", 2)
+
+    # Run
+    for key in ["first", "second", "third"]:
+        description_cache._remember_in_memory(key, key.encode("UTF-8"))
+    description_cache._remember_in_memory("second", b"second")
+    description_cache._remember_in_memory("fourth", b"fourth")
+
+    # Assert
+    assert list(description_cache._in_memory_cache) == ["second", "fourth"]
+
+
+def test_cache_key_depends_on_version(small_data, monkeypatch):
+    key = description_cache.cache_key_for_data(small_data)
+    monkeypatch.setattr(description_cache, "VERSION", "0.0.0-another")
+
+    assert description_cache.cache_key_for_data(small_data) != key
+
+
+def test_load_or_decode_corrupted_entry(disk_cache, small_data):
+    # Setup
+    decoder = MagicMock(side_effect=data_reader._decode_data_uncached)
+    key = description_cache.cache_key_for_data(small_data)
+    disk_cache.joinpath(key + ".pickle").write_bytes(b"not a pickle")
+
+    # Run
+    result = description_cache.load_or_decode(small_data, decoder)
+
+    # Assert
+    decoder.assert_called_once_with(small_data)
+    assert result.game_name == small_data["game_name"]
+    assert isinstance(pickle.loads(disk_cache.joinpath(key + ".pickle").read_bytes()), type(result))
@@ -49,3 +49,79 @@ def test_calculate_dangerous_resources(danger_a, danger_b, expected_result):
 
     # Assert
     assert set(result) == set(expected_result)
+
+
+def test_layered_copy_patch_requirements(echoes_game_description):
+    # Setup
+    game = echoes_game_description
+    world_list = game.world_list
+    all_connections = {
+        node: dict(world_list.connections_in_area(node))
+        for node in world_list.all_nodes
+    }
+    tricks = {trick: 0 for trick in game.resource_database.trick}
+
+    # Run
+    new_game = game.layered_copy()
+    new_game.patch_requirements(tricks, 1)
+
+    # Assert
+    assert new_game.world_list.worlds is world_list.worlds
+    patched_count = 0
+    for node, connections in all_connections.items():
+        assert world_list.connections_in_area(node) == connections
+
+        for target, requirements in new_game.world_list.connections_in_area(node).items():
+            original = connections[target]
+            assert requirements == original.patch_requirements(tricks, 1)
+            if requirements is not original:
+                patched_count += 1
+
+    assert patched_count > 0
+
+
+def test_patch_requirements_cached_between_games(echoes_game_data):
+    # Setup
+    from randovania.game_description import data_reader, world_list
+
+    world_list.clear_patched_connections_cache()
+    game_a = data_reader.decode_data(echoes_game_data)
+    game_b = data_reader.decode_data(echoes_game_data)
+    tricks = {trick: 0 for trick in game_a.resource_database.trick}
+    nodes_b = set(map(id, game_b.world_list.all_nodes))
+
+    # Run
+    game_a.patch_requirements(tricks, 1)
+    game_b.patch_requirements(tricks, 1)
+
+    # Assert
+    assert len(world_list._patched_connections_cache) == 1
+    assert game_a.world_list.connections_fingerprint == game_b.world_list.connections_fingerprint
+    for node_a, node_b in zip(game_a.world_list.all_nodes, game_b.world_list.all_nodes):
+        connections_b = game_b.world_list.connections_in_area(node_b)
+        assert game_a.world_list.connections_in_area(node_a) == connections_b
+        assert all(id(target) in nodes_b for target in connections_b.keys())
+
+
+def test_patch_requirements_not_shared_with_different_connections(echoes_game_data):
+    # Setup
+    from randovania.game_description import data_reader, world_list
+
+    world_list.clear_patched_connections_cache()
+    game_a = data_reader.decode_data(echoes_game_data)
+    game_b = data_reader.decode_data(echoes_game_data)
+    tricks = {trick: 0 for trick in game_a.resource_database.trick}
+
+    area_b = next(area for area in game_b.world_list.all_areas if any(area.connections.values()))
+    source_b = next(node for node, connections in area_b.connections.items() if connections)
+    target_b = next(iter(area_b.connections[source_b]))
+    area_b.connections[source_b][target_b] = RequirementSet.impossible()
+
+    # Run
+    game_a.patch_requirements(tricks, 1)
+    game_b.patch_requirements(tricks, 1)
+
+    # Assert
+    assert len(world_list._patched_connections_cache) == 2
+    assert game_a.world_list.connections_fingerprint != game_b.world_list.connections_fingerprint
+    assert game_b.world_list.connections_in_area(source_b)[target_b] == RequirementSet.impossible()
@@ -1,9 +1,12 @@
+import collections
 from typing import Tuple
 from unittest.mock import MagicMock
 
 import pytest
 
-from randovania.game_description.requirements import IndividualRequirement, RequirementList, RequirementSet
+from randovania.game_description import requirements
+from randovania.game_description.requirements import IndividualRequirement, RequirementList, RequirementSet, \
+    intern_requirement_list, intern_requirement_set, intern_individual_requirement
 from randovania.game_description.resources.resource_database import ResourceDatabase
 from randovania.game_description.resources.resource_type import ResourceType
 from randovania.game_description.resources.simple_resource_info import SimpleResourceInfo
@@ -79,6 +82,20 @@ def test_simplify_requirement_set_static():
     assert simple_3.alternatives == frozenset([RequirementList(0, [])])
 
 
+def test_patch_requirements_unchanged_is_same_object():
+    res_a, id_req_a = make_req_a()
+    res_b, id_req_b = make_req_b()
+    res_c, id_req_c = make_req_c()
+
+    the_set = RequirementSet([
+        RequirementList(0, [id_req_a]),
+        RequirementList(0, [id_req_b]),
+    ])
+
+    assert the_set.patch_requirements({res_c: 1}, 1) is the_set
+    assert the_set.patch_requirements({res_a: 1}, 1) is not the_set
+
+
 def test_prevent_redundant():
     res_a, id_req_a = make_req_a()
     res_b, id_req_b = make_req_b()
@@ -91,6 +108,25 @@ def test_prevent_redundant():
     assert the_set.alternatives == frozenset([RequirementList(0, [id_req_a])])
 
 
+def test_prevent_redundant_chain():
+    res_a, id_req_a = make_req_a()
+    res_b, id_req_b = make_req_b()
+    res_c, id_req_c = make_req_c()
+
+    the_set = RequirementSet([
+        RequirementList(0, [id_req_a, id_req_b, id_req_c]),
+        RequirementList(0, [id_req_b, id_req_c]),
+        RequirementList(0, [id_req_a, id_req_b]),
+        RequirementList(0, [id_req_b]),
+        RequirementList(0, [id_req_c]),
+    ])
+
+    assert the_set.alternatives == frozenset([
+        RequirementList(0, [id_req_b]),
+        RequirementList(0, [id_req_c]),
+    ])
+
+
 def test_trivial_merge():
     trivial = RequirementSet.trivial()
     impossible = RequirementSet.impossible()
@@ -204,3 +240,95 @@ def test_set_dangerous_resources():
 
     # Assert
     assert result == {1, 2, 3, "a", "b", "c"}
+
+
+@pytest.mark.parametrize("energy", [1, 99, 299])
+def test_compiled_matches_requirement_set(echoes_game_description, energy):
+    # Setup
+    game = echoes_game_description
+    slots = game.resource_slots
+    all_requirements = [
+        requirements
+        for area in game.world_list.all_areas
+        for node in area.nodes
+        for requirements in area.connections[node].values()
+    ]
+    all_resources = [
+        {},
+        {resource: 1 for resource in slots.resources[::3]},
+        {resource: 2 for resource in slots.resources},
+    ]
+
+    for resources in all_resources:
+        vector = slots.create_vector(resources)
+        for requirements in all_requirements:
+            compiled = requirements.compile(slots)
+
+            # Run & Assert
+            assert compiled.satisfied(vector, energy) == requirements.satisfied(resources, energy)
+            assert compiled.minimum_damage(vector, energy) == requirements.minimum_damage(resources, energy)
+
+
+def test_compile_is_kept(echoes_game_description):
+    slots = echoes_game_description.resource_slots
+    the_set = RequirementSet.impossible()
+
+    assert the_set.compile(slots) is the_set.compile(slots)
+    assert not the_set.compile(slots).satisfied(slots.empty_vector(), 99)
+
+
+def test_intern_requirement_list():
+    res_a, id_req_a = make_req_a()
+    res_b, id_req_b = make_req_b()
+
+    first = intern_requirement_list(RequirementList(0, [id_req_a, id_req_b]))
+
+    assert intern_requirement_list(RequirementList(0, [id_req_b, id_req_a])) is first
+    assert intern_requirement_list(RequirementList(1, [id_req_a, id_req_b])) is not first
+
+
+def test_intern_requirement_set_difficulty():
+    res_a, id_req_a = make_req_a()
+
+    easy = intern_requirement_set(RequirementSet([RequirementList(0, [id_req_a])]))
+    hard = intern_requirement_set(RequirementSet([RequirementList(2, [id_req_a])]))
+
+    assert intern_requirement_set(RequirementSet([RequirementList(0, [id_req_a])])) is easy
+    assert easy == hard
+    assert easy is not hard
+    assert hard.minimum_satisfied_difficulty({res_a: 1}, 99) == 2
+
+
+def test_intern_individual_requirement_is_bounded(monkeypatch):
+    monkeypatch.setattr(requirements, "_INDIVIDUAL_POOL_SIZE", 2)
+    monkeypatch.setattr(requirements, "_individual_pool", collections.OrderedDict())
+    res_a, id_req_a = make_req_a()
+    res_b, id_req_b = make_req_b()
+
+    first = intern_individual_requirement(id_req_a)
+    assert intern_individual_requirement(IndividualRequirement(res_a, 1, False)) is first
+
+    intern_individual_requirement(id_req_b)
+    intern_individual_requirement(IndividualRequirement(res_a, 2, False))
+
+    assert list(requirements._individual_pool) == [IndividualRequirement(res_b, 1, False),
+                                                   IndividualRequirement(res_a, 2, False)]
+
+
+def test_compiled_dependencies(echoes_game_description):
+    slots = echoes_game_description.resource_slots
+    db = echoes_game_description.resource_database
+    item_a, item_b = db.item[0], db.item[1]
+    damage = db.damage[0]
+
+    the_set = RequirementSet([
+        RequirementList(0, [IndividualRequirement(item_a, 1, False)]),
+        RequirementList(0, [IndividualRequirement(item_b, 1, True), IndividualRequirement(damage, 50, False)]),
+    ])
+    compiled = the_set.compile(slots)
+
+    expected = {slots.slot(item_a), slots.slot(item_b)}
+    expected.update(slot for slot, _ in slots.damage_reduction_slots(damage))
+    assert compiled.dependencies == tuple(sorted(expected))
+    assert compiled.has_damage
+    assert not RequirementSet.trivial().compile(slots).has_damage
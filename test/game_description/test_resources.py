@@ -64,3 +64,25 @@ def test_convert_resource_gain_to_current_resources(resource_gain, expected):
 
     # Assert
     assert result == expected
+
+
+def test_resource_slots_create_vector(echoes_game_description):
+    # Setup
+    slots = echoes_game_description.resource_slots
+    database = echoes_game_description.resource_database
+    current_resources = {
+        database.energy_tank: 3,
+        database.get_item(24): 1,
+        PickupIndex(5): 1,
+        "add_self_as_requirement_to_resources": 1,
+    }
+
+    # Run
+    vector = slots.create_vector(current_resources)
+
+    # Assert
+    assert len(vector) == len(slots)
+    assert vector[slots.slot(database.energy_tank)] == 3
+    assert vector[slots.slot(database.get_item(24))] == 1
+    assert vector[slots.slot(PickupIndex(5))] == 1
+    assert sum(vector) == 5
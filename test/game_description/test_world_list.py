@@ -0,0 +1,71 @@
+import pytest
+
+from randovania.game_description.area import Area
+from randovania.game_description.area_location import AreaLocation
+from randovania.game_description.node import GenericNode, DockNode, PickupNode
+from randovania.game_description.resources.pickup_index import PickupIndex
+from randovania.game_description.world import World
+from randovania.game_description.world_list import WorldList
+
+
+def test_lookups_match_linear_search(echoes_game_description):
+    # Setup
+    world_list = echoes_game_description.world_list
+
+    # Run and Assert
+    for world in world_list.worlds:
+        assert world_list.world_with_name(world.name) is world
+        assert world_list.world_with_name(world.dark_name) is world
+        assert world_list.world_by_asset_id(world.world_asset_id) is world
+
+        for area in world.areas:
+            assert world_list.world_with_area(area) is world
+            assert world_list.area_by_asset_id(area.area_asset_id) is area
+            assert world_list.area_by_area_location(AreaLocation(world.world_asset_id, area.area_asset_id)) is area
+
+            for node in area.nodes:
+                if "/" not in node.name:
+                    name = world_list.node_name(node, with_world=True)
+                    # Light and dark areas can share names, so the first node with the name is found
+                    assert world_list.node_name(world_list.node_from_name(name), with_world=True) == name
+
+                if isinstance(node, DockNode):
+                    assert world_list.resolve_dock_connection(
+                        world, node.default_connection) is world.area_by_asset_id(
+                        node.default_connection.area_asset_id).node_with_dock_index(node.default_connection.dock_index)
+
+                if isinstance(node, PickupNode):
+                    assert world_list.node_with_resource(node.pickup_index) is node
+
+
+def test_lookups_unknown(echoes_game_description):
+    # Setup
+    world_list = echoes_game_description.world_list
+
+    # Run and Assert
+    with pytest.raises(KeyError):
+        world_list.world_with_name("Unknown")
+    with pytest.raises(KeyError):
+        world_list.world_by_asset_id(-1)
+    with pytest.raises(ValueError):
+        world_list.node_from_name("Unknown/Area/Node")
+    assert world_list.node_with_resource(PickupIndex(9999)) is None
+
+
+def test_add_new_node_invalidates_indexes():
+    # Setup
+    node_a = GenericNode("Node A", False, 0)
+    area = Area("Area", False, 10, 0, [node_a], {node_a: {}})
+    world_list = WorldList([World("World", "Dark World", 1, [area])])
+    assert world_list.node_from_name("Area/Node A") is node_a
+
+    # Run
+    node_b = PickupNode("Node B", False, 1, PickupIndex(5), True)
+    area.nodes.append(node_b)
+    area.connections[node_b] = {}
+    world_list.add_new_node(area, node_b)
+
+    # Assert
+    assert world_list.node_from_name("World/Area/Node B") is node_b
+    assert world_list.node_from_name("Dark World/Area/Node A") is node_a
+    assert world_list.world_with_area(area) is world_list.worlds[0]
@@ -24,8 +24,10 @@ def _pickup() -> PickupEntry:
     )
 
 
+@patch("randovania.generator.base_reach_cache.base_reach_for", autospec=True)
 @patch("randovania.generator.filler.runner.retcon_playthrough_filler", autospec=True)
 def test_run_filler(mock_retcon_playthrough_filler: MagicMock,
+                    mock_base_reach_for: MagicMock,
                     echoes_game_description,
                     default_layout_configuration,
                     pickup
@@ -40,18 +42,20 @@ def test_run_filler(mock_retcon_playthrough_filler: MagicMock,
 
     mock_retcon_playthrough_filler.return_value = patches.assign_hint(
         logbook_nodes[0].resource(), Hint(HintType.LOCATION, None, PickupIndex(0))
-    ).assign_pickup_assignment({PickupIndex(1): pickup})
+    ).assign_pickup_assignment({PickupIndex(1): pickup}), (1, 2)
 
     # Run
-    result_patches, remaining_items = runner.run_filler(default_layout_configuration, echoes_game_description,
-                                                        item_pool, patches,
-                                                        rng, status_update)
+    result_patches, remaining_items, certificate = runner.run_filler(default_layout_configuration,
+                                                                     echoes_game_description,
+                                                                     item_pool, patches,
+                                                                     rng, status_update)
 
     # Assert
     assert len(result_patches.hints) == len(logbook_nodes)
     assert [hint for hint in patches.hints.values()
             if hint.item_precision is None or hint.location_precision is None] == []
     assert remaining_items == [pickup]
+    assert certificate == (1, 2)
 
 
 def test_fill_unassigned_hints_empty_assignment(echoes_game_description):
@@ -0,0 +1,115 @@
+import copy
+import gc
+from random import Random
+
+import pytest
+
+from randovania.game_description import data_reader
+from randovania.game_description.area_location import AreaLocation
+from randovania.game_description.hint import Hint, HintType
+from randovania.game_description.node import LogbookNode
+from randovania.game_description.resources.pickup_index import PickupIndex
+from randovania.generator import base_reach_cache, base_patches_factory
+from randovania.generator.item_pool.pool_creator import calculate_item_pool
+from randovania.resolver.state import state_with_pickup
+
+
+@pytest.fixture(name="patches")
+def _patches(echoes_game_description, default_layout_configuration):
+    return echoes_game_description.create_game_patches().assign_gate_assignment(
+        base_patches_factory.gate_assignment_for_configuration(default_layout_configuration,
+                                                               echoes_game_description.resource_database,
+                                                               Random(15000))
+    )
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    base_reach_cache.clear_cache()
+    yield
+    base_reach_cache.clear_cache()
+
+
+def test_base_reach_is_reused(echoes_game_description, default_layout_configuration, patches):
+    # Setup
+    first = base_reach_cache.base_reach_for(default_layout_configuration, echoes_game_description, patches)
+    state = first.state
+    nodes = set(first.nodes)
+    item_pool = calculate_item_pool(default_layout_configuration, echoes_game_description.resource_database,
+                                    patches)[1]
+
+    # Run
+    for pickup in item_pool:
+        first.advance_to(state_with_pickup(first.state, pickup))
+    second = base_reach_cache.base_reach_for(default_layout_configuration, echoes_game_description, patches)
+
+    # Assert
+    assert second is not first
+    assert second.game is first.game
+    assert second.state.resources == state.resources
+    assert set(second.nodes) == nodes
+    assert set(first.nodes) != nodes
+
+
+def test_base_reach_for_different_patches(echoes_game_description, default_layout_configuration, patches):
+    # Setup
+    world = echoes_game_description.world_list.world_by_asset_id(patches.starting_location.world_asset_id)
+    other_area = next(area for area in world.areas
+                      if area.area_asset_id != patches.starting_location.area_asset_id and area.nodes)
+    other_patches = patches.assign_starting_location(AreaLocation(world.world_asset_id, other_area.area_asset_id))
+
+    # Run
+    first = base_reach_cache.base_reach_for(default_layout_configuration, echoes_game_description, patches)
+    second = base_reach_cache.base_reach_for(default_layout_configuration, echoes_game_description, other_patches)
+
+    # Assert
+    assert second.game is not first.game
+    assert second.state.node != first.state.node
+
+
+def test_base_reach_with_different_hints(echoes_game_description, default_layout_configuration, patches):
+    # Setup
+    logbook_asset = next(node.resource() for node in echoes_game_description.world_list.all_nodes
+                         if isinstance(node, LogbookNode))
+    other_patches = patches.assign_hint(logbook_asset, Hint(HintType.LOCATION, None, PickupIndex(0)))
+
+    # Run
+    first = base_reach_cache.base_reach_for(default_layout_configuration, echoes_game_description, patches)
+    second = base_reach_cache.base_reach_for(default_layout_configuration, echoes_game_description, other_patches)
+
+    # Assert
+    assert second.game is first.game
+    assert first.state.patches is patches
+    assert second.state.patches is other_patches
+
+
+def test_base_reach_shared_by_decoded_games(echoes_game_data, default_layout_configuration, patches):
+    # Setup
+    first_game = data_reader.decode_data(echoes_game_data)
+    second_game = data_reader.decode_data(echoes_game_data)
+
+    # Run
+    first = base_reach_cache.base_reach_for(default_layout_configuration, first_game, patches)
+    del first_game
+    gc.collect()
+    second = base_reach_cache.base_reach_for(default_layout_configuration, second_game, patches)
+
+    # Assert
+    assert second is not first
+    assert second.game is first.game
+    assert set(second.nodes) == set(first.nodes)
+    assert len(base_reach_cache._cache) == 1
+
+
+def test_base_reach_for_different_games(echoes_game_description, default_layout_configuration, patches):
+    # Setup
+    other_game = copy.deepcopy(echoes_game_description)
+
+    # Run
+    reach = base_reach_cache.base_reach_for(default_layout_configuration, echoes_game_description, patches)
+    other = base_reach_cache.base_reach_for(default_layout_configuration, other_game, patches)
+
+    # Assert
+    assert reach.game.world_list.worlds is echoes_game_description.world_list.worlds
+    assert other.game.world_list.worlds is other_game.world_list.worlds
+    assert len(base_reach_cache._cache) == 2
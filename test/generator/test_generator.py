@@ -1,8 +1,14 @@
+import multiprocessing
+from random import Random
 from typing import Callable, Union
 from unittest.mock import MagicMock, patch
 
+import pytest
+
 from randovania.game_description.default_database import default_prime2_game_description
 from randovania.generator import generator
+from randovania.generator.filler.filler_library import UnableToGenerate
+from randovania.layout.permalink import Permalink
 
 
 @patch("randovania.generator.generator._assign_remaining_items", autospec=True)
@@ -27,9 +33,10 @@ def test_create_patches(mock_random: MagicMock,
     item_pool = MagicMock()
     filler_patches = MagicMock()
     remaining_items = MagicMock()
+    certificate = MagicMock()
 
     mock_calculate_item_pool.return_value = pool_patches, item_pool
-    mock_run_filler.return_value = filler_patches, remaining_items
+    mock_run_filler.return_value = filler_patches, remaining_items, certificate
 
     # Run
     result = generator._create_randomized_patches(permalink, game, status_update)
@@ -53,4 +60,65 @@ def test_create_patches(mock_random: MagicMock,
     )
     filler_patches.assign_pickup_assignment.assert_called_once_with(mock_assign_remaining_items.return_value)
 
-    assert result == filler_patches.assign_pickup_assignment.return_value
+    assert result == (filler_patches.assign_pickup_assignment.return_value, certificate)
+
+
+class _FakePatches:
+    pickup_assignment = {}
+
+    def assign_pickup_assignment(self, assignment):
+        return assignment
+
+
+def _fake_create_patches(configuration, game, rng: Random, status_update):
+    if rng.randint(0, 3) != 0:
+        raise UnableToGenerate("Unlucky")
+    return _FakePatches(), [], (rng.randint(0, 3),)
+
+
+def _fake_assign_remaining_items(rng: Random, *args):
+    return rng.random()
+
+
+@pytest.mark.parametrize("workers", [1, 2, 3])
+def test_create_patches_with_parallel_attempts(workers, preset_manager):
+    if workers > 1 and "fork" not in multiprocessing.get_all_start_methods():
+        pytest.skip("Patching only reaches other processes when forking")
+
+    # Setup
+    permalink = Permalink(seed_number=1000, spoiler=True, preset=preset_manager.default_preset)
+    game = default_prime2_game_description()
+    expected_attempt = next(attempt for attempt in range(generator._MAXIMUM_ATTEMPTS)
+                            if generator._rng_for_attempt(permalink, attempt).randint(0, 3) == 0)
+    expected_rng = generator._rng_for_attempt(permalink, expected_attempt)
+    expected_rng.randint(0, 3)
+    expected_certificate = (expected_rng.randint(0, 3),)
+
+    # Run
+    with patch("randovania.generator.generator._create_patches", side_effect=_fake_create_patches), \
+            patch("randovania.generator.generator._assign_remaining_items",
+                  side_effect=_fake_assign_remaining_items):
+        result = generator._create_patches_with_parallel_attempts(permalink, game, id, workers)
+
+    # Assert
+    assert expected_attempt > 0
+    assert result == (expected_rng.random(), expected_certificate)
+
+
+def test_results_of_attempts_in_pool_submits_as_consumed():
+    # Setup
+    pool = MagicMock()
+    pool.apply_async.side_effect = lambda function, args: MagicMock(**{"get.return_value": args[1]})
+    permalink = MagicMock()
+
+    # Run
+    results = generator._results_of_attempts_in_pool(pool, permalink, 3)
+    first = next(results)
+    submitted_for_first = pool.apply_async.call_count
+    remaining = list(results)
+
+    # Assert
+    assert first == 0
+    assert submitted_for_first == 3
+    assert remaining == list(range(1, generator._MAXIMUM_ATTEMPTS))
+    assert pool.apply_async.call_count == generator._MAXIMUM_ATTEMPTS
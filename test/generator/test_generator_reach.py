@@ -10,25 +10,29 @@ from randovania.game_description.area import Area
 from randovania.game_description.dock import DockWeaknessDatabase
 from randovania.game_description.game_description import GameDescription
 from randovania.game_description.game_patches import GamePatches
+from randovania.game_description.item.item_category import ItemCategory
 from randovania.game_description.node import ResourceNode, Node, PickupNode, GenericNode, TranslatorGateNode
 from randovania.game_description.requirements import RequirementSet
+from randovania.game_description.resources.pickup_index import PickupIndex
 from randovania.game_description.resources.resource_info import add_resources_into_another
 from randovania.game_description.resources.resource_type import ResourceType
 from randovania.game_description.resources.translator_gate import TranslatorGate
 from randovania.game_description.world import World
 from randovania.game_description.world_list import WorldList
 from randovania.games.prime import default_data
-from randovania.generator import base_patches_factory
+from randovania.generator import base_patches_factory, base_reach_cache
+from randovania.generator.filler import retcon
 from randovania.generator.generator_reach import GeneratorReach, filter_reachable, filter_pickup_nodes, \
     reach_with_all_safe_resources, get_collectable_resource_nodes_of_reach, \
-    advance_reach_with_possible_unsafe_resources
+    advance_reach_with_possible_unsafe_resources, advance_to_temporarily, advance_to_with_reach_copy, \
+    collect_all_safe_resources_in_reach, collection_order_with_walked_over_nodes
 from randovania.generator.item_pool.pool_creator import calculate_item_pool
 from randovania.layout.layout_configuration import LayoutConfiguration
 from randovania.layout.patcher_configuration import PatcherConfiguration
 from randovania.layout.permalink import Permalink
 from randovania.layout.trick_level import LayoutTrickLevel, TrickLevelConfiguration
 from randovania.resolver.bootstrap import logic_bootstrap
-from randovania.resolver.state import State, add_pickup_to_state
+from randovania.resolver.state import State, add_pickup_to_state, state_with_pickup
 
 
 def _filter_pickups(nodes: Iterator[Node]) -> Iterator[PickupNode]:
@@ -156,6 +160,51 @@ def test_basic_search_with_translator_gate(has_translator: bool, echoes_resource
         assert set(reach.safe_nodes) == {node_a, node_b}
 
 
+def test_collection_order_with_walked_over_nodes(echoes_resource_database):
+    # Setup
+    node_a = GenericNode("Node A", True, 0)
+    pickup_b = PickupNode("Pickup B", True, 1, PickupIndex(0), True)
+    pickup_c = PickupNode("Pickup C", True, 2, PickupIndex(1), True)
+    pickup_d = PickupNode("Pickup D", True, 3, PickupIndex(2), True)
+
+    # A <-> B <-> C, D is only connected to A
+    world_list = WorldList([
+        World("Test World", "Test Dark World", 1, [
+            Area("Test Area A", False, 10, 0, [node_a, pickup_b, pickup_c, pickup_d],
+                 {
+                     node_a: {
+                         pickup_b: RequirementSet.trivial(),
+                         pickup_d: RequirementSet.trivial(),
+                     },
+                     pickup_b: {
+                         node_a: RequirementSet.trivial(),
+                         pickup_c: RequirementSet.trivial(),
+                     },
+                     pickup_c: {
+                         pickup_b: RequirementSet.trivial(),
+                     },
+                     pickup_d: {
+                         node_a: RequirementSet.trivial(),
+                     },
+                 }
+                 )
+        ])
+    ])
+    game = GameDescription(0, "", DockWeaknessDatabase([], [], [], []),
+                           echoes_resource_database, RequirementSet.impossible(),
+                           None, {}, world_list)
+    initial_state = State({}, (), 99, node_a, game.create_game_patches(), None, echoes_resource_database)
+
+    # The generator collects C, walking over B, then B and D
+    final_state = initial_state.act_on_node(pickup_c).act_on_node(pickup_b).act_on_node(pickup_d)
+
+    # Run
+    result = collection_order_with_walked_over_nodes(game, final_state)
+
+    # Assert
+    assert result == [pickup_b, pickup_c, pickup_d]
+
+
 def test_reach_size_from_start(echoes_game_description, default_layout_configuration):
     # Setup
     configuration = dataclasses.replace(
@@ -175,3 +224,106 @@ def test_reach_size_from_start(echoes_game_description, default_layout_configura
     # Assert
     assert len(list(reach.nodes)) == 25
     assert len(list(reach.safe_nodes)) == 4
+
+
+def test_advance_to_temporarily(test_data):
+    # Setup
+    game, state, permalink = test_data
+    reach = reach_with_all_safe_resources(game, state)
+    item_pool = calculate_item_pool(permalink.layout_configuration, game.resource_database, state.patches)
+
+    def summary(r: GeneratorReach):
+        return (set(r.nodes), set(r.safe_nodes), set(r.connected_nodes), r.unreachable_nodes_with_requirements(),
+                retcon.UncollectedState.from_reach(r))
+
+    before_state = reach.state
+    before = summary(reach)
+    changed = 0
+
+    for pickup in item_pool[1][:20]:
+        new_state = state_with_pickup(reach.state, pickup)
+        expected = summary(advance_to_with_reach_copy(reach, new_state))
+
+        # Run
+        with advance_to_temporarily(reach, new_state) as potential_reach:
+            result = summary(potential_reach)
+
+        # Assert
+        assert result == expected
+        assert reach.state is before_state
+        assert summary(reach) == before
+        changed += result != before
+
+    assert changed > 0
+
+
+def test_uncollected_state_kept_up_to_date(test_data):
+    # Setup
+    game, state, permalink = test_data
+    reach = reach_with_all_safe_resources(game, state)
+    item_pool = calculate_item_pool(permalink.layout_configuration, game.resource_database, state.patches)
+
+    def scanned(r: GeneratorReach) -> retcon.UncollectedState:
+        return retcon.UncollectedState(
+            {index for index in r.state.collected_pickup_indices if index not in r.state.patches.pickup_assignment},
+            {asset for asset in r.state.collected_scan_assets if asset not in r.state.patches.hints},
+            {node for node in r.connected_nodes if node.is_resource_node
+             and node.can_collect(r.state.patches, r.state.resources)},
+        )
+
+    # Run
+    for pickup in item_pool[1][:10]:
+        index = next(iter(reach.unassigned_pickup_indices), None)
+        if index is None:
+            reach.advance_to(reach.state.assign_pickup_to_starting_items(pickup))
+        else:
+            reach.advance_to(reach.state.assign_pickup_to_index(pickup, index))
+        collect_all_safe_resources_in_reach(reach)
+
+        # Assert
+        assert index is None or index not in set(reach.unassigned_pickup_indices)
+        assert list(reach.unassigned_pickup_indices) == [
+            index for index in reach.state.collected_pickup_indices
+            if index not in reach.state.patches.pickup_assignment
+        ]
+        assert retcon.UncollectedState.from_reach(reach) == scanned(reach)
+        assert set(reach.unreachable_nodes_with_requirements()) == {
+            target for _, target in reach._unreachable_paths if not reach.is_reachable_node(target)
+        }
+
+
+def test_candidate_weights_with_workers(preset_manager):
+    # Setup
+    configuration = preset_manager.default_preset.layout_configuration
+    game = data_reader.decode_data(configuration.game_data)
+    patches = base_patches_factory.create_base_patches(configuration, Random(0), game)
+    patches, item_pool = calculate_item_pool(configuration, game.resource_database, patches)
+    reach = base_reach_cache.base_reach_for(configuration, game, patches)
+    pickups = [pickup for pickup in item_pool if pickup.item_category != ItemCategory.EXPANSION]
+
+    def potential_actions(workers):
+        return retcon._calculate_potential_actions(reach, pickups[:10], retcon.UncollectedState.from_reach(reach),
+                                                   0, lambda message: None, workers)
+
+    workers = retcon._CandidateWorkers(reach, pickups, 2)
+    try:
+        # Run
+        first_round = potential_actions(workers)
+        assert first_round == potential_actions(None)
+
+        # This seed needs a few events before there's a location for a pickup
+        for i in range(4):
+            if i < 3:
+                step = retcon._FillerStep(None, None, None, 0)
+            else:
+                step = retcon._FillerStep(5, next(iter(reach.unassigned_pickup_indices)), None, None)
+            reach = retcon._replay_step(reach, pickups, step)
+            workers.steps.append(step)
+        second_round = potential_actions(workers)
+
+    finally:
+        workers.close()
+
+    # Assert
+    assert second_round == potential_actions(None)
+    assert second_round.keys() != first_round.keys()
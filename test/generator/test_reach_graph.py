@@ -0,0 +1,83 @@
+import pytest
+
+from randovania.game_description.requirements import RequirementSet
+from randovania.generator.reach_graph import ReachGraph, RootComponent
+
+
+@pytest.fixture(name="graph")
+def _graph() -> ReachGraph:
+    # 0 <-> 1 -> 2 <-> 3 -> 4, 5 is isolated
+    graph = ReachGraph(6)
+    for source, target in [(0, 1), (1, 0), (1, 2), (2, 3), (3, 2), (3, 4)]:
+        graph.add_edge(source, target, RequirementSet.trivial())
+    graph.add_node(5)
+    return graph
+
+
+def test_nodes_and_edges(graph):
+    assert list(graph) == [0, 1, 2, 3, 4, 5]
+    assert graph.has_edge(1, 2)
+    assert not graph.has_edge(2, 1)
+    assert not graph.has_edge(4, 0)
+    assert len(list(graph.edges())) == 6
+
+
+def test_copy_is_independent(graph):
+    copy = graph.copy()
+    copy.remove_edge(1, 2)
+    copy.add_edge(4, 5, RequirementSet.trivial())
+
+    assert graph.has_edge(1, 2)
+    assert not graph.has_edge(4, 5)
+    assert not copy.has_edge(1, 2)
+
+
+@pytest.mark.parametrize(["source", "expected"], [
+    (0, {0, 1}),
+    (2, {2, 3}),
+    (4, {4}),
+])
+def test_root_component(graph, source, expected):
+    assert RootComponent(graph, source).nodes == expected
+
+
+def test_root_component_edge_added(graph):
+    component = RootComponent(graph, 0)
+    copy = component.copy()
+
+    for source, target in [(4, 5), (5, 1)]:
+        graph.add_edge(source, target, RequirementSet.trivial())
+        component.edge_added(graph, source, target)
+
+    assert component.nodes == {0, 1, 2, 3, 4, 5}
+    assert copy.nodes == {0, 1}
+
+
+def test_costs_from(graph):
+    costs = graph.costs_from(0, lambda index: 1 if index in (2, 4) else 0)
+    assert costs == {0: 0, 1: 0, 2: 1, 3: 1, 4: 2}
+
+
+def test_shortest_paths_from(graph):
+    graph.add_edge(0, 3, RequirementSet.trivial())
+    paths = graph.shortest_paths_from(0)
+
+    assert paths == {
+        0: [0],
+        1: [0, 1],
+        3: [0, 3],
+        2: [0, 1, 2],
+        4: [0, 3, 4],
+    }
+
+
+@pytest.mark.parametrize(["source", "target", "expected"], [
+    (0, 4, [0, 3, 4]),
+    (1, 2, [1, 2]),
+    (2, 2, [2]),
+    (2, 0, None),
+    (0, 5, None),
+])
+def test_shortest_path(graph, source, target, expected):
+    graph.add_edge(0, 3, RequirementSet.trivial())
+    assert graph.shortest_path(source, target) == expected
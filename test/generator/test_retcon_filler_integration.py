@@ -4,7 +4,11 @@ from unittest.mock import MagicMock
 import pytest
 
 from randovania.game_description import data_reader
+from randovania.game_description.item.item_category import ItemCategory
+from randovania.game_description.resources.pickup_entry import PickupEntry, ConditionalResources, ResourceConversion
 from randovania.game_description.resources.pickup_index import PickupIndex
+from randovania.game_description.resources.resource_type import ResourceType
+from randovania.game_description.resources.simple_resource_info import SimpleResourceInfo
 from randovania.generator.filler import retcon
 from randovania.generator.filler.retcon import FillerConfiguration
 from randovania.layout.layout_configuration import LayoutConfiguration
@@ -51,6 +55,33 @@ def test_build_available_indices(major_mode: RandomizationMode, has_exclusion: b
     assert all_indices == a_pickups | b_pickups
 
 
+def test_pickups_by_resource():
+    # Setup
+    resource_a, resource_b, resource_c, resource_d = [
+        SimpleResourceInfo(i, name, name, ResourceType.ITEM)
+        for i, name in enumerate("ABCD")
+    ]
+    progressive = PickupEntry("Progressive", 1, ItemCategory.SUIT, (
+        ConditionalResources(None, None, ((resource_a, 1),)),
+        ConditionalResources(None, resource_a, ((resource_b, 1),)),
+    ))
+    expansion = PickupEntry("Expansion", 2, ItemCategory.EXPANSION, (
+        ConditionalResources(None, None, ((resource_c, 5),)),
+    ), convert_resources=(ResourceConversion(resource_c, resource_d),))
+
+    # Run
+    pickups_by_resource = retcon.PickupsByResource([progressive, expansion, expansion])
+    before = [pickups_by_resource.pickups_with_any([resource]) for resource in (resource_b, resource_d)]
+    pickups_by_resource.remove(expansion)
+    one_left = pickups_by_resource.pickups_with_any([resource_d])
+    pickups_by_resource.remove(expansion)
+
+    # Assert
+    assert before == [{progressive}, {expansion}]
+    assert one_left == {expansion}
+    assert pickups_by_resource.pickups_with_any([resource_a, resource_c, resource_d]) == {progressive}
+
+
 @pytest.mark.skip
 @pytest.mark.skip_generation_tests
 def test_retcon_filler_integration(default_layout_configuration):
@@ -66,13 +97,13 @@ def test_retcon_filler_integration(default_layout_configuration):
     new_game, state = logic_bootstrap(layout_configuration, game, patches)
     new_game.patch_requirements(state.resources, layout_configuration.damage_strictness.value)
 
-    filler_patches = retcon.retcon_playthrough_filler(new_game,
-                                                      state, tuple(available_pickups), rng,
-                                                      FillerConfiguration(
-                                                          randomization_mode=RandomizationMode.FULL,
-                                                          minimum_random_starting_items=0,
-                                                          maximum_random_starting_items=0,
-                                                          indices_to_exclude=frozenset(),
-                                                      ),
-                                                      status_update)
+    filler_patches, certificate = retcon.retcon_playthrough_filler(new_game,
+                                                                   state, tuple(available_pickups), rng,
+                                                                   FillerConfiguration(
+                                                                       randomization_mode=RandomizationMode.FULL,
+                                                                       minimum_random_starting_items=0,
+                                                                       maximum_random_starting_items=0,
+                                                                       indices_to_exclude=frozenset(),
+                                                                   ),
+                                                                   status_update)
     assert filler_patches == patches
@@ -210,7 +210,7 @@ def test_round_trip_generated_patches(echoes_game_data, preset_manager):
         )
     )
 
-    patches = generator._create_randomized_patches(
+    patches, certificate = generator._create_randomized_patches(
         permalink=Permalink(
             seed_number=1000,
             spoiler=True,
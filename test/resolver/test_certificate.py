@@ -0,0 +1,56 @@
+import pytest
+
+from randovania.game_description import data_reader
+from randovania.layout.layout_description import LayoutDescription, SolverPath
+from randovania.resolver import certificate, resolver
+
+
+@pytest.fixture(name="seed_a")
+def _seed_a(test_files_dir) -> LayoutDescription:
+    return LayoutDescription.from_file(test_files_dir.joinpath("log_files", "seed_a.json"))
+
+
+def _decoded_game(description: LayoutDescription):
+    return data_reader.decode_data(description.permalink.layout_configuration.game_data)
+
+
+@pytest.mark.skip_resolver_tests
+def test_check_certificate_from_resolver(seed_a):
+    # Setup
+    configuration = seed_a.permalink.layout_configuration
+    resolved_state = resolver.resolve(configuration, _decoded_game(seed_a), seed_a.patches)
+    game = _decoded_game(seed_a)
+
+    # Run
+    final_state = certificate.check_certificate(configuration, game, seed_a.patches,
+                                                certificate.certificate_from_state(resolved_state))
+
+    # Assert
+    assert final_state is not None
+    assert game.victory_condition.satisfied(final_state.resources, final_state.energy)
+
+
+def test_check_empty_certificate(seed_a):
+    # Run
+    final_state = certificate.check_certificate(seed_a.permalink.layout_configuration, _decoded_game(seed_a),
+                                                seed_a.patches, ())
+
+    # Assert
+    assert final_state is None
+
+
+def test_certificate_from_solver_path(echoes_game_description):
+    # Setup
+    world_list = echoes_game_description.world_list
+    nodes = [node for node in world_list.all_nodes if node.is_resource_node][:3]
+    solver_path = [SolverPath("Temple Grounds/Landing Site/Ship", ())]
+    solver_path.extend(SolverPath(world_list.node_name(node, with_world=True), ()) for node in nodes)
+
+    # Run
+    result = certificate.certificate_from_solver_path(world_list, solver_path)
+    missing = certificate.certificate_from_solver_path(
+        world_list, solver_path + [SolverPath("Temple Grounds/Landing Site/EventPickup - Unknown", ())])
+
+    # Assert
+    assert result == tuple(node.index for node in nodes)
+    assert missing is None
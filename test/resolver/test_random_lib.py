@@ -0,0 +1,64 @@
+from random import Random
+
+import pytest
+
+from randovania.resolver import random_lib
+
+
+def _previous_iterate_with_weights(items, item_weights, rng):
+    items = list(items)
+    weights = [max(item_weights[action], 0) for action in items]
+
+    while items and any(weight > 0 for weight in weights):
+        item = rng.choices(items, weights)[0]
+        index = items.index(item)
+        items.pop(index)
+        weights.pop(index)
+        yield item
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_iterate_with_integer_weights_is_compatible(seed):
+    # Setup
+    weights_rng = Random(seed)
+    items = list(range(200))
+    item_weights = {item: weights_rng.choice([0, 1, 2, 5, 30, 1000]) for item in items}
+
+    # Run
+    result = list(random_lib.iterate_with_weights(items, item_weights, Random(seed)))
+
+    # Assert
+    assert result == list(_previous_iterate_with_weights(items, item_weights, Random(seed)))
+
+
+def test_iterate_with_float_weights_compatibility():
+    # Setup
+    weights_rng = Random(1000)
+    items = list(range(100))
+    item_weights = {item: weights_rng.random() for item in items}
+    item_weights[10] = 0.0
+
+    # Run
+    compatible = list(random_lib.iterate_with_weights(items, item_weights, Random(5)))
+    fast = list(random_lib.iterate_with_weights(items, item_weights, Random(5), compatibility=False))
+
+    # Assert
+    assert compatible == list(_previous_iterate_with_weights(items, item_weights, Random(5)))
+    assert sorted(fast) == [item for item in items if item != 10]
+
+
+def test_weighted_sampler():
+    # Setup
+    sampler = random_lib.WeightedSampler(["a", "b", "c", "d"], [0, 3, -1, 1])
+    rng = Random(0)
+
+    # Run
+    assert sampler.total_weight == 4
+    samples = [sampler.sample(rng), sampler.sample(rng)]
+
+    # Assert
+    assert sorted(samples) == ["b", "d"]
+    assert not sampler
+    assert sampler.total_weight == 0
+    with pytest.raises(ValueError):
+        sampler.sample(rng)
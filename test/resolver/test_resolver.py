@@ -1,8 +1,15 @@
+import threading
+from unittest.mock import patch, MagicMock
+
 import pytest
 
 from randovania.game_description import data_reader
 from randovania.layout.layout_description import LayoutDescription
-from randovania.resolver import resolver, debug
+from randovania.resolver import resolver, debug, event_pickup
+from randovania.resolver.bootstrap import logic_bootstrap
+from randovania.resolver.exceptions import ResolverCancelled
+from randovania.resolver.logic import Logic
+from randovania.resolver.resolver_reach import ResolverReach
 
 
 @pytest.mark.skip_resolver_tests
@@ -20,3 +27,72 @@ def test_resolver_with_log_file(test_files_dir):
 
     # Assert
     assert final_state_by_resolve is not None
+
+
+@pytest.mark.skip_resolver_tests
+def test_resolver_search_resumed_with_budget(test_files_dir):
+    # Setup
+    debug.set_level(0)
+
+    description = LayoutDescription.from_file(test_files_dir.joinpath("log_files", "seed_a.json"))
+    configuration = description.permalink.layout_configuration
+    game = data_reader.decode_data(configuration.game_data)
+    event_pickup.replace_with_event_pickups(game)
+    new_game, starting_state = logic_bootstrap(configuration, game, description.patches)
+    starting_state.resources["add_self_as_requirement_to_resources"] = 1
+    search = resolver.ResolverSearch(starting_state, Logic(new_game, configuration), lambda s: None)
+
+    # Run
+    pauses = 0
+    while not search.run(maximum_expansions=5):
+        assert search.frontier[0] is starting_state
+        pauses += 1
+
+    # Assert
+    assert pauses > 0
+    assert search.result is not None
+    assert game.victory_condition.satisfied(search.result.resources, search.result.energy)
+
+
+def test_resolve_cancelled(test_files_dir):
+    # Setup
+    description = LayoutDescription.from_file(test_files_dir.joinpath("log_files", "seed_a.json"))
+    configuration = description.permalink.layout_configuration
+    game = data_reader.decode_data(configuration.game_data)
+    cancellation = threading.Event()
+    cancellation.set()
+
+    # Run
+    with pytest.raises(ResolverCancelled):
+        resolver.resolve(configuration=configuration, game=game, patches=description.patches,
+                         cancellation=cancellation)
+
+
+@patch("randovania.resolver.resolver.ResolverSearch", autospec=True)
+def test_resolve_cancelled_while_checking_certificate(mock_search: MagicMock, test_files_dir):
+    # Setup
+    description = LayoutDescription.from_file(test_files_dir.joinpath("log_files", "seed_a.json"))
+    configuration = description.permalink.layout_configuration
+    game = data_reader.decode_data(configuration.game_data)
+    cancellation = threading.Event()
+    new_game, starting_state = logic_bootstrap(configuration, game, description.patches)
+    starting_state.resources["add_self_as_requirement_to_resources"] = 1
+    reach = ResolverReach.calculate_reach(Logic(new_game, configuration), starting_state)
+    first_node = next(node for node, _ in reach.possible_actions(starting_state))
+    certificate = (first_node.index,) + tuple(node.index for node in new_game.world_list.all_nodes
+                                              if node.is_resource_node and node is not first_node)
+    real_calculate_reach = ResolverReach.calculate_reach
+
+    def cancelling_calculate_reach(*args, **kwargs):
+        cancellation.set()
+        return real_calculate_reach(*args, **kwargs)
+
+    # Run
+    with patch.object(ResolverReach, "calculate_reach", side_effect=cancelling_calculate_reach) as mock_reach:
+        with pytest.raises(ResolverCancelled, match="checking the certificate"):
+            resolver.resolve(configuration=configuration, game=game, patches=description.patches,
+                             cancellation=cancellation, certificate=certificate)
+
+    # Assert
+    assert mock_reach.call_count == 1
+    mock_search.assert_not_called()
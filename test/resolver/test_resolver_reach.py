@@ -1,7 +1,13 @@
+from random import Random
 from unittest.mock import MagicMock, PropertyMock
 
 from randovania.game_description.node import EventNode
+from randovania.generator import base_patches_factory
+from randovania.generator.item_pool.pool_creator import calculate_item_pool
+from randovania.resolver.bootstrap import logic_bootstrap
+from randovania.resolver.logic import Logic
 from randovania.resolver.resolver_reach import ResolverReach
+from randovania.resolver.state import state_with_pickup
 
 
 def test_possible_actions_empty():
@@ -51,3 +57,46 @@ def test_possible_actions_with_event():
     event.can_collect.assert_called_once_with(state.patches, state.resources)
     logic.get_additional_requirements.assert_called_once_with(event)
     logic.get_additional_requirements.return_value.satisfied.assert_called_once_with(state.resources, 1)
+
+
+def test_calculate_reach_reuses_expansions(echoes_game_description, default_layout_configuration):
+    # Setup
+    patches = echoes_game_description.create_game_patches().assign_gate_assignment(
+        base_patches_factory.gate_assignment_for_configuration(default_layout_configuration,
+                                                               echoes_game_description.resource_database,
+                                                               Random(15000))
+    )
+    game, state = logic_bootstrap(default_layout_configuration, echoes_game_description, patches)
+    item_pool = calculate_item_pool(default_layout_configuration, game.resource_database, patches)[1]
+    logic = Logic(game, default_layout_configuration)
+
+    def summary(reach: ResolverReach):
+        return [(node, reach.path_to_node(node)) for node in reach.nodes], reach.satisfiable_requirements
+
+    for pickup in item_pool[:15]:
+        state = state_with_pickup(state, pickup)
+
+        # Run
+        reach = ResolverReach.calculate_reach(logic, state)
+        fresh_reach = ResolverReach.calculate_reach(Logic(game, default_layout_configuration), state)
+
+        # Assert
+        assert summary(reach) == summary(fresh_reach)
+
+    assert logic.node_expansions
+
+
+def test_path_to_node():
+    # Setup
+    start, node_a, node_b, node_c = MagicMock(), MagicMock(), MagicMock(), MagicMock()
+    links = {start: None}
+    links[node_a] = (links[start], start)
+    links[node_b] = (links[node_a], node_a)
+    links[node_c] = (links[node_a], node_a)
+    reach = ResolverReach({node_a: 1, node_b: 1, node_c: 1}, links, frozenset(), MagicMock())
+
+    # Run
+    paths = [reach.path_to_node(node) for node in (start, node_a, node_b, node_c)]
+
+    # Assert
+    assert paths == [(), (start,), (start, node_a), (start, node_a)]
@@ -0,0 +1,56 @@
+from unittest.mock import MagicMock
+
+from randovania.game_description.requirements import RequirementSet
+from randovania.resolver.state import State
+from randovania.resolver.transposition_table import TranspositionTable, DeadEnd
+
+
+def _state(node, resources) -> State:
+    return State(resources, (), 99, node, MagicMock(), None, MagicMock())
+
+
+def test_fingerprint_ignores_resource_order():
+    # Setup
+    node = MagicMock()
+    a, b = MagicMock(), MagicMock()
+
+    # Run
+    first = TranspositionTable.fingerprint(_state(node, {a: 1, b: 2}))
+    second = TranspositionTable.fingerprint(_state(node, {b: 2, a: 1}))
+    third = TranspositionTable.fingerprint(_state(node, {b: 2, a: 2}))
+
+    # Assert
+    assert first == second
+    assert first != third
+
+
+def test_hits_and_least_recently_used_eviction():
+    # Setup
+    table = TranspositionTable(maximum_entries=2)
+    dead_end = DeadEnd(True, RequirementSet.trivial())
+
+    # Run
+    assert table.get("a") is None
+    table.store("a", dead_end)
+    table.store("b", dead_end)
+    assert table.get("a") is dead_end
+    table.store("c", dead_end)
+
+    # Assert
+    assert table.get("b") is None
+    assert table.get("a") is dead_end
+    assert table.get("c") is dead_end
+    assert len(table) == 2
+    assert (table.hits, table.misses) == (3, 2)
+
+
+def test_disabled_table_stores_nothing():
+    # Setup
+    table = TranspositionTable(maximum_entries=0)
+
+    # Run
+    table.store("a", DeadEnd(False, RequirementSet.impossible()))
+
+    # Assert
+    assert table.get("a") is None
+    assert len(table) == 0
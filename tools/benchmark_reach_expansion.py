@@ -0,0 +1,143 @@
+import argparse
+import collections
+import math
+import time
+from collections import defaultdict
+from typing import Dict, Set, Optional, Callable
+
+from randovania.game_description import data_reader
+from randovania.game_description.node import Node
+from randovania.game_description.requirements import RequirementList, RequirementSet
+from randovania.generator import generator
+from randovania.interface_common.preset_manager import PresetManager
+from randovania.layout.permalink import Permalink
+from randovania.resolver import resolver, resolver_reach
+from randovania.resolver.logic import Logic
+from randovania.resolver.resolver_reach import ResolverReach, PathLink
+from randovania.resolver.state import State
+
+
+def calculate_reach_in_discovery_order(logic: Logic,
+                                       initial_state: State,
+                                       stop_when: Optional[Callable[[Node], bool]] = None,
+                                       ) -> ResolverReach:
+    """
+    The previous ResolverReach.calculate_reach, which visits nodes in the order they're found and visits a node again
+    whenever it's found with more energy. Kept as the baseline for the comparison.
+    """
+    checked_nodes: Dict[Node, int] = {}
+
+    # Keys: nodes to check
+    # Value: how much energy was available when visiting that node
+    nodes_to_check: Dict[Node, int] = {
+        initial_state.node: initial_state.energy
+    }
+
+    reach_nodes: Dict[Node, int] = {}
+    requirements_by_node: Dict[Node, Set[RequirementList]] = defaultdict(set)
+
+    path_links: Dict[Node, PathLink] = {}
+    path_links[initial_state.node] = None
+
+    resolver_reach._update_graph(logic, initial_state)
+
+    vector = logic.game.resource_slots.create_vector(initial_state.resources)
+    maximum_energy = initial_state.maximum_energy
+
+    while nodes_to_check:
+        node = next(iter(nodes_to_check))
+        energy = nodes_to_check.pop(node)
+
+        if node.heal:
+            energy = maximum_energy
+
+        checked_nodes[node] = energy
+        if node != initial_state.node:
+            reach_nodes[node] = energy
+            if stop_when is not None and stop_when(node):
+                break
+
+        for target_node, requirements, satisfied, damage in resolver_reach._expand_node(logic, node, initial_state,
+                                                                                         vector, energy).results:
+            if checked_nodes.get(target_node, math.inf) <= energy or nodes_to_check.get(target_node,
+                                                                                        math.inf) <= energy:
+                continue
+
+            if satisfied:
+                nodes_to_check[target_node] = energy - damage
+                path_links[target_node] = (path_links[node], node)
+
+            else:
+                requirements_by_node[target_node].update(requirements.alternatives)
+
+    for node in set(reach_nodes.keys()).intersection(requirements_by_node.keys()):
+        requirements_by_node.pop(node)
+
+    if requirements_by_node:
+        satisfiable_requirements = frozenset.union(
+            *[RequirementSet(requirements).union(logic.get_additional_requirements(node)).alternatives
+              for node, requirements in requirements_by_node.items()])
+    else:
+        satisfiable_requirements = frozenset()
+
+    return ResolverReach(reach_nodes, path_links, satisfiable_requirements, logic)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Counts how many times the resolver expands each node when calculating reaches, separated by "
+                    "nodes in Dark Aether and in Light Aether. Both the current expansion, by most energy, and the "
+                    "previous one, in discovery order, are measured.")
+    parser.add_argument("--preset", default="Darkszero's Deluxe")
+    parser.add_argument("--seeds", type=int, default=3, help="How many seeds to generate and resolve.")
+    parser.add_argument("--first-seed", type=int, default=0)
+    args = parser.parse_args()
+
+    preset = next(preset for preset in PresetManager(None).included_presets if preset.name == args.preset)
+    expansions = collections.Counter()
+    real_expand_node = resolver_reach._expand_node
+
+    def counting_expand_node(logic, node, *expand_args):
+        area = logic.game.world_list.nodes_to_area(node)
+        expansions["dark" if area.in_dark_aether else "light"] += 1
+        return real_expand_node(logic, node, *expand_args)
+
+    reaches = 0
+    real_calculate_reach = resolver_reach.ResolverReach.calculate_reach
+
+    def counting_calculate_reach(*reach_args, **reach_kwargs):
+        nonlocal reaches
+        reaches += 1
+        return calculate_reach(*reach_args, **reach_kwargs)
+
+    resolver_reach._expand_node = counting_expand_node
+    resolver_reach.ResolverReach.calculate_reach = counting_calculate_reach
+
+    all_patches = []
+    for seed_number in range(args.first_seed, args.first_seed + args.seeds):
+        permalink = Permalink(seed_number=seed_number, spoiler=True, preset=preset)
+        all_patches.append((seed_number, permalink,
+                            generator.generate_description(permalink, None, False, timeout=None).patches))
+
+    for name, calculate_reach in [("Discovery order", calculate_reach_in_discovery_order),
+                                  ("Most energy", real_calculate_reach)]:
+        reaches = 0
+        expansions.clear()
+        total_time = 0
+        for seed_number, permalink, patches in all_patches:
+            game = data_reader.decode_data(permalink.layout_configuration.game_data)
+
+            start = time.perf_counter()
+            final_state = resolver.resolve(permalink.layout_configuration, game, patches)
+            elapsed = time.perf_counter() - start
+            total_time += elapsed
+            print("{}, seed {}: {} in {:.2f}s".format(name, seed_number,
+                                                      "possible" if final_state is not None else "impossible",
+                                                      elapsed))
+
+        print("{}: {} reaches, {} node expansions ({} in Dark Aether, {} in Light Aether), {:.2f}s resolving".format(
+            name, reaches, sum(expansions.values()), expansions["dark"], expansions["light"], total_time))
+
+
+if __name__ == '__main__':
+    main()
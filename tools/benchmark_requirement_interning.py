@@ -0,0 +1,89 @@
+import argparse
+import gc
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, Iterator
+
+from randovania.game_description import data_reader
+from randovania.game_description.game_description import GameDescription
+from randovania.game_description.requirements import RequirementSet
+from randovania.games.prime import default_data
+
+
+def current_rss_kb() -> int:
+    """RSS of this process, in KB. Only works in Linux."""
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1])
+    raise RuntimeError("VmRSS not found")
+
+
+def all_requirement_sets(game: GameDescription) -> Iterator[RequirementSet]:
+    yield game.victory_condition
+    for area in game.world_list.all_areas:
+        for connections in area.connections.values():
+            yield from connections.values()
+
+    for weaknesses in game.dock_weakness_database:
+        for weakness in weaknesses:
+            yield weakness.requirements
+
+
+def count_objects(game: GameDescription) -> Dict[str, str]:
+    sets = []
+    lists = []
+    individuals = []
+    for requirement_set in all_requirement_sets(game):
+        sets.append(requirement_set)
+        for alternative in requirement_set.alternatives:
+            lists.append(alternative)
+            individuals.extend(alternative.items)
+
+    return {
+        name: "{} unique objects for {} references".format(len({id(obj) for obj in objects}), len(objects))
+        for name, objects in [("RequirementSet", sets), ("RequirementList", lists),
+                              ("IndividualRequirement", individuals)]
+    }
+
+
+def run_single(interning: bool):
+    if not interning:
+        def identity(x):
+            return x
+
+        data_reader.intern_individual_requirement = identity
+        data_reader.intern_requirement_list = identity
+        data_reader.intern_requirement_set = identity
+
+    data = default_data.decode_default_prime2()
+    gc.collect()
+    rss_before = current_rss_kb()
+
+    game = data_reader._decode_data_uncached(data)
+    del data
+    gc.collect()
+    rss_after = current_rss_kb()
+
+    print("== {} interning".format("With" if interning else "Without"))
+    for name, count in count_objects(game).items():
+        print("{:>22}: {}".format(name, count))
+    print("{:>22}: {} KB".format("RSS increase", rss_after - rss_before))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Reports how many requirement objects and how much memory decoding the Echoes database uses, "
+                    "with and without interning the requirements. Each case runs in a new process.")
+    parser.add_argument("--single", choices=["with", "without"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single is not None:
+        run_single(args.single == "with")
+    else:
+        for mode in ["without", "with"]:
+            subprocess.run([sys.executable, __file__, "--single", mode], check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+import argparse
+import random
+import time
+from typing import List, Callable
+
+from randovania.game_description.default_database import default_prime2_game_description
+from randovania.game_description.game_description import GameDescription
+from randovania.game_description.requirements import RequirementSet
+from randovania.game_description.resources.resource_info import CurrentResources
+
+
+def all_requirement_sets(game: GameDescription) -> List[RequirementSet]:
+    result = []
+    for area in game.world_list.all_areas:
+        for node in area.nodes:
+            result.extend(game.world_list.connections_in_area(node).values())
+
+    for weaknesses in game.dock_weakness_database:
+        for weakness in weaknesses:
+            result.append(weakness.requirements)
+
+    return result
+
+
+def sample_resources(game: GameDescription, count: int, seed: int) -> List[CurrentResources]:
+    rng = random.Random(seed)
+    resources = list(game.resource_slots.resources)
+
+    result = []
+    for i in range(count):
+        chosen = rng.sample(resources, (len(resources) * i) // max(count - 1, 1))
+        result.append({resource: rng.randint(1, 5) for resource in chosen})
+    return result
+
+
+def measure(name: str, repeat: int, function: Callable[[], list]) -> list:
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    print("{:>30}: {:8.2f} ms".format(name, best * 1000))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compares evaluating the requirements of all Echoes edges via RequirementSet and via "
+                    "CompiledRequirementSet.")
+    parser.add_argument("--states", type=int, default=8, help="How many different resource states to use.")
+    parser.add_argument("--repeat", type=int, default=5, help="How many times to measure. The best is reported.")
+    parser.add_argument("--energy", type=int, default=199)
+    parser.add_argument("--seed", type=int, default=1000)
+    args = parser.parse_args()
+
+    game = default_prime2_game_description()
+    slots = game.resource_slots
+    requirement_sets = all_requirement_sets(game)
+    all_resources = sample_resources(game, args.states, args.seed)
+    energy = args.energy
+
+    print("{} requirement sets, {} resource states, {} slots".format(len(requirement_sets), len(all_resources),
+                                                                   len(slots)))
+
+    start = time.perf_counter()
+    compiled_sets = [requirements.compile(slots) for requirements in requirement_sets]
+    print("{:>30}: {:8.2f} ms".format("compile", (time.perf_counter() - start) * 1000))
+
+    vectors = measure("create vectors", args.repeat,
+                      lambda: [slots.create_vector(resources) for resources in all_resources])
+
+    object_satisfied = measure(
+        "object satisfied", args.repeat,
+        lambda: [requirements.satisfied(resources, energy)
+                 for resources in all_resources
+                 for requirements in requirement_sets])
+    compiled_satisfied = measure(
+        "compiled satisfied", args.repeat,
+        lambda: [compiled.satisfied(vector, energy)
+                 for vector in vectors
+                 for compiled in compiled_sets])
+
+    object_damage = measure(
+        "object minimum_damage", args.repeat,
+        lambda: [requirements.minimum_damage(resources, energy)
+                 for resources in all_resources
+                 for requirements in requirement_sets])
+    compiled_damage = measure(
+        "compiled minimum_damage", args.repeat,
+        lambda: [compiled.minimum_damage(vector, energy)
+                 for vector in vectors
+                 for compiled in compiled_sets])
+
+    if object_satisfied != compiled_satisfied or object_damage != compiled_damage:
+        raise ValueError("Compiled evaluation doesn't match the RequirementSet evaluation")
+    print("Results match.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import time
+from random import Random
+from typing import Callable
+
+from randovania.game_description.compiled_graph import CompiledGraph
+from randovania.game_description.default_database import default_prime2_game_description
+from randovania.generator import base_patches_factory
+from randovania.interface_common.preset_manager import PresetManager
+
+
+def measure(name: str, repeat: int, function: Callable[[], list]) -> list:
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    print("{:>30}: {:8.2f} ms".format(name, best * 1000))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measures the WorldList lookups used when expanding reaches and serializing layouts, "
+                    "over all Echoes nodes, and the same connections from a CompiledGraph.")
+    parser.add_argument("--preset", default="Darkszero's Deluxe",
+                        help="The preset used to create the patches, such as elevator connections.")
+    parser.add_argument("--repeat", type=int, default=5, help="How many times to measure. The best is reported.")
+    parser.add_argument("--seed", type=int, default=1000)
+    args = parser.parse_args()
+
+    preset = next(preset for preset in PresetManager(None).included_presets if preset.name == args.preset)
+    game = default_prime2_game_description()
+    world_list = game.world_list
+    patches = base_patches_factory.create_base_patches(preset.layout_configuration, Random(args.seed), game)
+    all_nodes = world_list.all_nodes
+    # Names with a slash can't be parsed by node_from_name
+    node_names = [world_list.node_name(node, with_world=True) for node in all_nodes if "/" not in node.name]
+    areas = list(world_list.all_areas)
+    area_locations = [world_list.node_to_area_location(area.nodes[0]) for area in areas if area.nodes]
+
+    measure("potential_nodes_from", args.repeat, lambda: [
+        list(world_list.potential_nodes_from(node, patches))
+        for node in all_nodes
+    ])
+
+    graph = CompiledGraph(world_list, game.resource_slots, patches, False)
+    measure("CompiledGraph, first time", 1, lambda: [
+        graph.connections_from(node)
+        for node in all_nodes
+    ])
+    measure("CompiledGraph", args.repeat, lambda: [
+        graph.connections_from(node)
+        for node in all_nodes
+    ])
+
+    measure("node_from_name", args.repeat, lambda: [
+        world_list.node_from_name(name)
+        for name in node_names
+    ])
+    measure("area_by_area_location", args.repeat, lambda: [
+        world_list.area_by_area_location(location)
+        for location in area_locations
+    ])
+    measure("world_with_area", args.repeat, lambda: [
+        world_list.world_with_area(area)
+        for area in areas
+    ])
+
+
+if __name__ == '__main__':
+    main()